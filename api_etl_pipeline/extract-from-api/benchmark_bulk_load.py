@@ -0,0 +1,83 @@
+"""
+Benchmark recording insert throughput against a local SQL Server container.
+
+Start one with:
+    docker run -e ACCEPT_EULA=Y -e MSSQL_SA_PASSWORD=... -p 1433:1433 \
+        mcr.microsoft.com/mssql/server:2022-latest
+then run db_etl_pipeline/schema.sql against it, point .env at it and run:
+    PYTHONPATH=../../shared python benchmark_bulk_load.py [sizes...]
+
+Rows are inserted into a scratch copy of alpha.recording which is dropped afterwards.
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bulk_load import RECORDING_COLUMNS, insert_recordings
+from load_plants import DB_SCHEMA, get_engine
+
+SIZES = [10_000, 100_000, 1_000_000]
+BENCH_TABLE = "recording_bench"
+TO_SQL_LIMIT = 100_000  # the old to_sql path is too slow to be worth timing past this
+
+
+def fake_recordings(size: int) -> pd.DataFrame:
+    """Returns `size` random recordings."""
+    rng = np.random.default_rng(0)
+    taken = pd.Timestamp("2025-09-24") + pd.to_timedelta(rng.integers(0, 86_400, size), unit="s")
+    return pd.DataFrame({
+        "plant_id": rng.integers(1, 50, size),
+        "botanist_id": rng.integers(1, 5, size),
+        "temperature": rng.uniform(5, 25, size).round(2),
+        "last_watered": taken - pd.Timedelta(hours=3),
+        "soil_moisture": rng.uniform(10, 90, size).round(2),
+        "recording_taken": taken,
+    })[RECORDING_COLUMNS]
+
+
+def insert_to_sql(conn, df: pd.DataFrame) -> None:
+    """The previous insert path: pandas multi-row INSERT statements."""
+    # SQL Server allows at most 2100 parameters per statement
+    df.to_sql(BENCH_TABLE, conn, schema=DB_SCHEMA, if_exists="append", index=False,
+              chunksize=2000 // len(RECORDING_COLUMNS), method="multi")
+
+
+def time_backend(engine, backend: str, df: pd.DataFrame) -> float:
+    """Returns rows per second for one backend, rolling the insert back afterwards."""
+    with engine.connect() as conn:
+        trans = conn.begin()
+        start = time.perf_counter()
+        if backend == "to_sql":
+            insert_to_sql(conn, df)
+        else:
+            insert_recordings(conn, df, DB_SCHEMA, BENCH_TABLE, backend=backend)
+        seconds = time.perf_counter() - start
+        trans.rollback()
+    return len(df) / seconds
+
+
+def main(sizes: list[int]) -> None:
+    """Prints rows/sec per backend for each batch size."""
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {DB_SCHEMA}.{BENCH_TABLE}")
+        conn.exec_driver_sql(f"SELECT TOP 0 {', '.join(RECORDING_COLUMNS)} "
+                             f"INTO {DB_SCHEMA}.{BENCH_TABLE} FROM {DB_SCHEMA}.recording")
+    try:
+        print(f"{'rows':>9} {'backend':>12} {'rows/sec':>10}")
+        for size in sizes:
+            df = fake_recordings(size)
+            for backend in ("to_sql", "executemany", "tvp"):
+                if backend == "to_sql" and size > TO_SQL_LIMIT:
+                    continue
+                print(f"{size:>9} {backend:>12} {time_backend(engine, backend, df):>10.0f}")
+    finally:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {DB_SCHEMA}.{BENCH_TABLE}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or SIZES)
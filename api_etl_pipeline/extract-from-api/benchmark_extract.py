@@ -0,0 +1,36 @@
+"""
+Benchmark the threaded and async extract modes against a local stub API.
+
+Usage: PYTHONPATH=../../shared python benchmark_extract.py [latency_seconds]
+"""
+
+import sys
+import time
+
+import extract_plants
+from stub_api import StubPlantAPI
+
+SIZES = [85, 1000, 5000]
+
+
+def time_mode(mode: str, ids: list[int]) -> tuple[float, int]:
+    """Returns the wall time and number of plants fetched for one mode."""
+    start = time.perf_counter()
+    rows = extract_plants.fetch_plants(ids, mode)
+    return time.perf_counter() - start, len(rows)
+
+
+def main(latency: float) -> None:
+    """Prints wall time per mode for each number of plant ids."""
+    print(f"{'ids':>6} {'mode':>9} {'seconds':>8} {'plants':>7} {'req/s':>8}")
+    for size in SIZES:
+        ids = list(range(1, size + 1))
+        with StubPlantAPI(live_ids=ids, latency=latency) as stub:
+            extract_plants.API_URL = stub.url
+            for mode in ("threaded", "async"):
+                seconds, fetched = time_mode(mode, ids)
+                print(f"{size:>6} {mode:>9} {seconds:>8.2f} {fetched:>7} {size / seconds:>8.0f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.02)
@@ -0,0 +1,46 @@
+"""
+Benchmark a single-attempt fetch against the retrying FetchPolicy on a faulty stub API.
+
+"single" is the old behaviour: one attempt per plant with a fixed 10s timeout.
+Usage: PYTHONPATH=../../shared python benchmark_resilience.py [ids]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import extract_plants
+from resilience import FetchPolicy, LatencyTracker
+from stub_api import StubPlantAPI
+
+FAULTS = {"latency": 0.02, "error_rate": 0.05, "drop_rate": 0.02, "stall_rate": 0.02,
+          "stall": 3.0, "seed": 7}
+
+
+def policies() -> dict:
+    """Returns the policies to compare, fresh for each run."""
+    return {
+        "single": FetchPolicy(max_attempts=1, latency=LatencyTracker(min_timeout=10)),
+        "resilient": FetchPolicy(),
+    }
+
+
+def main(size: int) -> None:
+    """Prints wall time, plants lost and retries per policy and mode."""
+    ids = list(range(1, size + 1))
+    print(f"{'mode':>9} {'policy':>10} {'seconds':>8} {'plants':>7} {'lost':>5} {'retries':>8}")
+    for mode in ("threaded", "async"):
+        for name, policy in policies().items():
+            with StubPlantAPI(live_ids=ids, **FAULTS) as stub:
+                extract_plants.API_URL = stub.url
+                start = time.perf_counter()
+                with contextlib.redirect_stderr(io.StringIO()):
+                    rows = extract_plants.fetch_plants(ids, mode, policy=policy)
+                seconds = time.perf_counter() - start
+            print(f"{mode:>9} {name:>10} {seconds:>8.2f} {len(rows):>7} "
+                  f"{size - len(rows):>5} {policy.retries:>8}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
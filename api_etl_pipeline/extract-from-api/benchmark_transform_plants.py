@@ -0,0 +1,127 @@
+"""
+Benchmark each stage of transform_plants on raw plant records, against the previous approach.
+
+"legacy" is the old transform: every object column through astype(str).str.strip(),
+numerics and datetimes re-parsed from those strings, phones normalised row by row,
+and foreign keys resolved by three chained merges.
+Usage: PYTHONPATH=../../shared python benchmark_transform_plants.py [rows]
+"""
+
+from pathlib import Path
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from dimensions import DimensionIndex
+import surrogate_keys
+import transform_plants
+from transform_plants import RAW_SCHEMA, apply_schema, clean_categories, normalise_phone
+
+PHONES = ["(146)994-1635x35992", "+44 (0)20 7946 0958", "001-481-273-3691x742",
+          "538.955.7449", "(812)459-3290 ext 22", "911.795.0934x1160"]
+
+
+def fake_records(size: int) -> list[dict]:
+    """Returns raw plant records shaped like flatten_plant's output."""
+    rng = random.Random(0)
+    return [{
+        "plant_id": i,
+        "name": f" Plant {i % 500} ",
+        "scientific_name": rng.choice([None, f"Plantae {i % 500}"]),
+        "temperature": rng.uniform(-2, 30),
+        "soil_moisture": rng.uniform(-5, 100),
+        "last_watered": "2025-09-24T09:00:00.000Z",
+        "recording_taken": f"2025-09-24T10:{i % 60:02d}:00.000Z",
+        "latitude": rng.uniform(-60, 60),
+        "longitude": rng.uniform(-120, 120),
+        "origin_city": f"City {rng.randint(1, 200)}",
+        "origin_country": f"Country {rng.randint(1, 40)}",
+        "botanist_name": f"Botanist {i % 12}",
+        "botanist_email": f"botanist{i % 12}@lnhm.co.uk",
+        "botanist_phone": PHONES[i % 12 % len(PHONES)],
+    } for i in range(1, size + 1)]
+
+
+def legacy_clean(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous cleaning steps."""
+    df = df.copy()
+    for col in df.select_dtypes(["object", "string"]).columns:
+        df[col] = df[col].astype(str).str.strip().replace({"nan": None, "None": None})
+    for col in ["temperature", "soil_moisture", "latitude", "longitude"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["last_watered", "recording_taken"]:
+        df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+    return df
+
+
+def legacy_keys(df: pd.DataFrame, tables: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """The previous key resolution: merge each dimension in, then drop its name column."""
+    df = (df.merge(tables["country"], left_on="origin_country", right_on="name", how="left",
+                   suffixes=("", "_country"))
+            .merge(tables["city"], left_on="origin_city", right_on="name", how="left",
+                   suffixes=("", "_city"))
+            .merge(tables["botanist"][["botanist_id", "email"]], left_on="botanist_email",
+                   right_on="email", how="left"))
+    for col in df.columns:
+        if col.startswith("name") and col not in ["plant_name"]:
+            df.drop(columns=[col], inplace=True)
+    return df
+
+
+def indexed_keys(df: pd.DataFrame, tables: dict[str, pd.DataFrame]) -> dict[str, pd.Series]:
+    """Key resolution through a DimensionIndex per dimension."""
+    return {
+        f"{dim}_id": DimensionIndex.from_frame(tables[dim], key).lookup(df[column], f"{dim}_id")
+        for dim, key, column in [("country", "name", "origin_country"), ("city", "name", "origin_city"),
+                                 ("botanist", "email", "botanist_email")]
+    }
+
+
+def measure(func, *args) -> tuple[float, float]:
+    """Returns the wall time in seconds and the peak traced allocation in MB of a call."""
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+
+def main(size: int) -> None:
+    """Prints time, peak allocations and resulting frame size of each stage."""
+    records = fake_records(size)
+    raw = pd.DataFrame.from_records(records, columns=list(RAW_SCHEMA))
+    legacy, typed = legacy_clean(raw), apply_schema(raw)
+    tables = transform_plants.transform(raw, write_csv=False)
+    named = typed.rename(columns={"name": "plant_name"})
+    stages = [
+        ("build frame", "both", lambda: pd.DataFrame.from_records(records, columns=list(RAW_SCHEMA)),
+         None),
+        ("clean", "legacy", lambda: legacy_clean(raw), legacy),
+        ("clean", "schema", lambda: apply_schema(raw), typed),
+        ("phones", "legacy", lambda: legacy["botanist_phone"].apply(normalise_phone), None),
+        ("phones", "categorical", lambda: clean_categories(
+            typed["botanist_phone"], lambda phones: phones.apply(normalise_phone)), None),
+        ("keys", "merge", lambda: legacy_keys(named, tables), None),
+        ("keys", "index", lambda: indexed_keys(named, tables), None),
+        ("transform", "schema", lambda: transform_plants.transform(raw.copy(), write_csv=False),
+         None),
+    ]
+    print(f"{'stage':>10} {'approach':>12} {'seconds':>8} {'peak MB':>8} {'frame MB':>9}")
+    for stage, approach, func, frame in stages:
+        seconds, peak = measure(func)
+        frame_mb = f"{frame.memory_usage(deep=True).sum() / 2**20:9.1f}" if frame is not None else ""
+        print(f"{stage:>10} {approach:>12} {seconds:>8.2f} {peak:>8.1f} {frame_mb:>9}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        surrogate_keys._registry = surrogate_keys.SurrogateKeyRegistry(
+            path=Path(tmp) / "keys.json")
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,103 @@
+"""
+Bulk insert backends for alpha.recording.
+
+"tvp" streams rows to SQL Server as one table-valued parameter per chunk
+(needs the alpha.recording_rows table type from schema.sql); "executemany"
+uses pyodbc's fast_executemany array binding. "auto" tries the TVP first and
+falls back to fast_executemany for the rest of the container's life if the
+server says the table type is missing. Any other error is raised as it is.
+"""
+
+import os
+
+import pandas as pd
+
+RECORDING_COLUMNS = [
+    "plant_id",
+    "botanist_id",
+    "temperature",
+    "last_watered",
+    "soil_moisture",
+    "recording_taken",
+]
+RECORDING_TVP_TYPE = "recording_rows"
+BULK_BACKEND = os.getenv("RECORDING_BULK_BACKEND", "auto")  # auto, tvp or executemany
+BULK_CHUNK_SIZE = int(os.getenv("RECORDING_BULK_CHUNK_SIZE", "50000"))
+# SQL Server errors 2715 "Cannot find data type" and 2812 "Could not find stored procedure"
+MISSING_TYPE_ERRORS = ("(2715)", "(2812)", "Cannot find data type",
+                       "Could not find stored procedure")
+
+_tvp_available = True
+
+
+class TvpUnavailable(Exception):
+    """Raised when the table type for the TVP insert doesn't exist, before any rows went in."""
+
+
+def is_missing_type(exc: Exception) -> bool:
+    """Returns whether a database error says the table type or procedure doesn't exist."""
+    message = str(exc)
+    return any(marker in message for marker in MISSING_TYPE_ERRORS)
+
+
+def to_rows(df: pd.DataFrame) -> list[tuple]:
+    """Returns the rows of a DataFrame as tuples of Python values, with NaN as None."""
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def chunks(rows: list, size: int):
+    """Yields consecutive slices of at most `size` rows."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def insert_tvp(cursor, rows: list[tuple], schema: str, table: str,
+               db_error: type = Exception) -> None:
+    """Inserts rows by passing each chunk as a single table-valued parameter."""
+    columns = ", ".join(RECORDING_COLUMNS)
+    sql = f"INSERT INTO {schema}.{table} ({columns}) SELECT {columns} FROM ?"
+    inserted = 0
+    for chunk in chunks(rows, BULK_CHUNK_SIZE):
+        try:
+            cursor.execute(sql, [[RECORDING_TVP_TYPE, schema, *chunk]])
+        except db_error as exc:
+            # Only a missing type, before any rows went in, is safe to retry another way
+            if inserted or not is_missing_type(exc):
+                raise
+            raise TvpUnavailable(str(exc)) from exc
+        inserted += len(chunk)
+
+
+def insert_executemany(cursor, rows: list[tuple], schema: str, table: str) -> None:
+    """Inserts rows with fast_executemany parameter arrays."""
+    columns = ", ".join(RECORDING_COLUMNS)
+    placeholders = ", ".join("?" for _ in RECORDING_COLUMNS)
+    cursor.fast_executemany = True
+    sql = f"INSERT INTO {schema}.{table} ({columns}) VALUES ({placeholders})"
+    for chunk in chunks(rows, BULK_CHUNK_SIZE):
+        cursor.executemany(sql, chunk)
+
+
+def insert_recordings(conn, df: pd.DataFrame, schema: str, table: str = "recording",
+                      backend: str = BULK_BACKEND) -> str:
+    """Bulk inserts recordings on a SQLAlchemy connection and returns the backend used."""
+    global _tvp_available  # pylint: disable=global-statement
+    rows = to_rows(df[RECORDING_COLUMNS])
+    cursor = conn.connection.cursor()
+    try:
+        if backend == "tvp" or (backend == "auto" and _tvp_available):
+            try:
+                insert_tvp(cursor, rows, schema, table, conn.dialect.loaded_dbapi.Error)
+                return "tvp"
+            except TvpUnavailable as exc:
+                if backend == "tvp":
+                    raise
+                print(f"[LOAD] TVP insert unavailable, falling back to fast_executemany: {exc}")
+                _tvp_available = False
+        elif backend not in ("auto", "executemany"):
+            raise ValueError(f"Unknown bulk backend: {backend}")
+        insert_executemany(cursor, rows, schema, table)
+        return "executemany"
+    finally:
+        cursor.close()
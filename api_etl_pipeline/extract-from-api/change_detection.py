@@ -0,0 +1,111 @@
+"""
+Drops plant readings that were already loaded, before transform and load.
+
+The API serves each plant's latest reading, which often hasn't changed since
+the previous minute's run. The newest recording_taken loaded for each plant is
+kept in FINGERPRINT_FILE between invocations, and any reading that isn't newer
+is skipped. The fingerprints are seeded from alpha.latest_recording whenever
+the cache is missing or alpha.recording has been recreated by the nightly
+reset. They are only an optimisation: the unique (plant_id, recording_taken)
+index on alpha.recording discards any duplicate that gets through.
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+import json
+import os
+
+import pandas as pd
+from sqlalchemy import text
+
+FINGERPRINT_FILE = Path(os.getenv("FINGERPRINT_FILE", "/tmp/plant-fingerprints.json"))
+FINGERPRINT_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def to_fingerprint(value) -> Optional[str]:
+    """Returns a reading time as a sortable naive UTC string, or None if it isn't a time."""
+    try:
+        taken = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None
+    if pd.isna(taken):
+        return None
+    if taken.tzinfo is not None:
+        taken = taken.tz_convert(None)
+    return taken.strftime(FINGERPRINT_FORMAT)
+
+
+class ChangeDetector:
+    """The newest recording_taken loaded for each plant, tagged with alpha.recording's creation time."""
+
+    def __init__(self, latest: dict = None, generation: str = "", path: Path = FINGERPRINT_FILE):
+        self.latest = dict(latest or {})  # plant_id -> fingerprint of the newest loaded reading
+        self.generation = generation
+        self.path = path
+        self.pending = {}
+        self.seen = 0
+        self.skipped = 0
+
+    @classmethod
+    def load(cls, path: Path = FINGERPRINT_FILE) -> "ChangeDetector":
+        """Loads the fingerprints left by the previous invocation, or starts empty."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return cls(path=path)
+        latest = {int(pid): taken for pid, taken in state.get("latest", {}).items()}
+        return cls(latest, state.get("generation", ""), path)
+
+    def save(self) -> None:
+        """Persists the fingerprints for the next invocation."""
+        state = {"generation": self.generation,
+                 "latest": {str(pid): taken for pid, taken in self.latest.items()}}
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def reconcile(self, conn, schema: str) -> None:
+        """Reseeds from latest_recording if there is no cache or alpha.recording was recreated."""
+        created = conn.execute(
+            text("SELECT create_date FROM sys.tables "
+                 "WHERE name = 'recording' AND schema_id = SCHEMA_ID(:schema)"),
+            {"schema": schema}).scalar()
+        generation = created.isoformat() if created is not None else ""
+        if generation == self.generation and self.latest:
+            return
+        rows = conn.execute(text(f"SELECT plant_id, recording_taken FROM {schema}.latest_recording"))
+        self.latest = {int(pid): to_fingerprint(taken) for pid, taken in rows}
+        self.generation = generation
+        print(f"[CHANGES] Seeded {len(self.latest)} plant fingerprints from {schema}.latest_recording.")
+
+    def changed(self, records: Iterable[dict]) -> list[dict]:
+        """Returns the records whose reading is newer than the last one seen for their plant."""
+        fresh = []
+        for record in records:
+            self.seen += 1
+            pid = record.get("plant_id")
+            taken = to_fingerprint(record.get("recording_taken"))
+            if taken is None:
+                # Let the transform step decide what to do with a reading it can't date
+                fresh.append(record)
+                continue
+            last = max(self.latest.get(pid) or "", self.pending.get(pid) or "")
+            if taken <= last:
+                self.skipped += 1
+                continue
+            self.pending[pid] = taken
+            fresh.append(record)
+        return fresh
+
+    def filter_batches(self, batches: Iterable[list[dict]]) -> Iterator[list[dict]]:
+        """Yields each batch with its unchanged readings removed."""
+        for batch in batches:
+            yield self.changed(batch)
+
+    def commit(self) -> None:
+        """Records the readings just loaded and persists the fingerprints."""
+        self.latest.update(self.pending)
+        self.pending = {}
+        self.save()
@@ -0,0 +1,142 @@
+"""
+Adaptive plant id discovery for the extract step.
+
+Remembers which plant ids were live on earlier runs, re-checks ids that
+failed on an exponential backoff schedule, and gallops past the highest
+live id to find newly added plants. Ids the fetcher couldn't reach (rather
+than ids the API said were dead) keep their place, and unreachable ids that
+weren't known yet are requested again next run.
+"""
+
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Iterator
+import json
+import os
+
+STATE_FILE = Path(os.getenv("DISCOVERY_STATE_FILE", "/tmp/plant-ids.json"))
+SEED_COUNT = 50       # ids probed from START_ID when nothing is known yet
+DENSE_WINDOW = 8      # every id this close past the edge is probed each run
+GALLOP_LIMIT = 64     # furthest power-of-two offset probed past the edge
+MAX_BACKOFF_RUNS = 64
+
+
+class IdDiscovery:
+    """Tracks the known plant id space and decides which ids to request."""
+
+    def __init__(self, live: set = None, retries: dict = None, run: int = 0,
+                 start_id: int = 1, seed_count: int = SEED_COUNT):
+        self.live = set(live or ())
+        self.retries = dict(retries or {})  # id -> (failures, run it is next due)
+        self.run = run
+        self.start_id = start_id
+        self.seed_count = seed_count
+
+    @classmethod
+    def load(cls, path: Path = STATE_FILE, **kwargs) -> "IdDiscovery":
+        """Loads the state left by the previous run, or starts fresh."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return cls(**kwargs)
+        retries = {int(pid): tuple(due) for pid, due in state.get("retries", {}).items()}
+        return cls(set(state.get("live", [])), retries, state.get("run", 0), **kwargs)
+
+    def save(self, path: Path = STATE_FILE) -> None:
+        """Persists the state for the next run."""
+        state = {
+            "run": self.run,
+            "live": sorted(self.live),
+            "retries": {str(pid): list(due) for pid, due in self.retries.items()},
+        }
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def known_ids(self) -> list[int]:
+        """Returns live ids plus failed ids whose retry is due this run."""
+        if not self.live and not self.retries:
+            return list(range(self.start_id, self.start_id + self.seed_count))
+        due = {pid for pid, (_, next_run) in self.retries.items() if next_run <= self.run}
+        return sorted(self.live | due)
+
+    def edge(self) -> int:
+        """Returns the highest live id, or the id just before START_ID."""
+        return max(self.live, default=self.start_id - 1)
+
+    def edge_probes(self) -> list[int]:
+        """Returns a dense window past the edge followed by galloping offsets."""
+        edge = self.edge()
+        steps = list(range(1, DENSE_WINDOW + 1))
+        step = DENSE_WINDOW * 2
+        while step <= GALLOP_LIMIT:
+            steps.append(step)
+            step *= 2
+        return [edge + step for step in steps]
+
+    def record(self, requested: list[int], found: set, unresolved: set = frozenset()) -> set:
+        """Updates live ids and the retry schedule from one round of requests.
+
+        Returns the missed ids past the edge, which are only gaps if a later round finds plants beyond them.
+        """
+        self.live.update(pid for pid in requested if pid in found)
+        beyond = set()
+        for pid in requested:
+            if pid in unresolved and pid not in found:
+                if pid in self.live or pid in self.retries:
+                    continue
+                if pid < self.edge():
+                    self.retries[pid] = (0, self.run + 1)
+                else:
+                    beyond.add(pid)
+                continue
+            if pid in found:
+                self.retries.pop(pid, None)
+            elif pid in self.live or pid in self.retries or pid < self.edge():
+                self.live.discard(pid)
+                failures = self.retries.get(pid, (0, 0))[0] + 1
+                self.retries[pid] = (failures, self.run + min(2 ** failures, MAX_BACKOFF_RUNS))
+            else:
+                beyond.add(pid)
+        return beyond
+
+    def discover_batches(self, fetch: Callable[[list[int]], list[dict]],
+                         unresolved: set = None) -> Iterator[list[dict]]:
+        """Runs one discovery pass with `fetch`, yielding the plants found by each round.
+
+        `unresolved` is the set the fetcher adds ids it couldn't reach to.
+        """
+        self.run += 1
+        requested = set()
+        beyond = set()
+        unresolved = set() if unresolved is None else unresolved
+
+        def fetch_round(ids) -> list[dict]:
+            ids = [pid for pid in ids if pid not in requested]
+            requested.update(ids)
+            found = fetch(ids) if ids else []
+            beyond.update(self.record(ids, {row["plant_id"] for row in found}, unresolved))
+            return found
+
+        yield fetch_round(self.known_ids())
+        while True:
+            edge = self.edge()
+            hits = fetch_round(self.edge_probes())
+            if not hits:
+                break
+            yield hits
+            # Fill in any ids skipped between the old edge and the furthest hit
+            yield fetch_round(range(edge + 1, max(row["plant_id"] for row in hits)))
+
+        # Misses that a later round left below the edge are gaps, so they are retried like any other,
+        # and unreachable ones are retried next run
+        self.record(sorted(pid for pid in beyond if pid < self.edge()), set(), unresolved)
+        print(f"[DISCOVERY] Run {self.run}: {len(requested)} requests, "
+              f"{len(self.live)} live ids, {len(self.retries)} scheduled retries.")
+
+    def discover(self, fetch: Callable[[list[int]], list[dict]]) -> list[dict]:
+        """Runs one discovery pass with `fetch` and returns the plants found, by id."""
+        rows = chain.from_iterable(self.discover_batches(fetch))
+        return sorted(rows, key=lambda row: row["plant_id"])
@@ -1,23 +1,37 @@
 """
 Extract plant data from the LNMH API and save as plants-raw.csv.
 
-Uses multithreading to speed up API calls.
+Fetches plants concurrently, either with asyncio over one pooled keep-alive
+HTTP client (default) or with a thread pool. Only the HTTP library the chosen
+mode uses is imported. Every request in a run shares one FetchPolicy, which
+sets deadlines, retries transient errors and stops a run that is out of time
+(see resilience.py).
 
 """
 
+from itertools import chain
 from pathlib import Path
-from typing import Optional, Any
+from typing import Optional, Any, Iterator
+import asyncio
 import csv
+import os
 import sys
+import time
 import concurrent.futures
-import requests
+
+from discover_ids import IdDiscovery
+from resilience import FetchPolicy, TransientError, TRANSIENT_STATUSES
+from runtime import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+requests = lazy_import("requests")
 
 # config
 API_URL = "https://sigma-labs-bot.herokuapp.com/api/plants/"
-TARGET_COUNT = 50
 START_ID = 1
-MAX_ATTEMPTS = 85
 RAW_FILE = Path("/tmp/plants-raw.csv")
+EXTRACT_MODE = os.getenv("EXTRACT_MODE", "async")  # "async" or "threaded"
+CONCURRENCY = int(os.getenv("EXTRACT_CONCURRENCY", "30"))
 
 # Custom exception
 class PlantFetchError(Exception):
@@ -50,43 +64,153 @@ def flatten_plant(dictionary: dict) -> dict:
         "botanist_phone": botanist.get("phone"),
     }
 
-def fetch_single(pid: int) -> Optional[dict]:
-    """Fetches single plant via its id, returns None on error."""
-    try:
-        response = requests.get(f"{API_URL}{pid}", timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if "error" in data:
-            print(f"[{pid}] API error: {data['error']}", file=sys.stderr)
-            return None
-        data.setdefault("plant_id", pid)
-        return flatten_plant(data)
-    except (requests.exceptions.RequestException, ValueError) as e:
-        print(f"[{pid}] Request error: {e}", file=sys.stderr)
+def parse_plant(pid: int, status: int, data) -> Optional[dict]:
+    """Returns the flattened plant from an API answer, or None for a dead id."""
+    if status in TRANSIENT_STATUSES:
+        raise TransientError(f"HTTP {status}")
+    if status >= 400 or not isinstance(data, dict) or "error" in data:
+        error = data.get("error") if isinstance(data, dict) else None
+        print(f"[{pid}] API error: {error or f'HTTP {status}'}", file=sys.stderr)
         return None
+    data.setdefault("plant_id", pid)
+    return flatten_plant(data)
 
-# main logic
-def extract():
-    """Fetch plant records in parallel and write plants-raw.csv."""
-    ids = list(range(START_ID, START_ID + MAX_ATTEMPTS))
-    rows = []
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-        for result in executor.map(fetch_single, ids):
-            if result:
-                rows.append(result)
-                if len(rows) >= TARGET_COUNT:
-                    break
+def fetch_single(pid: int, policy: FetchPolicy = None) -> Optional[dict]:
+    """Fetches single plant via its id, retrying transient errors; returns None if it can't."""
+    policy = policy or FetchPolicy()
+    attempt = 0
+    while attempt < policy.max_attempts:
+        # An open circuit pauses the request rather than using up its attempts
+        wait = policy.wait_time()
+        if wait is None:
+            break
+        if wait:
+            time.sleep(wait)
+            continue
+        if not policy.allow():
+            continue
+        start = time.monotonic()
+        try:
+            response = requests.get(f"{API_URL}{pid}", timeout=policy.timeout())
+            try:
+                data = response.json()
+            except ValueError:
+                if response.status_code < 400:
+                    raise
+                data = None
+            plant = parse_plant(pid, response.status_code, data)
+            policy.succeeded(time.monotonic() - start)
+            return plant
+        except (requests.exceptions.RequestException, ValueError, TransientError) as e:
+            print(f"[{pid}] Request error (attempt {attempt + 1}): {e}", file=sys.stderr)
+            if not policy.failed(attempt):
+                break
+            time.sleep(policy.backoff(attempt))
+        attempt += 1
+    policy.unresolved.add(pid)
+    return None
+
+async def fetch_single_async(session: "aiohttp.ClientSession", limit: asyncio.Semaphore,
+                             pid: int, policy: FetchPolicy = None) -> Optional[dict]:
+    """Fetches single plant via its id on a shared session, retrying transient errors."""
+    policy = policy or FetchPolicy()
+    attempt = 0
+    while attempt < policy.max_attempts:
+        # An open circuit pauses the request rather than using up its attempts
+        wait = policy.wait_time()
+        if wait is None:
+            break
+        if wait:
+            await asyncio.sleep(wait)
+            continue
+        try:
+            # The timeout starts once a slot is free, so queued ids never time out,
+            # and the slot is given back while waiting to retry
+            async with limit:
+                if not policy.allow():
+                    continue
+                start = time.monotonic()
+                timeout = aiohttp.ClientTimeout(total=policy.timeout())
+                async with session.get(f"{API_URL}{pid}", timeout=timeout) as response:
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        if response.status < 400:
+                            raise
+                        data = None
+                plant = parse_plant(pid, response.status, data)
+                policy.succeeded(time.monotonic() - start)
+                return plant
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, TransientError) as e:
+            print(f"[{pid}] Request error (attempt {attempt + 1}): {e!r}", file=sys.stderr)
+            if not policy.failed(attempt):
+                break
+            await asyncio.sleep(policy.backoff(attempt))
+        attempt += 1
+    policy.unresolved.add(pid)
+    return None
+
+
+async def fetch_all_async(ids: list[int], concurrency: int = CONCURRENCY,
+                          policy: FetchPolicy = None) -> list[Optional[dict]]:
+    """Fetches all ids over one keep-alive pool, with at most `concurrency` in flight."""
+    limit = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(*(fetch_single_async(session, limit, pid, policy)
+                                      for pid in ids))
+
+
+def fetch_threaded(ids: list[int], concurrency: int = CONCURRENCY,
+                   policy: FetchPolicy = None) -> list[Optional[dict]]:
+    """Fetches all ids with a thread pool, one request per plant."""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(lambda pid: fetch_single(pid, policy), ids))
 
-    if not rows:
-        raise RuntimeError("No valid plant data retrieved.")
 
+def fetch_plants(ids: list[int], mode: str = EXTRACT_MODE,
+                 concurrency: int = CONCURRENCY, policy: FetchPolicy = None) -> list[dict]:
+    """Fetches the given plant ids in id order, dropping dead and unresolved ones."""
+    policy = policy or FetchPolicy()
+    if mode == "async":
+        results = asyncio.run(fetch_all_async(ids, concurrency, policy))
+    elif mode == "threaded":
+        results = fetch_threaded(ids, concurrency, policy)
+    else:
+        raise ValueError(f"Unknown extract mode: {mode}")
+    return [result for result in results if result]
+
+
+# main logic
+def extract_batches(mode: str = EXTRACT_MODE) -> Iterator[list[dict]]:
+    """Yields batches of flattened plant records as each discovery round completes."""
+    discovery = IdDiscovery.load(start_id=START_ID)
+    policy = FetchPolicy()
+    yield from discovery.discover_batches(lambda ids: fetch_plants(ids, mode, policy=policy),
+                                          unresolved=policy.unresolved)
+    discovery.save()
+    print(f"[EXTRACT] {policy.summary()}")
+
+
+def write_raw_csv(rows: list[dict]) -> None:
+    """Writes flattened plant records to plants-raw.csv."""
     with open(RAW_FILE, "w", newline="", encoding="utf-8") as f:
         w = csv.DictWriter(f, fieldnames=rows[0].keys())
         w.writeheader()
         w.writerows(rows)
 
+
+def extract(mode: str = EXTRACT_MODE) -> list[dict]:
+    """Fetch plant records in parallel and write plants-raw.csv."""
+    rows = sorted(chain.from_iterable(extract_batches(mode)), key=lambda row: row["plant_id"])
+
+    if not rows:
+        raise RuntimeError("No valid plant data retrieved.")
+
+    write_raw_csv(rows)
     print(f"[DONE] Extracted {len(rows)} → {RAW_FILE}")
+    return rows
 
 # entry point
 if __name__ == "__main__":
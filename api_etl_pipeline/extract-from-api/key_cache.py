@@ -0,0 +1,72 @@
+"""
+Persistent index of dimension primary keys already loaded into SQL Server.
+
+Lets the load step skip known dimension rows without reading whole tables.
+The cache is only an optimisation: new rows still go through a MERGE, so a
+stale or missing cache can never cause duplicate keys.
+"""
+
+from pathlib import Path
+import json
+import os
+
+from sqlalchemy import text
+
+KEY_CACHE_FILE = Path(os.getenv("KEY_CACHE_FILE", "/tmp/key-index.json"))
+
+
+class KeyIndexCache:
+    """Known primary keys per table, tagged with the table's creation time."""
+
+    def __init__(self, tables: dict = None, path: Path = KEY_CACHE_FILE):
+        self.tables = tables or {}  # table -> {"generation": str, "keys": set}
+        self.path = path
+
+    @classmethod
+    def load(cls, path: Path = KEY_CACHE_FILE) -> "KeyIndexCache":
+        """Loads the cache left by the previous invocation, or starts empty."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return cls(path=path)
+        tables = {
+            table: {"generation": entry["generation"], "keys": set(entry["keys"])}
+            for table, entry in state.items()
+        }
+        return cls(tables, path)
+
+    def save(self) -> None:
+        """Persists the cache for the next invocation."""
+        state = {
+            table: {"generation": entry["generation"], "keys": sorted(entry["keys"])}
+            for table, entry in self.tables.items()
+        }
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+    def reconcile(self, conn, schema: str) -> None:
+        """Forgets the keys of any table dropped and recreated since it was cached."""
+        query = text("SELECT name, create_date FROM sys.tables WHERE schema_id = SCHEMA_ID(:schema)")
+        for table, created in conn.execute(query, {"schema": schema}):
+            generation = created.isoformat()
+            entry = self.tables.get(table)
+            if entry is None or entry["generation"] != generation:
+                if entry is not None:
+                    print(f"[LOAD] {schema}.{table} was recreated, resetting its key cache.")
+                self.tables[table] = {"generation": generation, "keys": set()}
+
+    def keys(self, table: str) -> set:
+        """Returns the keys known to exist in a table."""
+        return self.tables.get(table, {}).get("keys", set())
+
+    def add(self, table: str, keys) -> None:
+        """Records keys now present in a table."""
+        entry = self.tables.setdefault(table, {"generation": "", "keys": set()})
+        entry["keys"].update(int(key) for key in keys)
+
+    def clear(self) -> None:
+        """Drops every cached key so the next load reconciles from scratch."""
+        self.tables = {}
@@ -1,6 +1,11 @@
 """
-Load transformed CSVs into SQL Server (safe append) using SQLAlchemy + pyodbc.
-Only inserts rows whose primary keys do not already exist.
+Load transformed tables into SQL Server (safe append) using SQLAlchemy + pyodbc.
+Tables come from the transform step in memory, or from the transformed CSVs.
+Only inserts rows whose primary keys do not already exist: dimension rows
+are filtered against a cached key index, then MERGEd through a staging table.
+After recordings are inserted, alpha.latest_recording and the hourly
+rollups in alpha.recording_hourly are refreshed for the plants and hours
+they cover, so the dashboard reads aggregates instead of raw recordings.
 """
 import os
 from pathlib import Path
@@ -8,7 +13,11 @@ import urllib
 import warnings
 import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
+from runtime import cached
+
+from bulk_load import insert_recordings, to_rows
+from key_cache import KeyIndexCache
 
 warnings.filterwarnings("ignore", category=UserWarning, module="urllib3")
 
@@ -48,8 +57,111 @@ COLUMN_MAPS = {
     }
 }
 
-def load():
-    """Load CSVs into SQL Server using SQLAlchemy (safe append)."""
+def read_table(csv_file: str, tables: dict = None):
+    """Returns a table from the in-memory tables, or from its CSV when none are given."""
+    if tables is not None:
+        df = tables.get(csv_file.removesuffix(".csv"))
+        return None if df is None else df.copy()
+    file_path = DATA_DIR / csv_file
+    return pd.read_csv(file_path) if file_path.exists() else None
+
+
+def to_naive_utc(df: pd.DataFrame) -> pd.DataFrame:
+    """Converts tz-aware datetime columns to naive UTC for SQL Server DATETIME2."""
+    for col in df.select_dtypes("datetimetz").columns:
+        df[col] = df[col].dt.tz_convert(None)
+    return df
+
+
+def merge_new_rows(conn, df: pd.DataFrame, table: str, pk_col: str) -> int:
+    """Inserts rows whose key is not yet in the table via a staging table and MERGE."""
+    stage = f"#stage_{table}"
+    columns = ", ".join(df.columns)
+    source_columns = ", ".join(f"source.{col}" for col in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+
+    conn.exec_driver_sql(f"SELECT TOP 0 {columns} INTO {stage} FROM {DB_SCHEMA}.{table}")
+    try:
+        conn.exec_driver_sql(f"INSERT INTO {stage} ({columns}) VALUES ({placeholders})",
+                             to_rows(df))
+        result = conn.exec_driver_sql(
+            f"MERGE {DB_SCHEMA}.{table} WITH (HOLDLOCK) AS target "
+            f"USING {stage} AS source ON target.{pk_col} = source.{pk_col} "
+            f"WHEN NOT MATCHED BY TARGET THEN INSERT ({columns}) VALUES ({source_columns});"
+        )
+        return result.rowcount
+    finally:
+        conn.exec_driver_sql(f"DROP TABLE {stage}")
+
+
+def refresh_latest_recordings(conn, since) -> int:
+    """MERGEs each plant's newest recording taken at or after `since` into latest_recording."""
+    result = conn.exec_driver_sql(
+        f"""
+        MERGE {DB_SCHEMA}.latest_recording WITH (HOLDLOCK) AS target
+        USING (
+            SELECT plant_id, id, botanist_id, temperature, last_watered, soil_moisture,
+                   recording_taken
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY plant_id
+                                             ORDER BY recording_taken DESC, id DESC) AS newest
+                FROM {DB_SCHEMA}.recording
+                WHERE recording_taken >= ?
+            ) AS ranked
+            WHERE newest = 1
+        ) AS source ON target.plant_id = source.plant_id
+        WHEN MATCHED AND source.recording_taken >= target.recording_taken THEN UPDATE SET
+            recording_id = source.id, botanist_id = source.botanist_id,
+            temperature = source.temperature, last_watered = source.last_watered,
+            soil_moisture = source.soil_moisture, recording_taken = source.recording_taken
+        WHEN NOT MATCHED BY TARGET THEN INSERT
+            (plant_id, recording_id, botanist_id, temperature, last_watered, soil_moisture,
+             recording_taken)
+            VALUES (source.plant_id, source.id, source.botanist_id, source.temperature,
+                    source.last_watered, source.soil_moisture, source.recording_taken);
+        """,
+        (since,),
+    )
+    return result.rowcount
+
+
+def refresh_hourly_rollups(conn, since) -> int:
+    """Recomputes the hourly aggregates of every hour from the one containing `since` onwards."""
+    # Whole hours are recomputed rather than added to, so a re-run never double counts
+    hour = "DATEADD(hour, DATEDIFF(hour, 0, recording_taken), 0)"
+    result = conn.exec_driver_sql(
+        f"""
+        MERGE {DB_SCHEMA}.recording_hourly WITH (HOLDLOCK) AS target
+        USING (
+            SELECT plant_id, {hour} AS hour_start, COUNT(*) AS reading_count,
+                   AVG(CAST(temperature AS FLOAT)) AS avg_temperature,
+                   MIN(temperature) AS min_temperature, MAX(temperature) AS max_temperature,
+                   AVG(CAST(soil_moisture AS FLOAT)) AS avg_soil_moisture,
+                   MIN(soil_moisture) AS min_soil_moisture, MAX(soil_moisture) AS max_soil_moisture
+            FROM {DB_SCHEMA}.recording
+            WHERE recording_taken >= DATEADD(hour, DATEDIFF(hour, 0, ?), 0)
+            GROUP BY plant_id, {hour}
+        ) AS source ON target.plant_id = source.plant_id AND target.hour_start = source.hour_start
+        WHEN MATCHED THEN UPDATE SET
+            reading_count = source.reading_count,
+            avg_temperature = source.avg_temperature, min_temperature = source.min_temperature,
+            max_temperature = source.max_temperature, avg_soil_moisture = source.avg_soil_moisture,
+            min_soil_moisture = source.min_soil_moisture,
+            max_soil_moisture = source.max_soil_moisture
+        WHEN NOT MATCHED BY TARGET THEN INSERT
+            (plant_id, hour_start, reading_count, avg_temperature, min_temperature,
+             max_temperature, avg_soil_moisture, min_soil_moisture, max_soil_moisture)
+            VALUES (source.plant_id, source.hour_start, source.reading_count,
+                    source.avg_temperature, source.min_temperature, source.max_temperature,
+                    source.avg_soil_moisture, source.min_soil_moisture, source.max_soil_moisture);
+        """,
+        (since,),
+    )
+    return result.rowcount
+
+
+def create_db_engine():
+    """Returns a new SQLAlchemy engine for the SQL Server database."""
     odbc_str = (
         f"DRIVER={{{DB_DRIVER}}};"
         f"SERVER={DB_HOST},{DB_PORT};"
@@ -58,62 +170,94 @@ def load():
         f"PWD={DB_PASS};"
         "Encrypt=yes;TrustServerCertificate=yes;Connection Timeout=30;"
     )
-    engine = create_engine(
+    return create_engine(
         f"mssql+pyodbc:///?odbc_connect={urllib.parse.quote_plus(odbc_str)}",
-        fast_executemany=True
+        fast_executemany=True,
+        pool_pre_ping=True
     )
 
-    with engine.begin() as conn:
-        print("[LOAD] Connected to database. Starting upload…")
-
-        for csv_file, table, pk_col in TABLES:
-            file_path = DATA_DIR / csv_file
-            if not file_path.exists():
-                print(f"[LOAD] Skipping missing file: {csv_file}")
-                continue
-
-            df = pd.read_csv(file_path)
-
-            # Rename columns to match DB schema if needed
-            if table in COLUMN_MAPS:
-                df.rename(columns=COLUMN_MAPS[table], inplace=True)
-
-            # For recording table: drop the 'id' column so DB can autogenerate
-            if table == "recording" and "id" in df.columns:
-                df = df.drop(columns=["id"])
-
-            # Skip rows whose PK already exists (except recording)
-            if table != "recording" and pk_col in df.columns:
-                existing_keys = set()
-                query = text(f"SELECT {pk_col} FROM {DB_SCHEMA}.{table}")
-                for row in conn.execute(query):
-                    existing_keys.add(row[0])
-
-                before = len(df)
-                df = df[~df[pk_col].isin(existing_keys)]
-                skipped = before - len(df)
-                if skipped:
-                    print(f"[LOAD] Skipped {skipped} duplicate rows for {table}.")
-
-            if df.empty:
-                print(f"[LOAD] Nothing new to insert into {DB_SCHEMA}.{table}.")
-                continue
-
-            print(f"[LOAD] Inserting {len(df)} rows into {DB_SCHEMA}.{table}…")
-            try:
-                df.to_sql(
-                    name=table,
-                    con=conn,
-                    schema=DB_SCHEMA,
-                    if_exists="append",
-                    index=False,
-                    chunksize=1000,
-                    method="multi"
-                )
-            except Exception as exc:
-                raise RuntimeError(f"Failed to insert into {DB_SCHEMA}.{table}: {exc}") from exc
-
-        print("[LOAD] All tables loaded successfully.")
+
+def get_engine():
+    """Returns the engine cached for the container, whose pool pings connections before reuse."""
+    return cached("engine", create_db_engine)
+
+
+def merge_uncached(conn, df: pd.DataFrame, table: str, pk_col: str,
+                   key_cache: KeyIndexCache) -> None:
+    """Skips rows whose key is already cached and MERGEs the rest, caching their keys."""
+    before = len(df)
+    df = df[~df[pk_col].isin(key_cache.keys(table))]
+    skipped = before - len(df)
+    if skipped:
+        print(f"[LOAD] Skipped {skipped} cached rows for {table}.")
+    if df.empty:
+        print(f"[LOAD] Nothing new to insert into {DB_SCHEMA}.{table}.")
+        return
+    try:
+        inserted = merge_new_rows(conn, df, table, pk_col)
+    except Exception as exc:
+        raise RuntimeError(
+            f"Failed to merge into {DB_SCHEMA}.{table}: {exc}") from exc
+    key_cache.add(table, df[pk_col])
+    print(f"[LOAD] Merged {inserted} new rows into {DB_SCHEMA}.{table}.")
+
+
+def insert_and_refresh(conn, df: pd.DataFrame, table: str) -> None:
+    """Bulk inserts recordings, then refreshes the aggregates from their earliest reading."""
+    print(f"[LOAD] Inserting {len(df)} rows into {DB_SCHEMA}.{table}…")
+    try:
+        backend = insert_recordings(conn, df, DB_SCHEMA, table)
+        print(f"[LOAD] Bulk inserted {len(df)} recordings via {backend}.")
+        since = pd.to_datetime(df["recording_taken"]).min().to_pydatetime()
+        refreshed = refresh_latest_recordings(conn, since)
+        print(f"[LOAD] Refreshed {refreshed} rows of {DB_SCHEMA}.latest_recording.")
+        refreshed = refresh_hourly_rollups(conn, since)
+        print(f"[LOAD] Refreshed {refreshed} rows of {DB_SCHEMA}.recording_hourly.")
+    except Exception as exc:
+        raise RuntimeError(f"Failed to insert into {DB_SCHEMA}.{table}: {exc}") from exc
+
+
+def load(tables: dict = None):
+    """Load tables (or CSVs) into SQL Server using SQLAlchemy (safe append)."""
+    engine = get_engine()
+
+    key_cache = KeyIndexCache.load()
+
+    try:
+        with engine.begin() as conn:
+            print("[LOAD] Connected to database. Starting upload…")
+            key_cache.reconcile(conn, DB_SCHEMA)
+
+            for csv_file, table, pk_col in TABLES:
+                df = read_table(csv_file, tables)
+                if df is None:
+                    print(f"[LOAD] Skipping missing table: {table}")
+                    continue
+                df = to_naive_utc(df)
+
+                # Rename columns to match DB schema if needed
+                if table in COLUMN_MAPS:
+                    df.rename(columns=COLUMN_MAPS[table], inplace=True)
+
+                # For recording table: drop the 'id' column so DB can autogenerate
+                if table == "recording" and "id" in df.columns:
+                    df = df.drop(columns=["id"])
+
+                if table != "recording" and pk_col in df.columns:
+                    merge_uncached(conn, df, table, pk_col, key_cache)
+                elif df.empty:
+                    print(f"[LOAD] Nothing new to insert into {DB_SCHEMA}.{table}.")
+                else:
+                    insert_and_refresh(conn, df, table)
+
+            print("[LOAD] All tables loaded successfully.")
+    except RuntimeError:
+        # Don't trust cached keys after a failed load; reconcile from scratch next time
+        key_cache.clear()
+        key_cache.save()
+        raise
+
+    key_cache.save()
 
 
 if __name__ == "__main__":
@@ -1,22 +1,67 @@
 """
 Pipeline runner to execute: extract -> transform -> load
+
+In "stream" mode (default) extracted records flow in memory from extract to
+transform to load, skipping readings that were already loaded. "staged" mode
+runs each step through the /tmp CSV files. Set DEBUG_CSV=true to also write
+the CSVs while streaming.
 """
 
-from extract_plants import extract
-from transform_plants import transform
-from load_plants import load
+import os
+
+from change_detection import ChangeDetector
+from extract_plants import extract, extract_batches
+from transform_plants import EmptyBatchesError, transform, transform_batches
+from load_plants import DB_SCHEMA, get_engine, load
+from runtime import timed_handler
+from surrogate_keys import get_registry
+
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "stream")  # "stream" or "staged"
+DEBUG_CSV = os.getenv("DEBUG_CSV", "false").lower() == "true"
+
+
+def run_streaming(write_csv: bool = DEBUG_CSV) -> None:
+    """Streams extracted batches with new readings straight into transform and load."""
+    detector = ChangeDetector.load()
+    with get_engine().connect() as conn:
+        detector.reconcile(conn, DB_SCHEMA)
+        get_registry().reconcile(conn, DB_SCHEMA)
+    try:
+        tables = transform_batches(detector.filter_batches(extract_batches()), write_csv=write_csv)
+    except EmptyBatchesError:
+        if not detector.seen:
+            raise
+        tables = None
+    print(f"[PIPELINE] Skipped {detector.skipped} of {detector.seen} unchanged readings.")
+    if tables is None:
+        print("[PIPELINE] No new readings to load.")
+        return
+    load(tables)
+    # Only remember readings once they are loaded, so a failed load is retried
+    detector.commit()
+
+
+def run_staged() -> None:
+    """Runs each step through the CSV files in /tmp, for debugging."""
+    extract()
+    with get_engine().connect() as conn:
+        get_registry().reconcile(conn, DB_SCHEMA)
+    transform()
+    load()
 
 
+@timed_handler
 def handler(_, __):
     """
     AWS Lambda entry point for the pipeline.
     This function is called by the Lambda runtime.
     """
-    print("[PIPELINE] Starting Lambda execution...")
+    print(f"[PIPELINE] Starting Lambda execution in {PIPELINE_MODE} mode...")
     try:
-        extract()
-        transform()
-        load()
+        if PIPELINE_MODE == "staged":
+            run_staged()
+        else:
+            run_streaming()
         print("[PIPELINE] Extract + Transform + Load complete.")
     except Exception as e:
         print(f"[ERROR] Pipeline execution failed: {e}")
@@ -0,0 +1,190 @@
+"""
+Retry, deadline and circuit breaker policy for requests to the plants API.
+
+Each request's timeout is derived from the latency of recent successful
+requests, so one stalled response can't hold a connection slot for the full
+FETCH_MAX_TIMEOUT. Transient failures (timeouts, dropped connections, 429 and
+5xx) are retried with jittered exponential backoff; a dead plant id (404) is
+not. After FETCH_BREAKER_FAILURES transient failures in a row the circuit
+opens and requests wait, without spending their attempts, until a probe
+succeeds, and the whole run stops making requests once FETCH_RUN_BUDGET
+seconds have passed, so the Lambda finishes well within its timeout. Ids
+that couldn't be fetched are reported as unresolved rather than dead.
+"""
+
+from collections import deque
+from time import monotonic
+from typing import Optional
+import os
+import random
+import threading
+
+MAX_ATTEMPTS = int(os.getenv("FETCH_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE = float(os.getenv("FETCH_BACKOFF_BASE", "0.1"))
+BACKOFF_CAP = float(os.getenv("FETCH_BACKOFF_CAP", "2"))
+MIN_TIMEOUT = float(os.getenv("FETCH_MIN_TIMEOUT", "1"))
+MAX_TIMEOUT = float(os.getenv("FETCH_MAX_TIMEOUT", "10"))
+TIMEOUT_MULTIPLIER = float(os.getenv("FETCH_TIMEOUT_MULTIPLIER", "3"))
+BREAKER_FAILURES = int(os.getenv("FETCH_BREAKER_FAILURES", "10"))
+BREAKER_RESET = float(os.getenv("FETCH_BREAKER_RESET", "5"))
+RUN_BUDGET = float(os.getenv("FETCH_RUN_BUDGET", "20"))  # the Lambda times out at 30s
+PROBE_POLL = 0.05  # how often waiting requests check on a probe in flight
+LATENCY_SAMPLES = 200
+MIN_LATENCY_SAMPLES = 20
+TRANSIENT_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class TransientError(Exception):
+    """Raised for a failed request that is worth retrying."""
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Returns the value at a fraction of the way through sorted values."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class LatencyTracker:
+    """Recent successful request latencies, used to set request deadlines."""
+
+    def __init__(self, samples: int = LATENCY_SAMPLES, min_timeout: float = MIN_TIMEOUT,
+                 max_timeout: float = MAX_TIMEOUT, multiplier: float = TIMEOUT_MULTIPLIER):
+        self.latencies = deque(maxlen=samples)
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+
+    def record(self, seconds: float) -> None:
+        """Records the latency of a successful request."""
+        self.latencies.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Returns a latency percentile, or None before any request succeeded."""
+        latencies = sorted(self.latencies)
+        return percentile(latencies, fraction) if latencies else None
+
+    def deadline(self) -> float:
+        """Returns a timeout of a multiple of p95 latency, within the timeout bounds."""
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return self.max_timeout
+        timeout = self.percentile(0.95) * self.multiplier
+        return min(self.max_timeout, max(self.min_timeout, timeout))
+
+
+class CircuitBreaker:
+    """Stops requests after repeated failures, then lets one probe through at a time."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES,
+                 reset_after: float = BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Returns "closed", "open" or "half-open"."""
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        """Returns whether a request may be made now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Returns the seconds until a request may be tried, or 0 if one may be tried now."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            if self.probing:
+                return PROBE_POLL
+            return max(0.0, self.opened_at + self.reset_after - monotonic())
+
+    def record_success(self) -> None:
+        """Closes the circuit after any answer from the API."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        """Counts a transient failure, opening the circuit at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    print(f"[EXTRACT] Circuit opened after {self.failures} failed requests.")
+                    self.times_opened += 1
+                self.opened_at = monotonic()
+            self.probing = False
+
+
+class FetchPolicy:
+    """The retry, deadline, breaker and time budget settings shared by one extract run."""
+
+    def __init__(self, max_attempts: int = MAX_ATTEMPTS, backoff_base: float = BACKOFF_BASE,
+                 backoff_cap: float = BACKOFF_CAP, budget: float = RUN_BUDGET,
+                 latency: LatencyTracker = None, breaker: CircuitBreaker = None):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.deadline_at = monotonic() + budget
+        self.latency = latency or LatencyTracker()
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = 0
+        self.unresolved = set()
+
+    def remaining(self) -> float:
+        """Returns the seconds left in the run's budget."""
+        return self.deadline_at - monotonic()
+
+    def allow(self) -> bool:
+        """Returns whether another request may be made."""
+        return self.remaining() > 0 and self.breaker.allow()
+
+    def wait_time(self) -> Optional[float]:
+        """Returns the seconds to wait for the circuit to let a request through, or None once out of time."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            return None
+        return min(self.breaker.retry_in(), remaining)
+
+    def timeout(self) -> float:
+        """Returns the timeout for the next request."""
+        return max(0.001, min(self.latency.deadline(), self.remaining()))
+
+    def backoff(self, attempt: int) -> float:
+        """Returns a full-jitter exponential delay before retry number `attempt`."""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        return max(0.0, min(delay, self.remaining()))
+
+    def succeeded(self, seconds: float) -> None:
+        """Records a request that got an answer, dead id or not."""
+        self.latency.record(seconds)
+        self.breaker.record_success()
+
+    def failed(self, attempt: int) -> bool:
+        """Records a transient failure and returns whether to retry."""
+        self.breaker.record_failure()
+        if attempt + 1 < self.max_attempts:
+            self.retries += 1
+            return True
+        return False
+
+    def summary(self) -> str:
+        """Returns a one-line description of how the run's requests went."""
+        p95 = self.latency.percentile(0.95)
+        p95_text = "n/a" if p95 is None else f"{p95 * 1000:.0f}ms"
+        return (f"{self.retries} retries, {len(self.unresolved)} unresolved ids, "
+                f"p95 latency {p95_text}, timeout {self.latency.deadline():.2f}s, "
+                f"circuit {self.breaker.state}")
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the LNMH plants API, used by tests and benchmarks.
+
+Serves deterministic plant JSON on http://127.0.0.1:<port>/api/plants/<id>
+over HTTP/1.1 keep-alive so connection reuse can be measured. Faults can be
+injected to exercise the fetcher's retries, deadlines and circuit breaker:
+each id's first `fail_first` requests get a 503, a random share of requests
+get a 503, stall or have their connection dropped, and `down` makes every
+request fail.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+
+
+def fake_plant(pid: int) -> dict:
+    """Returns a plant payload shaped like the real API response."""
+    return {
+        "plant_id": pid,
+        "name": f"Plant {pid}",
+        "scientific_name": [f"Plantae {pid}"],
+        "temperature": 10 + pid % 15,
+        "soil_moisture": 20 + pid % 60,
+        "last_watered": "2025-09-24T09:00:00.000Z",
+        "recording_taken": "2025-09-24T10:00:00.000Z",
+        "origin_location": {
+            "latitude": 51.5,
+            "longitude": -0.12,
+            "city": f"City {pid % 7}",
+            "country": f"Country {pid % 3}",
+        },
+        "botanist": {
+            "name": f"Botanist {pid % 4}",
+            "email": f"botanist{pid % 4}@lnhm.co.uk",
+            "phone": "(146)994-1635x35992",
+        },
+    }
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog big enough for a burst of new connections."""
+    request_queue_size = 128
+
+
+class StubPlantAPI:
+    """Threaded HTTP server serving fake plants for the given live ids."""
+
+    def __init__(self, live_ids, latency: float = 0.0, fail_first: int = 0,
+                 error_rate: float = 0.0, stall_rate: float = 0.0, stall: float = 0.0,
+                 drop_rate: float = 0.0, seed: int = 0):
+        self.live_ids = set(live_ids)
+        self.latency = latency
+        self.fail_first = fail_first
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.drop_rate = drop_rate
+        self.down = False
+        self.requests = 0
+        self.attempts = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = StubServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL to use in place of API_URL."""
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/api/plants/"
+
+    def fault(self, pid) -> str:
+        """Returns the fault to inject into this request, if any."""
+        with self._lock:
+            self.requests += 1
+            self.attempts[pid] = self.attempts.get(pid, 0) + 1
+            roll = self._random.random()
+            if self.down or self.attempts[pid] <= self.fail_first or roll < self.error_rate:
+                return "error"
+            roll -= self.error_rate
+            if roll < self.drop_rate:
+                return "drop"
+            if roll - self.drop_rate < self.stall_rate:
+                return "stall"
+        return ""
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers GET /api/plants/<id>."""
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Returns the plant, or a 404 error payload for dead ids."""
+                try:
+                    pid = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+                except ValueError:
+                    pid = None
+                fault = stub.fault(pid)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if fault == "stall":
+                    time.sleep(stub.stall)
+                if fault == "drop":
+                    self.close_connection = True
+                    return
+                if fault == "error":
+                    status, payload = 503, {"error": "service unavailable"}
+                elif pid in stub.live_ids:
+                    status, payload = 200, fake_plant(pid)
+                else:
+                    status, payload = 404, {"error": "plant not found", "plant_id": pid}
+                body = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on a stalled request
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                """Keeps request logs out of test and benchmark output."""
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
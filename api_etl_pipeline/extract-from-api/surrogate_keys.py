@@ -0,0 +1,130 @@
+"""
+Stable natural key → surrogate key registry for the dimension tables.
+
+Ids are derived from a hash of the normalised natural key (country name,
+city name, botanist email), so every run and every cold start hands out the
+same id for the same entity. The registry is kept in memory across warm
+Lambda invocations and persisted to a file. The rare hash collision is
+resolved with a salted rehash, and that choice is only shared through the
+dimension tables: each container adopts the ids already stored there once,
+before assigning any. Two containers that hit the same new collision before
+either has loaded it can still pick different ids.
+"""
+
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import os
+
+import pandas as pd
+from sqlalchemy import text
+
+KEY_REGISTRY_FILE = Path(os.getenv("KEY_REGISTRY_FILE", "/tmp/surrogate-keys.json"))
+MAX_KEY = 2**31 - 1  # SQL Server INT
+# dimension -> query for its stored (id, natural key) pairs, lowest id first
+STORED_KEYS = {
+    "country": "SELECT country_id, name FROM {schema}.country ORDER BY country_id",
+    "city": "SELECT city_id, name FROM {schema}.city ORDER BY city_id",
+    "botanist": "SELECT botanist_id, COALESCE(email, botanist_name) FROM {schema}.botanist "
+                "ORDER BY botanist_id",
+}
+
+
+def normalise_key(natural_key: str) -> str:
+    """Returns the form of a natural key that identifies an entity."""
+    return str(natural_key).strip().casefold()
+
+
+def hash_key(natural_key: str, salt: int = 0) -> int:
+    """Returns a positive INT derived from the natural key."""
+    digest = hashlib.blake2b(f"{salt}:{natural_key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % MAX_KEY + 1
+
+
+class SurrogateKeyRegistry:
+    """Maps normalised natural keys to surrogate ids, per dimension."""
+
+    def __init__(self, mappings: dict = None, path: Path = KEY_REGISTRY_FILE):
+        self.mappings = mappings or {}  # dimension -> natural key -> id
+        self.taken = {dim: set(ids.values()) for dim, ids in self.mappings.items()}
+        self.path = path
+        self.dirty = False
+        self.reconciled = False
+
+    @classmethod
+    def load(cls, path: Path = KEY_REGISTRY_FILE) -> "SurrogateKeyRegistry":
+        """Loads the persisted registry, or starts empty."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(json.load(f), path)
+        except (OSError, ValueError):
+            return cls(path=path)
+
+    def save(self) -> None:
+        """Persists the registry if new keys were assigned."""
+        if not self.dirty:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.mappings, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def reconcile(self, conn, schema: str) -> None:
+        """Adopts the ids already in the dimension tables, once per container."""
+        if self.reconciled:
+            return
+        adopted = 0
+        for dimension, query in STORED_KEYS.items():
+            mapping = self.mappings.setdefault(dimension, {})
+            taken = self.taken.setdefault(dimension, set())
+            stored = {}
+            for surrogate, natural_key in conn.execute(text(query.format(schema=schema))):
+                taken.add(surrogate)
+                if natural_key is not None:
+                    stored.setdefault(normalise_key(natural_key), surrogate)
+            for key, surrogate in stored.items():
+                if mapping.get(key) != surrogate:
+                    mapping[key] = surrogate
+                    adopted += 1
+        if adopted:
+            self.dirty = True
+            print(f"[KEYS] Adopted {adopted} ids from the dimension tables.")
+        self.reconciled = True
+
+    def assign(self, dimension: str, natural_key: str) -> int:
+        """Returns the id for a natural key, assigning one if it is new."""
+        mapping = self.mappings.setdefault(dimension, {})
+        key = normalise_key(natural_key)
+        if key not in mapping:
+            taken = self.taken.setdefault(dimension, set())
+            salt = 0
+            surrogate = hash_key(key)
+            while surrogate in taken:
+                salt += 1
+                surrogate = hash_key(key, salt)
+            mapping[key] = surrogate
+            taken.add(surrogate)
+            self.dirty = True
+        return mapping[key]
+
+    def ids_for(self, dimension: str, natural_keys: pd.Series) -> pd.Series:
+        """Returns the id of each natural key, hashing only keys not seen before."""
+        keys = natural_keys.map(normalise_key, na_action="ignore")
+        mapping = self.mappings.setdefault(dimension, {})
+        for key in keys.dropna().unique():
+            if key not in mapping:
+                self.assign(dimension, key)
+        return keys.map(mapping).astype("Int64")
+
+
+_registry: Optional[SurrogateKeyRegistry] = None
+
+
+def get_registry() -> SurrogateKeyRegistry:
+    """Returns the registry, loading it once per Lambda container."""
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        _registry = SurrogateKeyRegistry.load()
+    return _registry
@@ -0,0 +1,131 @@
+"""Tests for bulk_load.py"""
+import pandas as pd
+import pytest
+
+import bulk_load
+from bulk_load import RECORDING_COLUMNS, insert_recordings, to_rows
+
+
+class FakeDBError(Exception):
+    """Stands in for pyodbc.Error."""
+
+
+class FakeCursor:
+    """A fake DBAPI cursor recording what was executed."""
+    def __init__(self, fail_tvp_after: int = None,
+                 error: str = "Column, parameter, or variable #1: Cannot find data type "
+                              "recording_rows. (2715) (SQLExecDirectW)"):
+        self.fail_tvp_after = fail_tvp_after
+        self.error = error
+        self.tvp_calls = []
+        self.executemany_calls = []
+        self.fast_executemany = False
+
+    def execute(self, sql, params):
+        """Mocks execute, optionally failing TVP inserts after some chunks."""
+        if self.fail_tvp_after is not None and len(self.tvp_calls) >= self.fail_tvp_after:
+            raise FakeDBError(self.error)
+        self.tvp_calls.append((sql, params))
+
+    def executemany(self, sql, rows):
+        """Mocks executemany."""
+        self.executemany_calls.append((sql, rows))
+
+    def close(self):
+        """Mocks close."""
+
+
+class FakeConn:
+    """A fake SQLAlchemy connection exposing a DBAPI cursor and dialect."""
+    def __init__(self, cursor):
+        self.connection = self
+        self.dialect = self
+        self.loaded_dbapi = self
+        self.Error = FakeDBError  # pylint: disable=invalid-name
+        self._cursor = cursor
+
+    def cursor(self):
+        """Mocks cursor."""
+        return self._cursor
+
+
+@pytest.fixture
+def recordings():
+    """Two recordings with a missing botanist."""
+    return pd.DataFrame({
+        "plant_id": [1, 2],
+        "botanist_id": pd.array([3, None], dtype="Int64"),
+        "temperature": [12.5, 13.0],
+        "last_watered": pd.to_datetime(["2025-09-24 09:00", "2025-09-24 09:30"]),
+        "soil_moisture": [40.0, 41.0],
+        "recording_taken": pd.to_datetime(["2025-09-24 10:00", "2025-09-24 10:00"]),
+        "extra": ["ignored", "ignored"],
+    })
+
+
+@pytest.fixture(autouse=True)
+def reset_tvp_flag(monkeypatch):
+    """Each test starts with the TVP backend available."""
+    monkeypatch.setattr(bulk_load, "_tvp_available", True)
+
+
+def test_tvp_passes_type_name_schema_and_rows(recordings):
+    """Tests that the TVP parameter is the type name, schema, then the rows."""
+    cursor = FakeCursor()
+    assert insert_recordings(FakeConn(cursor), recordings, "alpha") == "tvp"
+    sql, params = cursor.tvp_calls[0]
+    assert sql.startswith("INSERT INTO alpha.recording (plant_id")
+    tvp = params[0]
+    assert tvp[:2] == ["recording_rows", "alpha"]
+    assert len(tvp[2]) == len(RECORDING_COLUMNS)
+    assert tvp[3][1] is None
+
+
+def test_tvp_chunks_large_batches(recordings, monkeypatch):
+    """Tests that rows are split into one TVP per chunk."""
+    monkeypatch.setattr(bulk_load, "BULK_CHUNK_SIZE", 1)
+    cursor = FakeCursor()
+    insert_recordings(FakeConn(cursor), recordings, "alpha")
+    assert len(cursor.tvp_calls) == 2
+
+
+def test_auto_falls_back_to_fast_executemany(recordings):
+    """Tests that a missing table type falls back to fast_executemany."""
+    cursor = FakeCursor(fail_tvp_after=0)
+    assert insert_recordings(FakeConn(cursor), recordings, "alpha") == "executemany"
+    assert cursor.fast_executemany
+    assert len(cursor.executemany_calls[0][1]) == 2
+    assert not bulk_load._tvp_available  # pylint: disable=protected-access
+
+
+def test_no_fallback_after_partial_tvp_insert(recordings, monkeypatch):
+    """Tests that a failure after rows went in is raised rather than re-inserted."""
+    monkeypatch.setattr(bulk_load, "BULK_CHUNK_SIZE", 1)
+    cursor = FakeCursor(fail_tvp_after=1)
+    with pytest.raises(FakeDBError):
+        insert_recordings(FakeConn(cursor), recordings, "alpha")
+    assert not cursor.executemany_calls
+
+
+def test_other_errors_do_not_disable_tvp(recordings):
+    """Tests that a data error is raised as it is and the TVP backend stays in use."""
+    cursor = FakeCursor(fail_tvp_after=0, error="The INSERT statement conflicted with the "
+                                                "FOREIGN KEY constraint. (547) (SQLExecDirectW)")
+    with pytest.raises(FakeDBError, match="FOREIGN KEY"):
+        insert_recordings(FakeConn(cursor), recordings, "alpha")
+    assert not cursor.executemany_calls
+    assert bulk_load._tvp_available  # pylint: disable=protected-access
+
+
+def test_unknown_backend(recordings):
+    """Tests that an unknown backend is rejected."""
+    with pytest.raises(ValueError):
+        insert_recordings(FakeConn(FakeCursor()), recordings, "alpha", backend="bcp")
+
+
+def test_to_rows_converts_nan_to_none():
+    """Tests that rows are plain Python tuples with NaN replaced by None."""
+    df = pd.DataFrame({"city_id": [1, 2], "name": ["London", None], "lat": [1.5, float("nan")]})
+    rows = to_rows(df)
+    assert rows == [(1, "London", 1.5), (2, None, None)]
+    assert isinstance(rows[0][0], int)
@@ -0,0 +1,82 @@
+"""Tests for change_detection.py"""
+from datetime import datetime
+
+from change_detection import ChangeDetector, to_fingerprint
+
+
+class FakeResult(list):
+    """A fake result that also supports scalar()."""
+
+    def scalar(self):
+        """Mocks the scalar method."""
+        return self[0][0] if self else None
+
+
+class FakeConn:
+    """A fake connection answering the recording table's creation time and latest readings."""
+
+    def __init__(self, created: datetime, latest: list):
+        self.created = created
+        self.latest = latest
+        self.queries = 0
+
+    def execute(self, query, _params=None):
+        """Mocks the execute method."""
+        self.queries += 1
+        if "sys.tables" in str(query):
+            return FakeResult([(self.created,)])
+        return FakeResult(self.latest)
+
+
+def reading(pid: int, taken: str) -> dict:
+    """Returns a raw plant record with a reading time."""
+    return {"plant_id": pid, "recording_taken": taken}
+
+
+def test_fingerprint_normalises_to_naive_utc():
+    """Tests API and database times for the same reading give the same fingerprint."""
+    assert to_fingerprint("2025-09-24T10:00:00.000Z") == to_fingerprint(datetime(2025, 9, 24, 10))
+    assert to_fingerprint("2025-09-24T11:00:00+01:00") == to_fingerprint(datetime(2025, 9, 24, 10))
+    assert to_fingerprint(None) is None
+
+
+def test_unchanged_and_older_readings_are_skipped(tmp_path):
+    """Tests only readings newer than the last loaded one for their plant are kept."""
+    detector = ChangeDetector({1: to_fingerprint("2025-09-24T10:00:00Z")}, path=tmp_path / "f.json")
+    records = [reading(1, "2025-09-24T10:00:00.000Z"), reading(1, "2025-09-24T09:59:00Z"),
+               reading(2, "2025-09-24T10:00:00Z"), reading(2, "2025-09-24T10:00:00Z"),
+               reading(3, None)]
+    assert detector.changed(records) == [records[2], records[4]]
+    assert (detector.seen, detector.skipped) == (5, 3)
+
+
+def test_fingerprints_are_only_kept_after_commit(tmp_path):
+    """Tests readings are remembered across invocations only once committed."""
+    path = tmp_path / "f.json"
+    detector = ChangeDetector(generation="g", path=path)
+    detector.changed([reading(1, "2025-09-24T10:00:00Z")])
+    assert ChangeDetector.load(path).latest == {}
+    detector.save()
+    assert ChangeDetector.load(path).latest == {}
+    detector.commit()
+    loaded = ChangeDetector.load(path)
+    assert loaded.changed([reading(1, "2025-09-24T10:00:00Z")]) == []
+    assert loaded.generation == "g"
+
+
+def test_reconcile_seeds_from_latest_recording(tmp_path):
+    """Tests fingerprints are seeded on a cold start and reseeded after a reset."""
+    created = datetime(2025, 9, 24)
+    conn = FakeConn(created, [(1, datetime(2025, 9, 24, 10))])
+    detector = ChangeDetector(path=tmp_path / "f.json")
+    detector.reconcile(conn, "alpha")
+    assert detector.changed([reading(1, "2025-09-24T10:00:00Z")]) == []
+
+    detector.commit()
+    conn.queries = 0
+    detector.reconcile(conn, "alpha")
+    assert conn.queries == 1
+
+    reset = FakeConn(datetime(2025, 9, 25), [])
+    detector.reconcile(reset, "alpha")
+    assert detector.latest == {}
@@ -0,0 +1,126 @@
+"""Tests for discover_ids.py"""
+from discover_ids import IdDiscovery
+
+
+def make_fetch(live_ids: set, calls: list):
+    """Returns a fake fetch that finds only the given live ids."""
+    def fetch(ids):
+        calls.extend(ids)
+        return [{"plant_id": pid} for pid in ids if pid in live_ids]
+    return fetch
+
+
+def test_discover_finds_sparse_ids_from_cold_start():
+    """Tests that galloping past the seed window finds plants beyond it."""
+    live = set(range(1, 11)) | {13, 17}
+    discovery = IdDiscovery(seed_count=5)
+    rows = discovery.discover(make_fetch(live, []))
+    assert [row["plant_id"] for row in rows] == sorted(live)
+    assert discovery.live == live
+
+
+def test_discover_warm_run_only_requests_known_ids_and_edge():
+    """Tests that a warm run requests the live ids and the edge probes only."""
+    live = set(range(1, 31))
+    discovery = IdDiscovery(live=live, run=1)
+    calls = []
+    discovery.discover(make_fetch(live, calls))
+    assert set(calls) == live | set(discovery.edge_probes())
+    assert len(calls) == len(live) + 11
+
+
+def test_discover_picks_up_new_plants():
+    """Tests that plants added after the last live id are found."""
+    discovery = IdDiscovery(live={1, 2, 3}, run=1)
+    rows = discovery.discover(make_fetch({1, 2, 3, 4, 5, 21}, []))
+    assert [row["plant_id"] for row in rows] == [1, 2, 3, 4, 5, 21]
+
+
+def test_failed_ids_are_retried_on_backoff():
+    """Tests that an id that errors is skipped until its retry is due."""
+    discovery = IdDiscovery(live={1, 2, 3}, run=1)
+    discovery.discover(make_fetch({1, 3}, []))
+    assert 2 not in discovery.live
+    assert discovery.retries[2] == (1, 4)
+
+    calls = []
+    discovery.discover(make_fetch({1, 3}, calls))
+    assert 2 not in calls
+
+    calls = []
+    discovery.discover(make_fetch({1, 2, 3}, calls))
+    assert 2 in calls
+    assert 2 in discovery.live and 2 not in discovery.retries
+
+
+def test_state_round_trips(tmp_path):
+    """Tests that the discovery state is saved and reloaded."""
+    path = tmp_path / "ids.json"
+    discovery = IdDiscovery(live={1, 5}, retries={3: (2, 9)}, run=4)
+    discovery.save(path)
+    loaded = IdDiscovery.load(path)
+    assert loaded.live == {1, 5}
+    assert loaded.retries == {3: (2, 9)}
+    assert loaded.run == 4
+
+
+def test_load_without_state_starts_fresh(tmp_path):
+    """Tests that a missing state file seeds from the start id."""
+    discovery = IdDiscovery.load(tmp_path / "missing.json", seed_count=3)
+    assert discovery.known_ids() == [1, 2, 3]
+
+
+def test_unresolved_ids_stay_live():
+    """Tests that an id the fetcher couldn't reach is neither dropped nor scheduled for retry."""
+    discovery = IdDiscovery(live={1, 2, 3}, run=1)
+    unresolved = set()
+
+    def fetch(ids):
+        unresolved.update(pid for pid in ids if pid == 2)
+        return [{"plant_id": pid} for pid in ids if pid in {1, 3}]
+
+    batches = list(discovery.discover_batches(fetch, unresolved))
+    assert sorted(row["plant_id"] for batch in batches for row in batch) == [1, 3]
+    assert discovery.live == {1, 2, 3}
+    assert 2 not in discovery.retries
+
+
+def test_cold_start_seed_failure_is_retried():
+    """Tests that a seed id that fails before any higher id is found is still retried."""
+    discovery = IdDiscovery(seed_count=5)
+    flaky = {3}
+
+    def fetch(ids):
+        found = [{"plant_id": pid} for pid in ids if pid in {1, 2, 3, 9} and pid not in flaky]
+        flaky.clear()
+        return found
+
+    discovery.discover(fetch)
+    assert discovery.live == {1, 2, 9}
+    assert discovery.retries[3] == (1, 3)
+
+    calls = []
+    for _ in range(2):
+        discovery.discover(make_fetch({1, 2, 3, 9}, calls))
+    assert 3 in calls
+    assert 3 in discovery.live and 3 not in discovery.retries
+
+
+def test_unresolved_new_ids_are_retried_next_run():
+    """Tests that seed and fill-in ids the fetcher couldn't reach are requested on the next run."""
+    discovery = IdDiscovery(seed_count=5)
+    unresolved = set()
+    requested = []
+
+    def fetch(ids):
+        requested.append(list(ids))
+        unresolved.update(pid for pid in ids if pid in {2, 7})
+        return [{"plant_id": pid} for pid in ids if pid in {1, 3, 4, 5, 6, 8, 9}]
+
+    list(discovery.discover_batches(fetch, unresolved))
+    assert discovery.live == {1, 3, 4, 5, 6, 8, 9}
+    assert discovery.retries == {2: (0, 2), 7: (0, 2)}
+
+    requested.clear()
+    list(discovery.discover_batches(fetch, set()))
+    assert requested[0] == [1, 2, 3, 4, 5, 6, 7, 8, 9]
@@ -0,0 +1,48 @@
+"""Tests for key_cache.py"""
+from datetime import datetime
+
+import pandas as pd
+
+from key_cache import KeyIndexCache
+
+
+class FakeConn:
+    """A fake connection returning table creation times from sys.tables."""
+    def __init__(self, created: dict):
+        self.created = created
+
+    def execute(self, _query, _params):
+        """Mocks the execute method."""
+        return list(self.created.items())
+
+
+def test_cache_round_trips(tmp_path):
+    """Tests that cached keys are saved and reloaded."""
+    cache = KeyIndexCache(path=tmp_path / "keys.json")
+    cache.add("country", pd.Series([1, 2]))
+    cache.save()
+    assert KeyIndexCache.load(tmp_path / "keys.json").keys("country") == {1, 2}
+
+
+def test_reconcile_keeps_keys_for_unchanged_tables(tmp_path):
+    """Tests that keys survive reconciliation when the table was not recreated."""
+    created = datetime(2025, 9, 24)
+    cache = KeyIndexCache(path=tmp_path / "keys.json")
+    cache.reconcile(FakeConn({"country": created}), "alpha")
+    cache.add("country", [1, 2])
+    cache.reconcile(FakeConn({"country": created}), "alpha")
+    assert cache.keys("country") == {1, 2}
+
+
+def test_reconcile_resets_recreated_tables(tmp_path):
+    """Tests that keys are dropped once the nightly reset recreates a table."""
+    cache = KeyIndexCache(path=tmp_path / "keys.json")
+    cache.reconcile(FakeConn({"country": datetime(2025, 9, 24)}), "alpha")
+    cache.add("country", [1, 2])
+    cache.reconcile(FakeConn({"country": datetime(2025, 9, 25)}), "alpha")
+    assert cache.keys("country") == set()
+
+
+def test_load_missing_cache_is_empty(tmp_path):
+    """Tests that a missing cache file gives an empty index."""
+    assert KeyIndexCache.load(tmp_path / "missing.json").keys("city") == set()
@@ -0,0 +1,206 @@
+"""Tests for load_plants.py"""
+from contextlib import contextmanager
+from datetime import datetime
+import re
+
+import pandas as pd
+import pytest
+
+import load_plants
+from load_plants import (insert_and_refresh, merge_new_rows, refresh_hourly_rollups,
+                         refresh_latest_recordings)
+
+
+class FakeResult:  # pylint: disable=too-few-public-methods
+    """A fake SQLAlchemy result."""
+    rowcount = 2
+
+
+class FakeConn:  # pylint: disable=too-few-public-methods
+    """A fake SQLAlchemy connection recording driver-level SQL."""
+    def __init__(self):
+        self.calls = []
+
+    def exec_driver_sql(self, sql, params=None):
+        """Mocks exec_driver_sql."""
+        self.calls.append((sql, params))
+        return FakeResult()
+
+
+class FailingMergeConn(FakeConn):  # pylint: disable=too-few-public-methods
+    """A fake connection whose MERGE fails."""
+    def exec_driver_sql(self, sql, params=None):
+        """Mocks exec_driver_sql, raising on MERGE."""
+        result = super().exec_driver_sql(sql, params)
+        if sql.startswith("MERGE"):
+            raise RuntimeError("deadlock")
+        return result
+
+
+class FakeEngine:  # pylint: disable=too-few-public-methods
+    """A fake engine whose transaction marks where it begins and commits on its connection."""
+    def __init__(self):
+        self.conn = FakeConn()
+
+    @contextmanager
+    def begin(self):
+        """Mocks engine.begin."""
+        self.conn.calls.append(("BEGIN", None))
+        yield self.conn
+        self.conn.calls.append(("COMMIT", None))
+
+
+class FakeKeyCache:
+    """A key cache holding nothing."""
+    @classmethod
+    def load(cls):
+        """Mocks KeyIndexCache.load."""
+        return cls()
+
+    def reconcile(self, conn, schema):
+        """Mocks KeyIndexCache.reconcile."""
+
+    def save(self):
+        """Mocks KeyIndexCache.save."""
+
+
+def fake_insert(conn, df, schema, table):
+    """Records a bulk insert on the connection it was given."""
+    conn.calls.append((f"INSERT {schema}.{table}", len(df)))
+    return "executemany"
+
+
+def recordings() -> pd.DataFrame:
+    """Returns two transformed recordings, the earliest taken at 10:15."""
+    return pd.DataFrame({
+        "recording_id": [1, 2], "plant_id": [1, 2], "botanist_id": [1, 1],
+        "temperature": [12.0, 14.0], "soil_moisture": [40.0, 18.0],
+        "last_watered": pd.to_datetime(["2025-09-24 08:00", "2025-09-24 09:00"]),
+        "recording_taken": pd.to_datetime(["2025-09-24 10:45", "2025-09-24 10:15"]),
+    })
+
+
+def plants() -> pd.DataFrame:
+    """Returns two plant rows."""
+    return pd.DataFrame({"plant_id": [1, 2], "name": ["Ficus", "Monstera"]})
+
+
+def match_columns(sql: str) -> list[str]:
+    """Returns the target columns a MERGE matches source rows on."""
+    condition = re.search(r"\bON (.+?)\s+WHEN", sql, re.S).group(1)
+    return re.findall(r"target\.(\w+) = source\.\1", condition)
+
+
+def update_assignments(sql: str) -> dict:
+    """Returns the column = value pairs of a MERGE's UPDATE SET clause."""
+    clause = sql.split("UPDATE SET", 1)[1].split("WHEN NOT MATCHED", 1)[0]
+    return dict(re.findall(r"(\w+) = ([\w.]+)", clause))
+
+
+def test_refresh_latest_recordings_merges_newest_per_plant():
+    """Tests that the newest recording per plant since the batch start is merged."""
+    conn = FakeConn()
+    since = datetime(2025, 9, 24, 10)
+    assert refresh_latest_recordings(conn, since) == 2
+    sql, params = conn.calls[0]
+    assert "MERGE alpha.latest_recording" in sql
+    assert "PARTITION BY plant_id" in sql
+    assert "source.recording_taken >= target.recording_taken" in sql
+    assert params == (since,)
+
+
+def test_refresh_hourly_rollups_recomputes_whole_hours():
+    """Tests that rollups are recomputed from the start of the batch's first hour."""
+    conn = FakeConn()
+    since = datetime(2025, 9, 24, 10, 30)
+    refresh_hourly_rollups(conn, since)
+    sql, params = conn.calls[0]
+    assert "MERGE alpha.recording_hourly" in sql
+    assert "recording_taken >= DATEADD(hour, DATEDIFF(hour, 0, ?), 0)" in sql
+    assert "reading_count = source.reading_count" in sql
+    assert params == (since,)
+
+
+def test_refresh_hourly_rollups_rerun_overwrites():
+    """Tests a second refresh over the same hours repeats the MERGE and replaces every aggregate."""
+    conn = FakeConn()
+    since = datetime(2025, 9, 24, 10, 30)
+    refresh_hourly_rollups(conn, since)
+    refresh_hourly_rollups(conn, since)
+    assert conn.calls[0] == conn.calls[1]
+    assignments = update_assignments(conn.calls[0][0])
+    assert assignments and all(value == f"source.{col}" for col, value in assignments.items())
+
+
+def test_refresh_latest_recordings_rerun_keeps_newest():
+    """Tests a re-run can only replace a plant's latest row with one at least as new."""
+    conn = FakeConn()
+    since = datetime(2025, 9, 24, 10)
+    refresh_latest_recordings(conn, since)
+    refresh_latest_recordings(conn, since)
+    assert conn.calls[0] == conn.calls[1]
+    sql = conn.calls[0][0]
+    assert "WHEN MATCHED AND source.recording_taken >= target.recording_taken" in sql
+    assert all(value == f"source.{value.split('.')[1]}"
+               for value in update_assignments(sql).values())
+
+
+def test_insert_and_refresh_runs_in_order_on_one_connection(monkeypatch):
+    """Tests recordings are inserted before both refreshes, all bound to the earliest reading."""
+    monkeypatch.setattr(load_plants, "insert_recordings", fake_insert)
+    conn = FakeConn()
+    insert_and_refresh(conn, recordings(), "recording")
+    since = datetime(2025, 9, 24, 10, 15)
+    assert [call[0].split()[0] for call in conn.calls] == ["INSERT", "MERGE", "MERGE"]
+    assert "alpha.latest_recording" in conn.calls[1][0]
+    assert "alpha.recording_hourly" in conn.calls[2][0]
+    assert conn.calls[1][1] == (since,) and conn.calls[2][1] == (since,)
+
+
+def test_load_refreshes_inside_the_insert_transaction(monkeypatch):
+    """Tests the insert and both refreshes share one connection and commit together."""
+    engine = FakeEngine()
+    monkeypatch.setattr(load_plants, "get_engine", lambda: engine)
+    monkeypatch.setattr(load_plants, "KeyIndexCache", FakeKeyCache)
+    monkeypatch.setattr(load_plants, "insert_recordings", fake_insert)
+    load_plants.load({"recording": recordings()})
+    steps = [call[0].split()[0] for call in engine.conn.calls]
+    assert steps == ["BEGIN", "INSERT", "MERGE", "MERGE", "COMMIT"]
+
+
+def test_refresh_hourly_rollups_matches_plant_and_hour():
+    """Tests a plant's hour that is already rolled up is updated rather than inserted again."""
+    conn = FakeConn()
+    refresh_hourly_rollups(conn, datetime(2025, 9, 24, 10, 30))
+    assert match_columns(conn.calls[0][0]) == ["plant_id", "hour_start"]
+
+
+def test_merge_new_rows_only_inserts_unmatched_keys():
+    """Tests staged rows are matched on the key column and existing keys are left alone."""
+    conn = FakeConn()
+    assert merge_new_rows(conn, plants(), "plant", "plant_id") == 2
+    stage_insert, merge = conn.calls[1], conn.calls[2][0]
+    assert stage_insert == ("INSERT INTO #stage_plant (plant_id, name) VALUES (?, ?)",
+                            [(1, "Ficus"), (2, "Monstera")])
+    assert match_columns(merge) == ["plant_id"]
+    assert "WHEN NOT MATCHED BY TARGET THEN INSERT" in merge
+    assert "WHEN MATCHED" not in merge
+
+
+def test_merge_new_rows_recreates_stage_each_call():
+    """Tests every call creates its staging table and drops it before the next one."""
+    conn = FakeConn()
+    merge_new_rows(conn, plants(), "plant", "plant_id")
+    merge_new_rows(conn, plants(), "plant", "plant_id")
+    steps = [sql.split()[0] for sql, _ in conn.calls]
+    assert steps == ["SELECT", "INSERT", "MERGE", "DROP"] * 2
+    assert conn.calls[0][0].startswith("SELECT TOP 0 plant_id, name INTO #stage_plant")
+    assert conn.calls[3][0] == "DROP TABLE #stage_plant"
+
+
+def test_merge_new_rows_drops_stage_when_merge_fails():
+    """Tests the staging table is dropped even when the MERGE fails."""
+    conn = FailingMergeConn()
+    with pytest.raises(RuntimeError):
+        merge_new_rows(conn, plants(), "plant", "plant_id")
+    assert conn.calls[-1] == ("DROP TABLE #stage_plant", None)
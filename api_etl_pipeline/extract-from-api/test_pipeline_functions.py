@@ -1,6 +1,12 @@
-from extract_plants import safe_get, flatten_plant, fetch_single
-from transform_plants import normalise_phone, clean_numeric
+from extract_plants import safe_get, flatten_plant, fetch_single, fetch_plants
+from transform_plants import (normalise_phone, clean_numeric, clean_categories,
+                              apply_schema, read_raw, transform_batches)
+from stub_api import StubPlantAPI, fake_plant
+import extract_plants
+import transform_plants
+import surrogate_keys
 import pipeline
+import pandas as pd
 import pytest
 import subprocess
 import sys
@@ -178,6 +184,50 @@ def test_normalise_phone_with_special_characters():
     """Test normalise_phone with various special characters."""
     assert normalise_phone("(123) 456-7890#") == "1234567890"
 
+def test_clean_categories_merges_values_that_clean_the_same():
+    """Test categories are cleaned once each, merging ones that differ by whitespace."""
+    cleaned = clean_categories(pd.Series([" London", "London ", "nan", None, "Paris"]))
+    assert isinstance(cleaned.dtype, pd.CategoricalDtype)
+    assert list(cleaned.cat.categories) == ["London", "Paris"]
+    assert list(cleaned.astype(object).where(cleaned.notna(), None)) == \
+        ["London", "London", None, None, "Paris"]
+
+def test_apply_schema_declares_every_column_type():
+    """Test raw records get their declared types, whatever pandas would have inferred."""
+    raw = pd.DataFrame.from_records([flatten_plant(fake_plant(1)), {"plant_id": "2"}])
+    df = apply_schema(raw)
+    assert str(df["plant_id"].dtype) == "Int64"
+    assert df["temperature"].dtype == "float64"
+    assert str(df["recording_taken"].dtype).startswith("datetime64")
+    assert str(df["recording_taken"].dt.tz) == "UTC"
+    assert isinstance(df["origin_city"].dtype, pd.CategoricalDtype)
+    assert list(df["plant_id"]) == [1, 2]
+
+def test_apply_schema_non_integral_ids_are_missing():
+    """Test ids that aren't whole numbers become missing instead of failing the cast."""
+    raw = pd.DataFrame({"plant_id": ["1", "2.5", "3.0", "abc", "inf", None]})
+    assert apply_schema(raw)["plant_id"].tolist() == [1, pd.NA, 3, pd.NA, pd.NA, pd.NA]
+
+def test_read_raw_uses_declared_dtypes(tmp_path):
+    """Test the raw .csv is read with the schema's dtypes."""
+    path = tmp_path / "plants-raw.csv"
+    pd.DataFrame.from_records([flatten_plant(fake_plant(1))]).to_csv(path, index=False)
+    raw = read_raw(path)
+    assert raw["plant_id"].tolist() == ["1"]
+    assert isinstance(raw["botanist_email"].dtype, pd.CategoricalDtype)
+    assert str(apply_schema(raw)["plant_id"].dtype) == "Int64"
+
+def test_read_raw_leaves_bad_values_to_apply_schema(tmp_path):
+    """Test unparseable numbers in the raw .csv become missing instead of failing the read."""
+    path = tmp_path / "plants-raw.csv"
+    records = [flatten_plant(fake_plant(1)), flatten_plant(fake_plant(2))]
+    records[0]["plant_id"] = "2.5"
+    records[1]["temperature"] = "bad"
+    pd.DataFrame.from_records(records).to_csv(path, index=False)
+    df = apply_schema(read_raw(path))
+    assert df["plant_id"].tolist() == [pd.NA, 2]
+    assert pd.isna(df["temperature"].iloc[1]) and df["temperature"].iloc[0] == 11.0
+
 # Tests for clean_numeric
 def test_clean_numeric_valid_string():
     """Test clean_numeric with a valid numeric string."""
@@ -210,3 +260,78 @@ def test_fetch_single_api_error(mock_get):
     result = fetch_single(999)
     assert result is None
 
+
+
+# Tests for fetch_plants
+def test_fetch_plants_async_matches_threaded(monkeypatch):
+    """Test both extract modes return the same flattened plants, skipping dead ids."""
+    with StubPlantAPI(live_ids=[1, 2, 4]) as stub:
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        threaded = fetch_plants([1, 2, 3, 4], mode="threaded")
+        async_rows = fetch_plants([1, 2, 3, 4], mode="async", concurrency=2)
+    assert async_rows == threaded
+    assert [row["plant_id"] for row in async_rows] == [1, 2, 4]
+    assert async_rows[0] == flatten_plant(fake_plant(1))
+
+def test_fetch_plants_unknown_mode():
+    """Test fetch_plants rejects an unknown extract mode."""
+    with pytest.raises(ValueError):
+        fetch_plants([1], mode="carrier-pigeon")
+
+
+# Tests for transform_batches
+def test_transform_batches_in_memory(monkeypatch, tmp_path):
+    """Test streamed batches are transformed without writing any CSV."""
+    monkeypatch.setattr(transform_plants, "OUT_DIR", tmp_path / "transformed")
+    monkeypatch.setattr(transform_plants, "RAW_FILE", tmp_path / "plants-raw.csv")
+    monkeypatch.setattr(surrogate_keys, "_registry",
+                        surrogate_keys.SurrogateKeyRegistry(path=tmp_path / "keys.json"))
+    plant = flatten_plant(fake_plant(1))
+    plant["latitude"] = None
+    batches = iter([[plant], [flatten_plant(fake_plant(2))]])
+
+    tables = transform_batches(batches)
+
+    assert set(tables) == {"country", "city", "botanist", "plant", "recording"}
+    assert list(tables["recording"]["plant_id"]) == [1, 2]
+    assert tables["plant"]["latitude"].isna().iloc[0]
+    assert tables["botanist"]["phone_number"].iloc[0] == "1469941635x35992"
+    assert tables["recording"]["botanist_id"].iloc[0] == surrogate_keys.hash_key("botanist1@lnhm.co.uk")
+    assert not (tmp_path / "transformed").exists()
+    assert not (tmp_path / "plants-raw.csv").exists()
+
+def test_transform_batches_debug_csv(monkeypatch, tmp_path):
+    """Test the debug flag writes the raw and transformed CSVs."""
+    monkeypatch.setattr(transform_plants, "OUT_DIR", tmp_path / "transformed")
+    monkeypatch.setattr(transform_plants, "RAW_FILE", tmp_path / "plants-raw.csv")
+    monkeypatch.setattr(surrogate_keys, "_registry",
+                        surrogate_keys.SurrogateKeyRegistry(path=tmp_path / "keys.json"))
+    transform_batches([[flatten_plant(fake_plant(1))]], write_csv=True)
+    assert (tmp_path / "plants-raw.csv").exists()
+    assert (tmp_path / "transformed" / "recording.csv").exists()
+
+def test_transform_batches_matches_one_frame(monkeypatch, tmp_path):
+    """Test batches typed one at a time give the same tables as all the records at once."""
+    monkeypatch.setattr(surrogate_keys, "_registry",
+                        surrogate_keys.SurrogateKeyRegistry(path=tmp_path / "keys.json"))
+    records = [flatten_plant(fake_plant(pid)) for pid in range(1, 21)]
+    records[4]["origin_city"] = None
+    batched = transform_batches([records[:3], [], records[3:11], records[11:]])
+    whole = transform_plants.transform(pd.DataFrame.from_records(records), write_csv=False)
+    for table, df in whole.items():
+        pd.testing.assert_frame_equal(batched[table], df)
+
+def test_text_none_is_not_missing():
+    """Test only real missing values, not the text "None", become missing."""
+    df = apply_schema(pd.DataFrame.from_records([
+        {"plant_id": 1, "name": "None", "scientific_name": None, "origin_city": " None "},
+        {"plant_id": 2, "name": " nan ", "scientific_name": float("nan"), "origin_city": None},
+    ]))
+    assert df["name"].tolist()[0] == "None" and pd.isna(df["name"].iloc[1])
+    assert df["scientific_name"].isna().all()
+    assert df["origin_city"].iloc[0] == "None" and pd.isna(df["origin_city"].iloc[1])
+
+def test_transform_batches_empty():
+    """Test an empty stream raises like the staged extract does."""
+    with pytest.raises(RuntimeError):
+        transform_batches(iter([[]]))
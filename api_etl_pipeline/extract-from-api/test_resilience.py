@@ -0,0 +1,121 @@
+"""Tests for resilience.py and the fetcher's use of it against a faulty stub API."""
+import threading
+
+import pytest
+
+import extract_plants
+from extract_plants import fetch_plants
+from resilience import CircuitBreaker, FetchPolicy, LatencyTracker
+from stub_api import StubPlantAPI
+
+IDS = list(range(1, 41))
+
+
+def fast_policy(**kwargs) -> FetchPolicy:
+    """Returns a policy with short backoff so the tests run quickly."""
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_cap", 0.01)
+    return FetchPolicy(**kwargs)
+
+
+def test_deadline_follows_latency_percentile():
+    """Tests the request deadline is a multiple of p95 latency within its bounds."""
+    tracker = LatencyTracker(min_timeout=0.5, max_timeout=10, multiplier=3)
+    assert tracker.deadline() == 10
+    for _ in range(100):
+        tracker.record(0.4)
+    assert tracker.deadline() == pytest.approx(1.2)
+    tracker = LatencyTracker(min_timeout=0.5, max_timeout=10, multiplier=3)
+    for _ in range(100):
+        tracker.record(0.01)
+    assert tracker.deadline() == 0.5
+
+
+def test_circuit_breaker_opens_and_probes():
+    """Tests the breaker opens at the threshold and lets one probe through after reset."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_after=0)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    breaker.reset_after = 60
+    assert breaker.state == "open" and not breaker.allow()
+    breaker.reset_after = 0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+@pytest.mark.parametrize("mode", ["threaded", "async"])
+def test_transient_errors_are_retried_without_losing_readings(monkeypatch, mode):
+    """Tests every live plant is fetched when each id's first two requests fail."""
+    with StubPlantAPI(live_ids=IDS[:-5], fail_first=2) as stub:
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        policy = fast_policy(max_attempts=3, breaker=CircuitBreaker(failure_threshold=1000))
+        rows = fetch_plants(IDS, mode=mode, concurrency=8, policy=policy)
+    assert [row["plant_id"] for row in rows] == IDS[:-5]
+    assert not policy.unresolved
+    assert stub.requests == 3 * len(IDS)
+
+
+@pytest.mark.parametrize("mode", ["threaded", "async"])
+def test_dead_ids_are_not_retried(monkeypatch, mode):
+    """Tests a 404 answer is final and doesn't count as unresolved."""
+    with StubPlantAPI(live_ids=[1]) as stub:
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        policy = fast_policy()
+        rows = fetch_plants([1, 2, 3], mode=mode, policy=policy)
+    assert [row["plant_id"] for row in rows] == [1]
+    assert stub.requests == 3 and not policy.unresolved
+
+
+@pytest.mark.parametrize("mode", ["threaded", "async"])
+def test_stalled_and_dropped_requests_are_retried(monkeypatch, mode):
+    """Tests stalls are cut off at the learned deadline and retried."""
+    with StubPlantAPI(live_ids=IDS, stall_rate=0.1, stall=2, drop_rate=0.1, seed=1) as stub:
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        latency = LatencyTracker(min_timeout=0.2)
+        latency.latencies.extend([0.01] * 50)
+        policy = fast_policy(max_attempts=5, latency=latency)
+        rows = fetch_plants(IDS, mode=mode, concurrency=8, policy=policy)
+    assert [row["plant_id"] for row in rows] == IDS
+    assert policy.retries > 0
+
+
+@pytest.mark.parametrize("mode", ["threaded", "async"])
+def test_open_circuit_stops_requests(monkeypatch, mode):
+    """Tests a down API gets a handful of requests, and its ids are unresolved."""
+    with StubPlantAPI(live_ids=IDS) as stub:
+        stub.down = True
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        policy = fast_policy(budget=0.5,
+                             breaker=CircuitBreaker(failure_threshold=5, reset_after=60))
+        rows = fetch_plants(IDS, mode=mode, concurrency=1, policy=policy)
+    assert rows == []
+    assert policy.unresolved == set(IDS)
+    # Paused requests wait out the budget instead of probing an API that stays down
+    assert 0 < stub.requests <= 5
+
+
+@pytest.mark.parametrize("mode", ["threaded", "async"])
+def test_requests_resume_when_the_circuit_closes(monkeypatch, mode):
+    """Tests requests paused by an open circuit are all made once a probe gets through."""
+    with StubPlantAPI(live_ids=IDS) as stub:
+        stub.down = True
+        threading.Timer(0.3, lambda: setattr(stub, "down", False)).start()
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        policy = fast_policy(max_attempts=10, budget=10,
+                             breaker=CircuitBreaker(failure_threshold=5, reset_after=0.05))
+        rows = fetch_plants(IDS, mode=mode, concurrency=8, policy=policy)
+    assert [row["plant_id"] for row in rows] == IDS
+    assert not policy.unresolved
+    assert policy.breaker.times_opened >= 1
+
+
+def test_spent_budget_makes_no_requests(monkeypatch):
+    """Tests nothing is requested once the run's time budget is used up."""
+    with StubPlantAPI(live_ids=IDS) as stub:
+        monkeypatch.setattr(extract_plants, "API_URL", stub.url)
+        policy = fast_policy(budget=0)
+        assert fetch_plants(IDS, mode="async", policy=policy) == []
+    assert stub.requests == 0 and policy.unresolved == set(IDS)
@@ -0,0 +1,76 @@
+"""Tests for surrogate_keys.py"""
+import pandas as pd
+
+from surrogate_keys import SurrogateKeyRegistry, hash_key
+
+
+def test_ids_are_stable_across_registries(tmp_path):
+    """Tests that a fresh registry hands out the same ids for the same entities."""
+    first = SurrogateKeyRegistry(path=tmp_path / "a.json")
+    second = SurrogateKeyRegistry(path=tmp_path / "b.json")
+    names = pd.Series(["United Kingdom", "Brazil"])
+    assert list(first.ids_for("country", names)) == list(second.ids_for("country", names))
+
+
+def test_ids_ignore_case_and_whitespace(tmp_path):
+    """Tests that natural keys are normalised before lookup."""
+    registry = SurrogateKeyRegistry(path=tmp_path / "keys.json")
+    ids = registry.ids_for("botanist", pd.Series(["A@lnhm.co.uk", " a@lnhm.co.uk"]))
+    assert ids.iloc[0] == ids.iloc[1] == hash_key("a@lnhm.co.uk")
+
+
+def test_missing_keys_have_no_id(tmp_path):
+    """Tests that missing natural keys map to NA."""
+    registry = SurrogateKeyRegistry(path=tmp_path / "keys.json")
+    ids = registry.ids_for("city", pd.Series(["London", None]))
+    assert ids.isna().tolist() == [False, True]
+
+
+def test_collisions_get_a_new_id(tmp_path):
+    """Tests that a key whose hash is taken is rehashed with a salt."""
+    registry = SurrogateKeyRegistry({"city": {"other": hash_key("london")}}, tmp_path / "keys.json")
+    assert registry.assign("city", "London") == hash_key("london", 1)
+
+
+def test_registry_round_trips(tmp_path):
+    """Tests that assigned ids are saved and reloaded."""
+    path = tmp_path / "keys.json"
+    registry = SurrogateKeyRegistry(path=path)
+    registry.assign("city", "London")
+    registry.save()
+    assert SurrogateKeyRegistry.load(path).mappings == {"city": {"london": hash_key("london")}}
+
+
+class FakeConn:
+    """A fake connection answering each dimension table's stored ids."""
+
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.queries = 0
+
+    def execute(self, query, _params=None):
+        """Mocks the execute method."""
+        self.queries += 1
+        table = str(query).split(" FROM alpha.")[1].split()[0]
+        return self.rows.get(table, [])
+
+
+def test_reconcile_adopts_stored_collision_resolution(tmp_path):
+    """Tests that a cold registry reuses an id another container chose for a collision."""
+    salted = hash_key("london", 1)
+    conn = FakeConn({"city": [(hash_key("london"), "Other"), (salted, "London")]})
+    registry = SurrogateKeyRegistry(path=tmp_path / "keys.json")
+    registry.reconcile(conn, "alpha")
+    assert registry.assign("city", " london ") == salted
+    assert registry.assign("city", "Paris") == hash_key("paris")
+
+    registry.reconcile(conn, "alpha")
+    assert conn.queries == 3
+
+
+def test_reconcile_keeps_new_ids_clear_of_stored_ones(tmp_path):
+    """Tests that ids already stored for other keys are treated as taken."""
+    conn = FakeConn({"botanist": [(hash_key("a@lnhm.co.uk"), "someone@else.com")]})
+    registry = SurrogateKeyRegistry(path=tmp_path / "keys.json")
+    registry.reconcile(conn, "alpha")
+    assert registry.assign("botanist", "a@lnhm.co.uk") == hash_key("a@lnhm.co.uk", 1)
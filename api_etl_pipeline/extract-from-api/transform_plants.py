@@ -1,17 +1,62 @@
 """
-Transform plants-raw.csv → normalised tables in data/transformed/.
+Transform raw plant records → normalised tables.
+
+Reads plants-raw.csv and writes data/transformed/ in staged mode, or takes
+record batches in memory and returns the tables as DataFrames.
+
+Every raw column's type is declared once in RAW_SCHEMA and applied with
+vectorised operations, so nothing is inferred. The low-cardinality city,
+country and botanist columns are categorical, so they are cleaned (and
+phone numbers normalised) once per distinct value rather than once per row.
 """
 
 from pathlib import Path
+from typing import Iterable
 import re
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+from dimensions import DimensionIndex
+from surrogate_keys import get_registry
 
 
 DATA_DIR = Path("/tmp")
 RAW_FILE = DATA_DIR / "plants-raw.csv"
 OUT_DIR = DATA_DIR / "transformed"
 
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+# Raw column → kind: "int", "float", "datetime", "text" or "category"
+RAW_SCHEMA = {
+    "plant_id": "int",
+    "name": "text",
+    "scientific_name": "text",
+    "temperature": "float",
+    "soil_moisture": "float",
+    "last_watered": "datetime",
+    "recording_taken": "datetime",
+    "latitude": "float",
+    "longitude": "float",
+    "origin_city": "category",
+    "origin_country": "category",
+    "botanist_name": "category",
+    "botanist_email": "category",
+    "botanist_phone": "category",
+}
+# Numbers and timestamps are read as text, so a bad value is coerced by apply_schema
+# instead of failing the whole read
+CSV_DTYPES = {"int": object, "float": object, "datetime": object,
+              "text": object, "category": "category"}
+MISSING_TEXT = ["nan"]  # what older raw .csv files hold for a missing value
+PHONE_PATTERN = r"^(\d{3,})(x\d+)?"
+PLANT_COLUMNS = ["plant_id", "plant_name", "scientific_name", "latitude", "longitude",
+                 "country_id", "city_id"]
+RECORDING_COLUMNS = ["plant_id", "botanist_id", "temperature", "last_watered",
+                     "soil_moisture", "recording_taken"]
+
+
+
+class EmptyBatchesError(RuntimeError):
+    """Raised when streamed batches hold no plant records."""
 
 
 def normalise_phone(phone: str) -> str:
@@ -20,7 +65,7 @@ def normalise_phone(phone: str) -> str:
         return None
     phone = phone.lower().replace("ext", "x")
     digits = re.sub(r"[^\dx]", "", phone)
-    match = re.match(r"(\d{3,})(x\d+)?", digits)
+    match = re.match(PHONE_PATTERN, digits)
     return match.group(1) + (match.group(2) or "") if match else digits
 
 
@@ -29,23 +74,90 @@ def clean_numeric(s):
     return pd.to_numeric(s, errors="coerce")
 
 
-def transform():
-    """Handles all transformation logic for the raw plants data .csv file."""
-    df = pd.read_csv(RAW_FILE)
+def clean_text(s: pd.Series) -> pd.Series:
+    """Strips whitespace and marks missing values, including the text "nan", as missing."""
+    # A column of all missing values can arrive as float64, which has no .str
+    if not pd.api.types.is_string_dtype(s.dtype) or (
+            s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty")):
+        s = s.astype(object).where(s.isna(), s.astype(str))
+    stripped = s.str.strip()
+    return stripped.mask(stripped.isin(MISSING_TEXT))
 
-    # Clean string columns
-    for col in df.select_dtypes("object").columns:
-        df[col] = df[col].astype(str).str.strip().replace({"nan": None})
 
-    # Preserve plant name
-    if "name" in df.columns:
-        df.rename(columns={"name": "plant_name"}, inplace=True)
+def clean_categories(s: pd.Series, clean=clean_text) -> pd.Series:
+    """Applies a cleaning function to each distinct value of a column, returning a categorical."""
+    s = s if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")
+    cleaned = clean(pd.Series(s.cat.categories, dtype=object))
+    # Categories that clean to the same value are merged; ones that clean to None become missing
+    new_codes, uniques = pd.factorize(cleaned)
+    codes = s.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, new_codes[codes], -1) if len(new_codes) else codes
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(uniques, dtype=object)),
+                     index=s.index, name=s.name)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns the raw columns converted to their declared types."""
+    columns = {}
+    for col, kind in RAW_SCHEMA.items():
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if kind == "int":
+            numbers = clean_numeric(values)
+            # A fractional or infinite id is as unusable as a non-numeric one
+            columns[col] = numbers.where(numbers % 1 == 0).astype("Int64")
+        elif kind == "float":
+            columns[col] = clean_numeric(values).astype("float64")
+        elif kind == "datetime":
+            columns[col] = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+        elif kind == "category":
+            columns[col] = clean_categories(values)
+        else:
+            columns[col] = clean_text(values)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def read_raw(path: Path = RAW_FILE) -> pd.DataFrame:
+    """Reads the raw .csv as text and categories, so pandas infers nothing."""
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {col: CSV_DTYPES[kind] for col, kind in RAW_SCHEMA.items() if col in header}
+    return pd.read_csv(path, dtype=dtypes)
+
+
+def dimension_values(s: pd.Series) -> pd.Series:
+    """Returns a categorical dimension column as plain values for the output tables."""
+    return s.astype(object).where(s.notna(), None)
+
 
-    # Clean numeric and datetime columns
-    for col in ["temperature", "soil_moisture", "latitude", "longitude"]:
-        df[col] = clean_numeric(df[col])
-    for col in ["last_watered", "recording_taken"]:
-        df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+def write_tables(tables: dict[str, pd.DataFrame]) -> None:
+    """Writes each normalised table to OUT_DIR/<table>.csv."""
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    for table, df in tables.items():
+        df.to_csv(OUT_DIR / f"{table}.csv", index=False)
+
+
+def concat_typed(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenates frames from apply_schema, keeping categorical columns categorical."""
+    if len(frames) == 1:
+        return frames[0]
+    columns = {}
+    for col, kind in RAW_SCHEMA.items():
+        parts = [frame[col] for frame in frames]
+        if kind == "category":
+            columns[col] = pd.Series(union_categoricals(parts), name=col)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def transform(raw: pd.DataFrame = None, write_csv: bool = True) -> dict[str, pd.DataFrame]:
+    """Handles all transformation logic for the raw plants data, read from .csv if not given."""
+    return build_tables(apply_schema(read_raw() if raw is None else raw), write_csv)
+
+
+def build_tables(df: pd.DataFrame, write_csv: bool = True) -> dict[str, pd.DataFrame]:
+    """Splits typed plant readings into the normalised tables."""
+    # Preserve plant name
+    df = df.rename(columns={"name": "plant_name"})
 
     # Filter invalid readings
     df = df[(df["temperature"] >= 0) & (df["soil_moisture"].between(0, 100))]
@@ -53,24 +165,34 @@ def transform():
     # Normalised dimension tables
     country = (
         df[["origin_country"]]
+        .apply(dimension_values)
         .dropna()
         .drop_duplicates()
         .rename(columns={"origin_country": "name"})
         .reset_index(drop=True)
     )
-    country["country_id"] = country.index + 1
+    keys = get_registry()
+    country["country_id"] = keys.ids_for("country", country["name"])
+    country_ids = DimensionIndex(country["name"], {"country_id": country["country_id"]})
+    country = country.drop_duplicates("country_id")
 
     city = (
         df[["origin_city"]]
+        .apply(dimension_values)
         .dropna()
         .drop_duplicates()
         .rename(columns={"origin_city": "name"})
         .reset_index(drop=True)
     )
-    city["city_id"] = city.index + 1
+    city["city_id"] = keys.ids_for("city", city["name"])
+    city_ids = DimensionIndex(city["name"], {"city_id": city["city_id"]})
+    city = city.drop_duplicates("city_id")
 
     botanist = (
         df[["botanist_name", "botanist_email", "botanist_phone"]]
+        .assign(botanist_phone=clean_categories(
+            df["botanist_phone"], lambda phones: phones.apply(normalise_phone)))
+        .apply(dimension_values)
         .dropna(how="all")
         .drop_duplicates(subset="botanist_email")
         .rename(
@@ -82,59 +204,54 @@ def transform():
         )
         .reset_index(drop=True)
     )
-    botanist["phone_number"] = botanist["phone_number"].apply(normalise_phone)
-    botanist["botanist_id"] = botanist.index + 1
-
-    # Merge safely, drop any extra name columns immediately
-    df = (
-        df.merge(country, left_on="origin_country", right_on="name", how="left", suffixes=("", "_country"))
-          .merge(city, left_on="origin_city", right_on="name", how="left", suffixes=("", "_city"))
-          .merge(
-              botanist[["botanist_id", "email"]],
-              left_on="botanist_email",
-              right_on="email",
-              how="left"
-          )
-    )
+    botanist["botanist_id"] = keys.ids_for("botanist", botanist["email"].fillna(botanist["name"]))
+    botanist_ids = DimensionIndex(botanist["email"], {"botanist_id": botanist["botanist_id"]})
+    botanist = botanist.drop_duplicates("botanist_id")
+    keys.save()
+
+    # Resolve each reading's foreign keys by position, without building merged frames
+    columns = {col: df[col].array for col in df.columns}
+    columns["country_id"] = country_ids.lookup(df["origin_country"], "country_id").array
+    columns["city_id"] = city_ids.lookup(df["origin_city"], "city_id").array
+    columns["botanist_id"] = botanist_ids.lookup(df["botanist_email"], "botanist_id").array
+
+    plant = pd.DataFrame({col: columns[col] for col in PLANT_COLUMNS}, copy=False)
+    recording = pd.DataFrame({col: columns[col] for col in RECORDING_COLUMNS}, copy=False)
+    recording["recording_id"] = np.arange(1, len(recording) + 1)
+
+    tables = {
+        "country": country,
+        "city": city,
+        "botanist": botanist,
+        "plant": plant,
+        "recording": recording,
+    }
+
+    if write_csv:
+        write_tables(tables)
+        print(f"[DONE] Transform complete → {OUT_DIR}")
+    else:
+        print(f"[DONE] Transform complete → {len(recording)} recordings in memory")
+    return tables
+
+
+def transform_batches(batches: Iterable[list[dict]], write_csv: bool = False) -> dict[str, pd.DataFrame]:
+    """Transforms streamed batches of raw plant records without a .csv round-trip.
 
-    # Drop the temporary name columns to avoid CSV collisions
-    for col in df.columns:
-        if col.startswith("name") and col not in ["plant_name"]:
-            df.drop(columns=[col], inplace=True)
-
-    # Only plant_name remains
-    plant = df[
-        [
-            "plant_id",
-            "plant_name",
-            "scientific_name",
-            "latitude",
-            "longitude",
-            "country_id",
-            "city_id",
-        ]
-    ]
-
-    recording = df[
-        [
-            "plant_id",
-            "botanist_id",
-            "temperature",
-            "last_watered",
-            "soil_moisture",
-            "recording_taken",
-        ]
-    ].copy()
-    recording["recording_id"] = recording.index + 1
-
-    # Write outputs
-    country.to_csv(OUT_DIR / "country.csv", index=False)
-    city.to_csv(OUT_DIR / "city.csv", index=False)
-    plant.to_csv(OUT_DIR / "plant.csv", index=False)
-    botanist.to_csv(OUT_DIR / "botanist.csv", index=False)
-    recording.to_csv(OUT_DIR / "recording.csv", index=False)
-
-    print(f"[DONE] Transform complete → {OUT_DIR}")
+    Each batch is typed as it arrives, so only the compact typed frames are held
+    rather than every raw record. The tables are built once the batches run out.
+    """
+    typed = []
+    for batch in batches:
+        raw = pd.DataFrame.from_records(batch, columns=list(RAW_SCHEMA))
+        if raw.empty:
+            continue
+        if write_csv:
+            raw.to_csv(RAW_FILE, index=False, mode="a" if typed else "w", header=not typed)
+        typed.append(apply_schema(raw))
+    if not typed:
+        raise EmptyBatchesError("No valid plant data retrieved.")
+    return build_tables(concat_typed(typed), write_csv)
 
 
 if __name__ == "__main__":
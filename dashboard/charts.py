@@ -1,15 +1,29 @@
-"""Charting functions for the dashboard."""
+"""Charting functions for the dashboard.
+
+Charts are cached on a data version token and the selection rather than on the
+DataFrame itself (the leading underscore stops Streamlit hashing it), so a
+rerun with unchanged data finds its chart without touching the rows.
+"""
 
 import pandas as pd
 import altair as alt
 import streamlit as st
 
 
-@st.cache_data
-def create_temp_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chosen: list[str] = None):
-    """Creates a temperature bar chart."""
+def chart_data(df: pd.DataFrame, columns: list[str], chosen: tuple[str] = ()) -> pd.DataFrame:
+    """Returns only the chosen plants and the columns a chart encodes."""
     if chosen:
         df = df[df["plant_name"].isin(chosen)]
+    return df[list(dict.fromkeys(columns))]
+
+
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=64)
+def create_temp_chart(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: str, x_axis: str, y_axis: str,
+        chosen: tuple[str] = ()):
+    """Creates a temperature bar chart."""
+    df = chart_data(_df, [x_axis, y_axis, "plant_name"], chosen)
 
     return alt.Chart(df).mark_bar().encode(
         x=alt.X(x_axis, title="Plant Name", axis=alt.Axis(labelAngle=80)),
@@ -21,11 +35,13 @@ def create_temp_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chosen: list[s
         width=400)
 
 
-@st.cache_data
-def create_soil_moisture_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chosen: list[str] = None):
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=64)
+def create_soil_moisture_chart(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: str, x_axis: str, y_axis: str,
+        chosen: tuple[str] = ()):
     """Creates a soil moisture bar chart."""
-    if chosen:
-        df = df[df["plant_name"].isin(chosen)]
+    df = chart_data(_df, [x_axis, y_axis, "plant_name"], chosen)
 
     return alt.Chart(df).mark_bar().encode(
         x=alt.X(x_axis, title="Plant Name", axis=alt.Axis(labelAngle=80)),
@@ -37,15 +53,22 @@ def create_soil_moisture_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chose
         width=400)
 
 
-@st.cache_data
-def create_soil_moisture_heatmap_chart(df: pd.DataFrame, x_axis: str, y_axis: str, colour: str, time: str):
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=4)
+def create_soil_moisture_heatmap_chart(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: str, x_axis: str,
+        y_axis: str, colour: str, time: str):
     """Creates a soil moisture heatmap chart."""
+    df = chart_data(_df, [x_axis, y_axis, colour, time, "min_soil_moisture",
+                          "max_soil_moisture", "reading_count"])
+
     return alt.Chart(df).mark_rect().encode(
         x=alt.X(f"{x_axis}:O", title="Time (hours)"),
         y=alt.Y(f"{y_axis}:N", title="Plant ID"),
         color=alt.Color(f"{colour}:Q", title="Moisture Levels (%)",
                         scale=alt.Scale(scheme='purplebluegreen')),
-        tooltip=["plant_id", "time", "soil_moisture"]
+        tooltip=["plant_id", time, alt.Tooltip(colour, format=".1f"),
+                 "min_soil_moisture", "max_soil_moisture", "reading_count"]
     ).properties(
         title="Hourly Soil Moisture of Each Plant",
         width=400)
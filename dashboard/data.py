@@ -6,87 +6,109 @@ import pyodbc
 from os import environ
 from dotenv import load_dotenv
 
+from db_pool import ConnectionPool
+from row_frame import cursor_to_frame
+
+LIVE_WINDOW_HOURS = int(environ.get("LIVE_WINDOW_HOURS", "24"))
+RECORDING_COLUMNS = ["recording_id", "plant_id", "botanist_id", "temperature",
+                     "last_watered", "soil_moisture", "recording_taken", "plant_name"]
+LOGIN_TIMEOUT = int(environ.get("DB_LOGIN_TIMEOUT", "15"))
+LATEST_RECORDINGS_SQL = """
+    SELECT l.recording_id, l.plant_id, l.botanist_id, l.temperature, l.last_watered,
+           l.soil_moisture, l.recording_taken, p.name
+    FROM alpha.latest_recording AS l
+    JOIN alpha.plant AS p ON l.plant_id = p.plant_id
+"""
+# Changes whenever recordings are loaded, and when the nightly reset recreates the table
+DATA_VERSION_SQL = """
+    SELECT MAX(id), (SELECT create_date FROM sys.tables WHERE object_id = OBJECT_ID('alpha.recording'))
+    FROM alpha.recording
+"""
+HOURLY_ROLLUP_SQL = """
+    SELECT plant_id, hour_start, reading_count, avg_soil_moisture,
+           min_soil_moisture, max_soil_moisture
+    FROM alpha.recording_hourly
+    WHERE hour_start > DATEADD(hour, -?, (SELECT MAX(hour_start) FROM alpha.recording_hourly))
+"""
+
 
-@st.cache_resource
 def get_connection() -> pyodbc.Connection:
     """Returns a connection to the database."""
     load_dotenv()
     conn_str = (f"DRIVER={{{environ['DB_DRIVER']}}};SERVER={environ['DB_HOST']};"
                 f"PORT={environ['DB_PORT']};DATABASE={environ['DB_NAME']};"
                 f"UID={environ['DB_USERNAME']};PWD={environ['DB_PASSWORD']};Encrypt=no;")
-    return pyodbc.connect(conn_str)
+    return pyodbc.connect(conn_str, timeout=LOGIN_TIMEOUT)
 
 
-@st.cache_data(ttl=60)
-def load_all_plant_recording_data() -> pd.DataFrame:
-    """Returns all plant recording data from the db as a dataframe."""
-    conn = get_connection()
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT alpha.recording.*, alpha.plant.name FROM alpha.recording JOIN alpha.plant ON alpha.recording.plant_id = alpha.plant.plant_id")
-        res = cur.fetchall()
-
-    return format_plant_recording_data(res)
+@st.cache_resource
+def get_pool() -> ConnectionPool:
+    """Returns the connection pool shared by every session."""
+    return ConnectionPool(get_connection)
+
+
+def run_query(sql: str, *params, columns: list[str] = None) -> pd.DataFrame:
+    """Returns the result of a query, retrying once if the pooled connection had dropped."""
+    dropped = None
+    for attempt in range(2):
+        try:
+            with get_pool().connection() as conn, conn.cursor() as cur:
+                cur.execute(sql, *params)
+                return cursor_to_frame(cur, columns=columns)
+        except pyodbc.OperationalError as err:
+            dropped = err
+            if not attempt:
+                print("[POOL] Connection dropped mid-query, retrying on a fresh connection")
+    raise dropped
 
 
 @st.cache_data(ttl=60)
-def load_latest_plant_recordings() -> pd.DataFrame:
-    """Filters for the latest recording for each plant in the dataframe."""
-
-    df = load_all_plant_recording_data()
-
-    return df.loc[df.groupby('plant_name')['last_watered'].idxmax()]
-
+def load_data_version() -> str:
+    """Returns a token identifying the current state of the live tables."""
+    newest_id, created = run_query(DATA_VERSION_SQL).iloc[0]
+    return f"{created}:{newest_id}"
 
-def format_plant_recording_data(data: list[tuple]) -> pd.DataFrame:
-    """Adds the column name and formats the data."""
 
-    records = []
-    for recording in data:
-        record = {}
-        record["recording_id"] = recording[0]
-        record["plant_id"] = recording[1]
-        record["botanist_id"] = recording[2]
-        record["temperature"] = recording[3]
-        record["last_watered"] = recording[4]
-        record["soil_moisture"] = recording[5]
-        record["recording_taken"] = recording[6]
-        record["plant_name"] = recording[7]
-        records.append(record)
+# version only keys st.cache_data, so a new load is fetched when the data changes
+@st.cache_data(max_entries=4)
+def load_latest_plant_recordings(version: str) -> pd.DataFrame:  # pylint: disable=unused-argument
+    """Returns the most recent recording of each plant, kept by the API load."""
+    df = run_query(LATEST_RECORDINGS_SQL, columns=RECORDING_COLUMNS)
 
-    return pd.DataFrame(records)
+    return df.sort_values("plant_name", ignore_index=True)
 
 
-@st.cache_data
-def load_all_plants(df: pd.DataFrame):
-    return df['plant_name'].unique()
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=4)
+def load_all_plants(_df: pd.DataFrame, version: str):  # pylint: disable=unused-argument
+    """Returns the name of every plant in the latest recordings."""
+    return _df['plant_name'].unique()
 
 
-@st.cache_data
-def live_heatmap_data():
-    """Gets the data for the live page heatmap."""
-    df = load_all_plant_recording_data()
-    df["hour"] = pd.to_datetime(df["recording_taken"]).dt.hour
-    df["time"] = pd.to_datetime(df["recording_taken"]).dt.strftime("%H:%M")
-    df["soil_moisture"] = pd.to_numeric(df["soil_moisture"])
+# version only keys st.cache_data, so a new load is fetched when the data changes
+@st.cache_data(max_entries=4)
+def live_heatmap_data(version: str):  # pylint: disable=unused-argument
+    """Gets one hourly soil moisture aggregate per plant for the live page heatmap."""
+    df = run_query(HOURLY_ROLLUP_SQL, LIVE_WINDOW_HOURS)
 
-    heatmap_df = df[["plant_id", "soil_moisture", "hour", "time"]]
-    return heatmap_df
+    df["hour"] = df["hour_start"].dt.hour
+    df["time"] = df["hour"].map(lambda hour: f"{hour:02d}:00")
+    return df.rename(columns={"avg_soil_moisture": "soil_moisture"}).drop(columns="hour_start")
 
 
-@st.cache_data
-def get_low_soil_moisture_plants():
+@st.cache_data(max_entries=4)
+def get_low_soil_moisture_plants(version: str):
     """Gets the plants with soil moistures below 20%."""
-    df = load_latest_plant_recordings()
+    df = load_latest_plant_recordings(version)
     low_moisture_plants = df[df["soil_moisture"] < 20].sort_values(
         "soil_moisture", ascending=True)
     return low_moisture_plants
 
 
-@st.cache_data
-def get_low_temperature_plants():
+@st.cache_data(max_entries=4)
+def get_low_temperature_plants(version: str):
     """Gets the plants with temperatures below 5°C."""
-    df = load_latest_plant_recordings()
+    df = load_latest_plant_recordings(version)
     low_temp_plants = df[df["temperature"] <= 5].sort_values(
         "temperature", ascending=True)
     return low_temp_plants
@@ -0,0 +1,133 @@
+"""A bounded pool of pyodbc connections shared by every dashboard session."""
+
+from collections import deque
+from contextlib import contextmanager
+from os import environ
+from time import perf_counter
+import threading
+
+import pyodbc
+
+POOL_SIZE = int(environ.get("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(environ.get("DB_POOL_TIMEOUT", "10"))
+QUERY_TIMEOUT = int(environ.get("DB_QUERY_TIMEOUT", "30"))
+SLOW_WAIT = 0.5  # seconds; longer waits for a connection are logged
+STATS_EVERY = int(environ.get("DB_POOL_STATS_EVERY", "500"))  # checkouts between stats logs
+WAIT_SAMPLES = 1000
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Returns the value at a fraction of the way through sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout."""
+
+
+class ConnectionPool:
+    """Hands out at most `size` connections, reusing the most recently returned one first."""
+
+    def __init__(self, connect, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT,
+                 query_timeout: int = QUERY_TIMEOUT):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.query_timeout = query_timeout
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.checkouts = 0
+        self.reconnects = 0
+
+    def _open(self) -> pyodbc.Connection:
+        """Opens a new connection with the query timeout set."""
+        conn = self.connect()
+        conn.timeout = self.query_timeout
+        return conn
+
+    @staticmethod
+    def _is_alive(conn: pyodbc.Connection) -> bool:
+        """Returns whether a pooled connection still answers a trivial query."""
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1").fetchone()
+            return True
+        except pyodbc.Error:
+            return False
+
+    @staticmethod
+    def _close(conn: pyodbc.Connection) -> None:
+        """Closes a connection, ignoring errors from one that is already broken."""
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def _checkout(self) -> pyodbc.Connection:
+        """Returns a live idle connection, or a new one if none is idle."""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._open()
+            if self._is_alive(conn):
+                return conn
+            self._close(conn)
+            with self._lock:
+                self.reconnects += 1
+
+    @contextmanager
+    def connection(self):
+        """Lends a connection for the duration of a `with` block."""
+        start = perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"No database connection free after {self.timeout}s")
+        waited = perf_counter() - start
+        with self._lock:
+            self._waits.append(waited)
+            self.checkouts += 1
+            log_stats = STATS_EVERY and self.checkouts % STATS_EVERY == 0
+        if waited > SLOW_WAIT:
+            print(f"[POOL] Waited {waited:.2f}s for a database connection")
+        if log_stats:
+            self.log_stats()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                # Whatever interrupted the block may have left the connection mid-query,
+                # so it is closed rather than returned to the pool
+                self._close(conn)
+                raise
+            with self._lock:
+                self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Returns checkout counts and connection wait times in seconds."""
+        with self._lock:
+            waits = sorted(self._waits)
+            idle = len(self._idle)
+            checkouts, reconnects = self.checkouts, self.reconnects
+        return {
+            "size": self.size,
+            "idle": idle,
+            "checkouts": checkouts,
+            "reconnects": reconnects,
+            "wait_p50": percentile(waits, 0.50),
+            "wait_p95": percentile(waits, 0.95),
+            "wait_max": percentile(waits, 1.0),
+        }
+
+    def log_stats(self) -> None:
+        """Prints the pool's checkout counts and wait times."""
+        stats = self.stats()
+        print(f"[POOL] {stats['checkouts']} checkouts, {stats['idle']}/{stats['size']} idle, "
+              f"{stats['reconnects']} reconnects, wait p50 {stats['wait_p50'] * 1000:.1f}ms "
+              f"p95 {stats['wait_p95'] * 1000:.1f}ms max {stats['wait_max'] * 1000:.1f}ms")
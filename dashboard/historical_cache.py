@@ -0,0 +1,133 @@
+"""On-disk Parquet mirror of the historical archive, shared by every dashboard session."""
+
+from contextlib import contextmanager
+from datetime import date
+from os import environ
+from pathlib import Path
+import fcntl
+import json
+import os
+import re
+import shutil
+
+import pandas as pd
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+CACHE_DIR = environ.get("HISTORICAL_CACHE_DIR", "/tmp/historical-cache")
+ARCHIVE_BUCKET = environ.get("ARCHIVE_BUCKET", "c19-alpha-s3-bucket")
+ARCHIVE_PREFIX = environ.get("ARCHIVE_PREFIX", "")
+# Dataset discovery skips names starting with "_" or ".", so these never look like data
+MANIFEST_NAME = "_manifest.json"
+LOCK_NAME = ".lock"
+DAY_PARTITION = re.compile(r"^year=(\d+)/month=(\d+)/day=(\d+)/")
+
+
+def day_of(partition: str) -> date:
+    """Returns the date of a year=/month=/day= partition path."""
+    year, month, day = DAY_PARTITION.match(partition).groups()
+    return date(int(year), int(month), int(day))
+
+
+def partition_of(day: date) -> str:
+    """Returns the year=/month=/day= partition path of a date."""
+    return f"year={day.year}/month={day.month}/day={day.day}/"
+
+
+class HistoricalCache:
+    """A local copy of the archive's day partitions and a manifest of their S3 ETags."""
+
+    def __init__(self, root: str = CACHE_DIR, bucket: str = ARCHIVE_BUCKET,
+                 prefix: str = ARCHIVE_PREFIX):
+        self.root = Path(root)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def locked(self, exclusive: bool):
+        """Holds the cache's file lock, shared for reads and exclusive for syncs."""
+        with open(self.root / LOCK_NAME, "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def read_manifest(self) -> dict[str, dict[str, str]]:
+        """Returns the cached files of each day partition with their ETags."""
+        try:
+            with open(self.root / MANIFEST_NAME, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def write_manifest(self, manifest: dict) -> None:
+        """Atomically replaces the manifest."""
+        tmp = self.root / f"{MANIFEST_NAME}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self.root / MANIFEST_NAME)
+
+    def list_archive(self, s3) -> dict[str, dict[str, str]]:
+        """Returns the files and ETags of every day partition in the S3 archive."""
+        archive = {}
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                key = obj["Key"][len(self.prefix):].lstrip("/")
+                match = DAY_PARTITION.match(key)
+                if match and key.endswith(".parquet"):
+                    archive.setdefault(match.group(0), {})[key] = obj["ETag"]
+        return archive
+
+    def download_day(self, s3, partition: str, files: dict[str, str]) -> None:
+        """Replaces a day partition's local files with the archived ones."""
+        shutil.rmtree(self.root / partition, ignore_errors=True)
+        for key in files:
+            path = self.root / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.part")
+            s3.download_file(self.bucket, f"{self.prefix.rstrip('/')}/{key}".lstrip("/"), str(tmp))
+            os.replace(tmp, path)
+
+    def sync(self, s3) -> list[date]:
+        """Downloads new or changed days, drops deleted ones and returns every cached date."""
+        with self.locked(exclusive=True):
+            manifest = self.read_manifest()
+            archive = self.list_archive(s3)
+            removed = set(manifest) - set(archive)
+            for partition in removed:
+                shutil.rmtree(self.root / partition, ignore_errors=True)
+                del manifest[partition]
+            if removed:
+                self.write_manifest(manifest)
+            changed = [p for p, files in archive.items() if manifest.get(p) != files]
+            for partition in sorted(changed):
+                self.download_day(s3, partition, archive[partition])
+                manifest[partition] = archive[partition]
+                self.write_manifest(manifest)
+            if changed:
+                print(f"[CACHE] Downloaded {len(changed)} day(s) from s3://{self.bucket}")
+        return sorted((day_of(p) for p in manifest), reverse=True)
+
+    def version(self) -> str:
+        """Returns a token that changes whenever a sync changes the cached days."""
+        try:
+            return str((self.root / MANIFEST_NAME).stat().st_mtime_ns)
+        except FileNotFoundError:
+            return ""
+
+    def read(self, days: list[date], plants: tuple[str] = (),
+             columns: list[str] = None) -> pd.DataFrame:
+        """Returns the chosen columns of the cached rows for the chosen days and plants."""
+        partitions = [self.root / partition_of(day) for day in days]
+        with self.locked(exclusive=False):
+            files = [str(path) for partition in partitions if partition.exists()
+                     for path in sorted(partition.rglob("*.parquet"))]
+            if not files:
+                return pd.DataFrame(columns=columns)
+            dataset = ds.dataset(files, format="parquet",
+                                 filesystem=fs.LocalFileSystem(use_mmap=True))
+            row_filter = ds.field("plant_name").isin(list(plants)) if plants else None
+            return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
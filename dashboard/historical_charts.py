@@ -1,18 +1,20 @@
-"""Charting functions for the historical data for the dashboard."""
+"""Charting functions for the historical data for the dashboard.
+
+Each chart takes per-plant averages already aggregated over the chosen dates
+and is cached on the archive version plus that selection, not on the rows.
+"""
 
 import pandas as pd
 import altair as alt
 import streamlit as st
 
 
-@st.cache_data
-def create_temp_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chosen: list[str] = None, dates: list[str] = None):
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=64)
+def create_temp_chart(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: tuple, x_axis: str, y_axis: str):
     """Template to create temperature bar chart."""
-    if chosen:
-        df = df[df["plant_name"].isin(chosen)]
-
-    if dates:
-        df = df[df["date"].isin(dates)]
+    df = _df[[x_axis, y_axis]]
 
     return alt.Chart(df).mark_bar().encode(
         x=alt.X(x_axis, sort="-y", title="Plant Name",
@@ -23,14 +25,12 @@ def create_temp_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chosen: list[s
     ).properties(title="Average Temperature of Each Plant", width=400)
 
 
-@st.cache_data
-def create_soil_moisture_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chosen: list[str] = None, dates: list[str] = None):
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=64)
+def create_soil_moisture_chart(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: tuple, x_axis: str, y_axis: str):
     """Template to create soil moisture bar chart."""
-    if chosen:
-        df = df[df["plant_name"].isin(chosen)]
-
-    if dates:
-        df = df[df["date"].isin(dates)]
+    df = _df[[x_axis, y_axis]]
 
     return alt.Chart(df).mark_bar().encode(
         x=alt.X(x_axis, sort="-y", title="Plant Name",
@@ -41,14 +41,12 @@ def create_soil_moisture_chart(df: pd.DataFrame, x_axis: str, y_axis: str, chose
     ).properties(title="Average Soil Moisture of Each Plant", width=400)
 
 
-@st.cache_data
-def create_at_risk_chart_for_moisture(df: pd.DataFrame, x_axis: str, y_axis: str, dates: list[str] = None):
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=64)
+def create_at_risk_chart_for_moisture(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: tuple, x_axis: str, y_axis: str):
     """Template to create soil moisture bar chart."""
-
-    if dates:
-        df = df[df["date"].isin(dates)]
-
-    df = df.groupby(x_axis)[y_axis].mean(
+    df = _df.groupby(x_axis)[y_axis].mean(
     ).reset_index().sort_values(by=y_axis).head(5)
 
     return alt.Chart(df).mark_bar().encode(
@@ -60,14 +58,12 @@ def create_at_risk_chart_for_moisture(df: pd.DataFrame, x_axis: str, y_axis: str
     ).properties(title='Top 5 Lowest Soil Moisture', height=400, width=400)
 
 
-@st.cache_data
-def create_at_risk_chart_for_temperature(df: pd.DataFrame, x_axis: str, y_axis: str, dates: list[str] = None):
+# version only keys st.cache_data, since the unhashed _df cannot
+@st.cache_data(max_entries=64)
+def create_at_risk_chart_for_temperature(  # pylint: disable=unused-argument
+        _df: pd.DataFrame, version: tuple, x_axis: str, y_axis: str):
     """Template to create temperature bar chart."""
-
-    if dates:
-        df = df[df["date"].isin(dates)]
-
-    df = df.groupby(x_axis)[y_axis].mean(
+    df = _df.groupby(x_axis)[y_axis].mean(
     ).reset_index().sort_values(by=y_axis).head(5)
 
     return alt.Chart(df).mark_bar().encode(
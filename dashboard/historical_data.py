@@ -1,48 +1,140 @@
 """Function that get and manage all of the historical data for the dashboard"""
 
+from datetime import date
+from os import environ
+
 import pandas as pd
 import streamlit as st
 import boto3
-from os import environ as ENV
 import awswrangler as wr
 
+from historical_cache import HistoricalCache
+
+# "cache" answers from a local mirror of the archive, "athena" queries the archive directly
+HISTORICAL_SOURCE = environ.get("HISTORICAL_SOURCE", "cache")
+AVERAGE_COLUMNS = ["avg_temperature", "avg_soil_moisture"]
+GLUE_DATABASE = "c19_alpha_glue_catalog_db"
+GLUE_TABLE = "c19_alpha_s3_bucket"
+DEFAULT_DAYS = 7
+
+# The archive is partitioned by year/month/day; a predicate on these columns alone
+# lets Athena skip every partition that was not selected.
+DAY_KEY = ("CAST(year AS INTEGER) * 10000 + CAST(month AS INTEGER) * 100 "
+           "+ CAST(day AS INTEGER)")
 
-@st.cache_data()
-def load_historical_plant_data() -> pd.DataFrame:
-    """Loads the historical data stored in the s3 bucket."""
-    create_boto3_client()
-    return wr.athena.read_sql_table(
-        table='c19_alpha_s3_bucket', database='c19_alpha_glue_catalog_db'
-    )
 
+def to_day_key(day: date) -> int:
+    """Returns the yyyymmdd integer matching DAY_KEY for a date."""
+    return day.year * 10000 + day.month * 100 + day.day
 
-@st.cache_data
-def load_all_plants(df: pd.DataFrame):
-    return df['plant_name'].unique()
 
+def build_in_list(name: str, values: list) -> tuple[str, dict]:
+    """Returns a list of named placeholders and their parameters for an IN clause."""
+    params = {f"{name}_{i}": value for i, value in enumerate(values)}
+    return ", ".join(f":{key}" for key in params), params
 
-@st.cache_data
-def load_all_dates(df: pd.DataFrame):
-    return df['date'].unique()
 
+def build_plant_averages_query(dates: tuple[date], plants: tuple[str] = ()) -> tuple[str, dict]:
+    """Returns the query and parameters for each plant's averages over the chosen dates."""
+    day_list, params = build_in_list("day", [to_day_key(day) for day in dates])
+    sql = (f"SELECT plant_name, AVG(avg_temperature) AS avg_temperature, "
+           f"AVG(avg_soil_moisture) AS avg_soil_moisture "
+           f"FROM {GLUE_TABLE} WHERE {DAY_KEY} IN ({day_list})")
+    if plants:
+        plant_list, plant_params = build_in_list("plant", list(plants))
+        sql += f" AND plant_name IN ({plant_list})"
+        params.update(plant_params)
+    return sql + " GROUP BY plant_name", params
 
-@st.cache_data
-def calculate_most_at_risk_plant_by_moisture(df: pd.DataFrame, dates: list):
-    if dates:
-        df = df[df["date"].isin(dates)]
 
-    df = df.groupby('plant_name')['avg_soil_moisture'].mean(
+def run_query(sql: str, params: dict = None) -> pd.DataFrame:
+    """Runs a parameterised query against the historical archive."""
+    create_boto3_client()
+    return wr.athena.read_sql_query(sql, database=GLUE_DATABASE, params=params,
+                                    ctas_approach=False)
+
+
+@st.cache_resource
+def get_historical_cache() -> HistoricalCache:
+    """Returns the on-disk mirror of the archive."""
+    return HistoricalCache()
+
+
+@st.cache_data(ttl=600)
+def sync_historical_cache() -> list[date]:
+    """Fetches days added to the archive since the last sync and returns every cached date."""
+    return get_historical_cache().sync(boto3.client("s3", region_name="eu-west-2"))
+
+
+@st.cache_data(ttl=600)
+def load_all_dates() -> list[date]:
+    """Returns every archived date, newest first."""
+    if HISTORICAL_SOURCE == "cache":
+        return sync_historical_cache()
+    partitions = wr.catalog.get_partitions(database=GLUE_DATABASE, table=GLUE_TABLE)
+    days = {date(int(values[0]), int(values[1]), int(values[2]))
+            for values in partitions.values()}
+    return sorted(days, reverse=True)
+
+
+def get_archive_version() -> str:
+    """Returns a token that changes whenever the archived data changes."""
+    if HISTORICAL_SOURCE == "cache":
+        return get_historical_cache().version()
+    return str(load_all_dates()[:1])
+
+
+@st.cache_data(ttl=3600)
+def load_all_plants(dates: tuple[date], version: str = "") -> list[str]:
+    """Returns every plant name archived on any of the dates.
+
+    `version` is the archive version, so a resync of a cached date is never served stale.
+    """
+    if not dates:
+        return []
+    if HISTORICAL_SOURCE == "cache":
+        plants = get_historical_cache().read(dates, columns=["plant_name"])
+        return sorted(plants["plant_name"].dropna().unique())
+    sql = (f"SELECT DISTINCT plant_name FROM {GLUE_TABLE} "
+           f"WHERE {DAY_KEY} BETWEEN :first AND :last ORDER BY plant_name")
+    params = {"first": to_day_key(min(dates)), "last": to_day_key(max(dates))}
+    return run_query(sql, params)["plant_name"].tolist()
+
+
+@st.cache_data(ttl=3600)
+def load_plant_averages(dates: tuple[date], plants: tuple[str] = (),
+                        version: str = "") -> pd.DataFrame:
+    """Returns each plant's average temperature and soil moisture over the chosen dates.
+
+    `version` is the archive version, so a resync of a cached date is never served stale.
+    """
+    if not dates:
+        return pd.DataFrame(columns=["plant_name", *AVERAGE_COLUMNS])
+    if HISTORICAL_SOURCE == "cache":
+        rows = get_historical_cache().read(dates, plants, ["plant_name", *AVERAGE_COLUMNS])
+        return rows.groupby("plant_name", as_index=False)[AVERAGE_COLUMNS].mean()
+    return run_query(*build_plant_averages_query(dates, plants))
+
+
+@st.cache_data(max_entries=64)
+def calculate_most_at_risk_plant_by_moisture(_df: pd.DataFrame, version: tuple):
+    """Returns the plant with the lowest average soil moisture.
+
+    Cached on `version`, which identifies `_df`, so Streamlit never hashes the rows.
+    """
+    df = _df.groupby('plant_name')['avg_soil_moisture'].mean(
     ).reset_index().sort_values(by='avg_soil_moisture').head(1)
 
     return df.iloc[0]
 
 
-@st.cache_data
-def calculate_most_at_risk_plant_by_temperature(df: pd.DataFrame, dates: list):
-    if dates:
-        df = df[df["date"].isin(dates)]
+@st.cache_data(max_entries=64)
+def calculate_most_at_risk_plant_by_temperature(_df: pd.DataFrame, version: tuple):
+    """Returns the plant with the lowest average temperature.
 
-    df = df.groupby('plant_name')['avg_temperature'].mean(
+    Cached on `version`, which identifies `_df`, so Streamlit never hashes the rows.
+    """
+    df = _df.groupby('plant_name')['avg_temperature'].mean(
     ).reset_index().sort_values(by='avg_temperature').head(1)
 
     return df.iloc[0]
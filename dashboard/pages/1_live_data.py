@@ -8,6 +8,7 @@ from charts import (
     create_soil_moisture_heatmap_chart
 )
 from data import (
+    load_data_version,
     load_all_plants,
     load_latest_plant_recordings,
     live_heatmap_data,
@@ -15,30 +16,32 @@ from data import (
     get_low_temperature_plants
 )
 
-latest_plant_recordings = load_latest_plant_recordings()
-all_plants = load_all_plants(latest_plant_recordings)
+# Data and charts are cached on this token, so reruns with no new recordings reuse them
+data_version = load_data_version()
+latest_plant_recordings = load_latest_plant_recordings(data_version)
+all_plants = load_all_plants(latest_plant_recordings, data_version)
 
 st.subheader("Live Plant Data")
 
 st.write("")
 st.write("")
 
-if get_low_soil_moisture_plants().empty:
+if get_low_soil_moisture_plants(data_version).empty:
     st.write(
         f":red[CRITICAL LOW MOISTURE:] No plants are below 20% moisture")
 else:
-    low_moisture_plants = get_low_soil_moisture_plants()
+    low_moisture_plants = get_low_soil_moisture_plants(data_version)
     min_moisture = low_moisture_plants["soil_moisture"].min()
     lowest_moisture_plant = low_moisture_plants[low_moisture_plants["soil_moisture"]
                                                 == min_moisture]["plant_name"]
     st.write(
         f":red[CRITICAL LOW MOISTURE:] {lowest_moisture_plant.values[0]} ({min_moisture}%)")
 
-if get_low_temperature_plants().empty:
+if get_low_temperature_plants(data_version).empty:
     st.write(
         f":red[CRITICAL LOW TEMPERATURE:] No plants are at or below 5°C")
 else:
-    low_temp_plants = get_low_temperature_plants()
+    low_temp_plants = get_low_temperature_plants(data_version)
     min_temp = low_temp_plants["temperature"].min()
     lowest_temp_plant = low_temp_plants[low_temp_plants["temperature"]
                                         == min_temp]["plant_name"]
@@ -54,10 +57,11 @@ chosen_plants = st.multiselect(
 st.write("")
 st.write("")
 
-left = create_temp_chart(latest_plant_recordings, "plant_name",
-                         "temperature", chosen_plants)
-right = create_soil_moisture_chart(latest_plant_recordings, "plant_name",
-                                   "soil_moisture", chosen_plants)
+chosen_key = tuple(sorted(chosen_plants))
+left = create_temp_chart(latest_plant_recordings, data_version, "plant_name",
+                         "temperature", chosen_key)
+right = create_soil_moisture_chart(latest_plant_recordings, data_version, "plant_name",
+                                   "soil_moisture", chosen_key)
 
 combined_charts = alt.hconcat(left, right).resolve_legend(
     color="shared"
@@ -67,6 +71,6 @@ st.altair_chart(combined_charts)
 st.write("")
 st.write("")
 
-heatmap_df = live_heatmap_data()
-st.altair_chart(create_soil_moisture_heatmap_chart(heatmap_df, "hour",
+heatmap_df = live_heatmap_data(data_version)
+st.altair_chart(create_soil_moisture_heatmap_chart(heatmap_df, data_version, "hour",
                                                    "plant_id", "soil_moisture", "time"))
@@ -9,20 +9,28 @@ from historical_charts import (
     create_at_risk_chart_for_temperature
 )
 from historical_data import (
-    load_historical_plant_data,
+    DEFAULT_DAYS,
+    get_archive_version,
+    load_plant_averages,
     load_all_plants,
     load_all_dates,
     calculate_most_at_risk_plant_by_moisture,
     calculate_most_at_risk_plant_by_temperature
 )
 
-# Load all data
-hist_plant_recordings = load_historical_plant_data()
-all_plants = load_all_plants(hist_plant_recordings)
-all_dates = load_all_dates(hist_plant_recordings)
+# Only the partition list and the archived plant names are loaded up front
+all_dates = load_all_dates()
 
 st.title("Historical Plant Data")
 
+if not all_dates:
+    st.info("No historical data has been archived yet.")
+    st.stop()
+
+# Queries and charts are cached on this token, so a resynced day is never served stale
+archive_version = get_archive_version()
+all_plants = load_all_plants(tuple(all_dates), archive_version)
+
 
 left, right = st.columns(2, vertical_alignment='bottom')
 
@@ -33,13 +41,30 @@ with left:
 
 with right:
     chosen_dates = st.multiselect(
-        label="Chosen dates", options=all_dates, default=all_dates)
+        label="Chosen dates", options=all_dates, default=all_dates[:DEFAULT_DAYS])
+
+if not chosen_dates:
+    st.info("Choose at least one date.")
+    st.stop()
+
+# Each query only reads the chosen dates' partitions and is cached per selection
+chosen_date_key = tuple(sorted(chosen_dates))
+chosen_plant_averages = load_plant_averages(chosen_date_key, tuple(sorted(chosen_plants)),
+                                            archive_version)
+all_plant_averages = load_plant_averages(chosen_date_key, version=archive_version)
+
+if all_plant_averages.empty:
+    st.info("No recordings were archived on the chosen dates.")
+    st.stop()
 
+# Charts are cached on the selection too, instead of hashing the frames on every rerun
+all_plants_version = (archive_version, chosen_date_key)
+chosen_plants_version = (*all_plants_version, tuple(sorted(chosen_plants)))
 
-first_chart = create_temp_chart(hist_plant_recordings, "plant_name",
-                                "avg_temperature", chosen_plants, chosen_dates)
+first_chart = create_temp_chart(chosen_plant_averages, chosen_plants_version,
+                                "plant_name", "avg_temperature")
 second_chart = create_soil_moisture_chart(
-    hist_plant_recordings, "plant_name", "avg_soil_moisture", chosen_plants, chosen_dates)
+    chosen_plant_averages, chosen_plants_version, "plant_name", "avg_soil_moisture")
 
 combined_charts = alt.hconcat(first_chart, second_chart).resolve_legend(
     color="shared"
@@ -49,7 +74,7 @@ st.altair_chart(combined_charts)
 # Chart and metrics about lowest Soil Moisture
 
 most_at_risk_plant_by_moisture = calculate_most_at_risk_plant_by_moisture(
-    hist_plant_recordings, chosen_dates)
+    all_plant_averages, all_plants_version)
 
 
 l2, r2 = st.columns(2, vertical_alignment='top')
@@ -63,14 +88,14 @@ with r2:
         most_at_risk_plant_by_moisture['avg_soil_moisture'], 2))
 
 
-st.altair_chart(create_at_risk_chart_for_moisture(hist_plant_recordings, "plant_name",
-                                                  "avg_soil_moisture", chosen_dates))
+st.altair_chart(create_at_risk_chart_for_moisture(all_plant_averages, all_plants_version,
+                                                  "plant_name", "avg_soil_moisture"))
 
 
 # Chart and metrics about lowest temperature
 
 most_at_risk_plant_by_temperature = calculate_most_at_risk_plant_by_temperature(
-    hist_plant_recordings, chosen_dates)
+    all_plant_averages, all_plants_version)
 
 
 l3, r3 = st.columns(2, vertical_alignment='top')
@@ -83,5 +108,5 @@ with r3:
         most_at_risk_plant_by_temperature['avg_temperature'], 2))
 
 
-st.altair_chart(create_at_risk_chart_for_temperature(hist_plant_recordings, "plant_name",
-                                                     "avg_temperature", chosen_dates))
+st.altair_chart(create_at_risk_chart_for_temperature(all_plant_averages, all_plants_version,
+                                                     "plant_name", "avg_temperature"))
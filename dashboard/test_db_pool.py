@@ -0,0 +1,109 @@
+"""Tests for db_pool.py"""
+import pyodbc
+import pytest
+
+import db_pool
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    """A cursor that answers the health check unless its connection is broken."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if self.conn.broken:
+            raise pyodbc.Error("connection is broken")
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+
+class FakeConnection:
+    """A connection that records whether it was closed."""
+
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+        self.timeout = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs) -> tuple[ConnectionPool, list[FakeConnection]]:
+    """Returns a pool and the list of connections it has opened."""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    return ConnectionPool(connect, **kwargs), opened
+
+
+def test_connection_is_returned_and_reused():
+    """Tests a returned connection is lent out again instead of opening another."""
+    pool, opened = make_pool(size=2, query_timeout=5)
+    with pool.connection() as first:
+        assert first.timeout == 5
+    with pool.connection() as second:
+        assert second is first
+    assert len(opened) == 1 and not first.closed
+    assert pool.stats()["idle"] == 1 and pool.stats()["checkouts"] == 2
+
+
+@pytest.mark.parametrize("error", [pyodbc.Error, ValueError, KeyboardInterrupt])
+def test_connection_is_closed_when_the_block_raises(error):
+    """Tests any exception closes the connection and gives its slot back."""
+    pool, opened = make_pool(size=1, timeout=0.05)
+    with pytest.raises(error):
+        with pool.connection():
+            raise error("query failed")
+    assert opened[0].closed and pool.stats()["idle"] == 0
+    with pool.connection() as conn:
+        assert conn is opened[1]
+
+
+def test_pool_size_limits_checkouts():
+    """Tests no more than `size` connections are lent at once."""
+    pool, opened = make_pool(size=2, timeout=0.05)
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert len(opened) == 2
+    with pool.connection():
+        assert pool.stats()["idle"] == 1
+
+
+def test_dead_idle_connection_is_replaced():
+    """Tests an idle connection that fails the health check is closed and replaced."""
+    pool, opened = make_pool()
+    with pool.connection() as conn:
+        pass
+    conn.broken = True
+    with pool.connection() as replacement:
+        assert replacement is not conn
+    assert conn.closed and pool.stats()["reconnects"] == 1
+
+
+def test_stats_are_logged(monkeypatch, capsys):
+    """Tests the pool prints its stats every STATS_EVERY checkouts."""
+    monkeypatch.setattr(db_pool, "STATS_EVERY", 2)
+    pool, _ = make_pool()
+    for _ in range(3):
+        with pool.connection():
+            pass
+    assert capsys.readouterr().out.count("[POOL] 2 checkouts") == 1
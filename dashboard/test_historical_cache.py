@@ -0,0 +1,114 @@
+"""Tests for historical_cache.py"""
+from datetime import date
+from pathlib import Path
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from historical_cache import HistoricalCache, MANIFEST_NAME
+
+DAY = "year=2025/month=9/day=24/"
+
+
+class FakeS3:
+    """A fake S3 client serving parquet files, each with an ETag."""
+
+    def __init__(self, tmp_path: Path, delay: float = 0):
+        self.source = tmp_path / "s3"
+        self.source.mkdir()
+        self.objects = {}  # key -> ETag
+        self.downloads = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def put(self, key: str, df: pd.DataFrame, etag: str) -> None:
+        """Stores a frame as a parquet object."""
+        path = self.source / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(path)
+        self.objects[key] = etag
+
+    def get_paginator(self, _name):
+        """Mocks get_paginator."""
+        return self
+
+    def paginate(self, **_kwargs):
+        """Mocks paginate, returning every object in one page."""
+        return [{"Contents": [{"Key": key, "ETag": etag} for key, etag in self.objects.items()]}]
+
+    def download_file(self, _bucket, key, filename):
+        """Mocks download_file, copying the stored object."""
+        time.sleep(self.delay)
+        with self._lock:
+            self.downloads.append(key)
+        Path(filename).write_bytes((self.source / key).read_bytes())
+
+
+def readings(plant: str, moisture: float) -> pd.DataFrame:
+    """Returns one archived summary row."""
+    return pd.DataFrame({"plant_name": [plant], "avg_soil_moisture": [moisture]})
+
+
+@pytest.fixture
+def s3(tmp_path):
+    """An archive with one day of one plant."""
+    fake = FakeS3(tmp_path)
+    fake.put(f"{DAY}summary.parquet", readings("Ficus", 40.0), '"etag-1"')
+    return fake
+
+
+def test_sync_then_hit(tmp_path, s3):
+    """Tests a second sync downloads nothing and reads come from the local copy."""
+    cache = HistoricalCache(root=tmp_path / "cache", prefix="")
+    assert cache.sync(s3) == [date(2025, 9, 24)]
+    version = cache.version()
+
+    assert cache.sync(s3) == [date(2025, 9, 24)]
+    assert s3.downloads == [f"{DAY}summary.parquet"]
+    assert cache.version() == version
+    rows = cache.read([date(2025, 9, 24)], ("Ficus",), ["plant_name", "avg_soil_moisture"])
+    assert rows.to_dict("records") == [{"plant_name": "Ficus", "avg_soil_moisture": 40.0}]
+    assert cache.read([date(2025, 9, 25)], columns=["plant_name"]).empty
+
+
+def test_changed_etag_invalidates_day(tmp_path, s3):
+    """Tests a day whose ETag changed is downloaded again, and a deleted day is dropped."""
+    cache = HistoricalCache(root=tmp_path / "cache", prefix="")
+    cache.sync(s3)
+    version = cache.version()
+
+    s3.put(f"{DAY}summary.parquet", readings("Ficus", 12.5), '"etag-2"')
+    cache.sync(s3)
+    assert len(s3.downloads) == 2
+    assert cache.version() != version
+    assert cache.read([date(2025, 9, 24)])["avg_soil_moisture"].tolist() == [12.5]
+
+    s3.objects.clear()
+    assert not cache.sync(s3)
+    assert not (tmp_path / "cache" / DAY).exists()
+
+
+def test_concurrent_syncs_download_once(tmp_path):
+    """Tests syncs from several sessions take turns, so each file is downloaded once."""
+    s3 = FakeS3(tmp_path, delay=0.05)
+    for day in range(1, 4):
+        s3.put(f"year=2025/month=9/day={day}/summary.parquet",
+               readings(f"Plant {day}", day), f'"{day}"')
+    caches = [HistoricalCache(root=tmp_path / "cache", prefix="") for _ in range(4)]
+    results = [None] * len(caches)
+
+    def sync(i):
+        results[i] = caches[i].sync(s3)
+
+    threads = [threading.Thread(target=sync, args=(i,)) for i in range(len(caches))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(s3.downloads) == sorted(s3.objects)
+    assert all(result == [date(2025, 9, day) for day in (3, 2, 1)] for result in results)
+    assert (tmp_path / "cache" / MANIFEST_NAME).exists()
+    assert len(caches[0].read([date(2025, 9, day) for day in range(1, 4)])) == 3
@@ -0,0 +1,79 @@
+"""
+Writes daily summaries to the Hive-partitioned Parquet archive.
+
+Files are laid out as {root}/year=YYYY/month=M/day=D/[plant_bucket=N/]part-0.parquet
+so the Glue crawler registers year, month and day as partition keys and
+Athena only reads the days a query asks for. Writing a day replaces that
+day's partition, so a re-run of the Lambda does not duplicate rows.
+"""
+
+from os import environ
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+ARCHIVE_ROOT = environ.get("ARCHIVE_ROOT", "s3://c19-alpha-s3-bucket")
+# 0 keeps one file per day, N > 0 splits each day into N files by plant_id % N
+PLANT_BUCKETS = int(environ.get("ARCHIVE_PLANT_BUCKETS", "0"))
+ROWS_PER_GROUP = int(environ.get("ARCHIVE_ROWS_PER_GROUP", "131072"))
+DATE_PARTITIONS = [("year", pa.int16()), ("month", pa.int8()), ("day", pa.int8())]
+
+
+def add_partition_columns(summary: pd.DataFrame, plant_buckets: int = PLANT_BUCKETS) -> pd.DataFrame:
+    """Returns the summary with the year/month/day (and plant_bucket) partition columns added."""
+    dates = pd.to_datetime(summary["date"])
+    partitioned = summary.assign(year=dates.dt.year, month=dates.dt.month, day=dates.dt.day)
+    if plant_buckets:
+        partitioned["plant_bucket"] = partitioned["plant_id"] % plant_buckets
+    # Sorting by plant_id gives each row group a tight plant_id min/max for predicate pushdown
+    return partitioned.sort_values("plant_id", kind="stable").reset_index(drop=True)
+
+
+def get_partitioning(plant_buckets: int = PLANT_BUCKETS) -> ds.Partitioning:
+    """Returns the Hive partitioning scheme of the archive."""
+    fields = list(DATE_PARTITIONS)
+    if plant_buckets:
+        fields.append(("plant_bucket", pa.int16()))
+    return ds.partitioning(pa.schema(fields), flavor="hive")
+
+
+def get_filesystem(root: str) -> tuple[fs.FileSystem, str]:
+    """Returns the filesystem and base path for an s3:// URI or a local directory."""
+    if "://" not in root:
+        return fs.LocalFileSystem(), root
+    return fs.FileSystem.from_uri(root)
+
+
+def day_paths(summary: pd.DataFrame, base: str) -> list[str]:
+    """Returns the partition directory of every day in the summary."""
+    days = summary[["year", "month", "day"]].drop_duplicates()
+    return [f"{base.rstrip('/')}/year={year}/month={month}/day={day}"
+            for year, month, day in days.itertuples(index=False, name=None)]
+
+
+def write_summary(summary: pd.DataFrame, root: str = ARCHIVE_ROOT,
+                  plant_buckets: int = PLANT_BUCKETS) -> list[str]:
+    """Writes the summary into its day partitions, replacing them if present, and returns them."""
+    filesystem, base = get_filesystem(root)
+    partitioned = add_partition_columns(summary, plant_buckets)
+    partitions = day_paths(partitioned, base)
+    for path in partitions:
+        filesystem.delete_dir_contents(path, missing_dir_ok=True)
+
+    parquet_format = ds.ParquetFileFormat()
+    ds.write_dataset(
+        pa.Table.from_pandas(partitioned, preserve_index=False),
+        base,
+        filesystem=filesystem,
+        format=parquet_format,
+        file_options=parquet_format.make_write_options(compression="snappy",
+                                                       write_statistics=True),
+        partitioning=get_partitioning(plant_buckets),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=ROWS_PER_GROUP,
+        min_rows_per_group=min(ROWS_PER_GROUP, len(partitioned)),
+    )
+    return partitions
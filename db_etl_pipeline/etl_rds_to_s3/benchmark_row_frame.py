@@ -0,0 +1,76 @@
+"""
+Benchmark building a DataFrame from pyodbc-style rows: one dict per row versus row_frame.
+
+Usage: PYTHONPATH=../../shared python benchmark_row_frame.py [sizes...]
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from row_frame import rows_to_frame
+from transform import RECORDING_COLUMNS
+
+SIZES = [100_000, 1_000_000]
+
+
+def fake_rows(size: int) -> list[tuple]:
+    """Returns recording rows with the Python types pyodbc produces."""
+    rng = random.Random(0)
+    start = datetime(2025, 9, 24)
+    return [(i, rng.randint(1, 50), rng.randint(1, 10), Decimal(rng.randint(5, 25)),
+             start - timedelta(hours=rng.randint(1, 9)), Decimal(rng.randint(10, 90)),
+             start + timedelta(seconds=rng.randint(0, 86_399)))
+            for i in range(1, size + 1)]
+
+
+def dict_per_row(rows: list[tuple]) -> pd.DataFrame:
+    """The previous approach: index every column of every row into a dict."""
+    records = []
+    for row in rows:
+        record = {}
+        for i, name in enumerate(RECORDING_COLUMNS):
+            record[name] = row[i]
+        records.append(record)
+    df = pd.DataFrame(records)
+    for col in ["temperature", "soil_moisture"]:
+        df[col] = pd.to_numeric(df[col])
+    for col in ["last_watered", "recording_taken"]:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def columnar(rows: list[tuple]) -> pd.DataFrame:
+    """The row_frame approach."""
+    return rows_to_frame(rows, RECORDING_COLUMNS)
+
+
+def measure(func, rows: list[tuple]) -> tuple[float, float]:
+    """Returns the wall time in seconds and the peak traced allocation in MB of a call."""
+    start = time.perf_counter()
+    func(rows)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+
+def main(sizes: list[int]) -> None:
+    """Prints time and peak allocations of each approach for each size."""
+    print(f"{'rows':>9} {'approach':>12} {'seconds':>8} {'peak MB':>8}")
+    for size in sizes:
+        rows = fake_rows(size)
+        for name, func in (("dict per row", dict_per_row), ("columnar", columnar)):
+            seconds, peak = measure(func, rows)
+            print(f"{size:>9} {name:>12} {seconds:>8.2f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,90 @@
+"""
+Benchmark the vectorised daily summary against the previous per-plant loop.
+
+Usage: PYTHONPATH=../../shared python benchmark_transform.py
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import random
+import time
+
+import pandas as pd
+
+from row_frame import rows_to_frame
+from transform import RECORDING_COLUMNS, get_summary_plant_data
+
+# (recordings, plants); the loop is O(plants x recordings) so it only runs on the small sizes
+SIZES = [(10_000, 100), (100_000, 1_000), (1_000_000, 10_000)]
+LOOP_LIMIT = 100_000
+
+
+def fake_tables(recordings: int, plants: int) -> dict[list]:
+    """Returns tables shaped like extract.get_data's output."""
+    rng = random.Random(0)
+    start = datetime(2025, 9, 24)
+    return {
+        "country": [(i, f"Country {i}") for i in range(1, 21)],
+        "city": [(i, f"City {i}") for i in range(1, 101)],
+        "botanist": [(i, f"Botanist {i}", f"b{i}@lnhm.co.uk", "0123") for i in range(1, 11)],
+        "plant": [(i, f"Plant {i}", f"Plantae {i}", i % 20 + 1, i % 100 + 1,
+                   Decimal("51.5"), Decimal("-0.12")) for i in range(1, plants + 1)],
+        "recording": [(i, rng.randint(1, plants), rng.randint(1, 10),
+                       Decimal(rng.randint(5, 25)), start - timedelta(hours=rng.randint(1, 9)),
+                       Decimal(rng.randint(10, 90)),
+                       start + timedelta(seconds=rng.randint(0, 86_399)))
+                      for i in range(1, recordings + 1)],
+    }
+
+
+def loop_summary(plant_data: dict[list]) -> pd.DataFrame:
+    """The previous implementation: one scan of every recording per plant."""
+    names = {subject: {row[0]: row for row in plant_data[subject]}
+             for subject in ["plant", "country", "city", "botanist"]}
+    summary_data = []
+    for plant_id, plant in names["plant"].items():
+        records = rows_to_frame([recording for recording in plant_data["recording"]
+                                 if recording[1] == plant_id], RECORDING_COLUMNS)
+        if records.empty:
+            continue
+        botanist = names["botanist"][records["botanist_id"].iloc[0]]
+        summary_data.append({
+            "plant_id": plant_id, "plant_name": plant[1], "scientific_name": plant[2],
+            "country": names["country"][plant[3]][1], "city": names["city"][plant[4]][1],
+            "latitude": plant[5], "longitude": plant[6],
+            "botanist_id": botanist[0], "botanist_name": botanist[1],
+            "botanist_email": botanist[2], "botanist_phone_number": botanist[3],
+            "avg_temperature": records["temperature"].mean(),
+            "avg_soil_moisture": records["soil_moisture"].mean(),
+            "last_watered": records["last_watered"].max(),
+            "date": records["recording_taken"].dt.date.min(),
+        })
+    return pd.DataFrame(summary_data)
+
+
+def timed(func, *args) -> tuple[float, pd.DataFrame]:
+    """Returns the wall time and result of a call."""
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    """Prints the wall time of each implementation for each size."""
+    print(f"{'recordings':>10} {'plants':>7} {'loop (s)':>9} {'vectorised (s)':>15}")
+    for recordings, plants in SIZES:
+        tables = fake_tables(recordings, plants)
+        vector_seconds, summary = timed(get_summary_plant_data, tables)
+        loop_seconds = "-"
+        if recordings <= LOOP_LIMIT:
+            seconds, expected = timed(loop_summary, tables)
+            loop_seconds = f"{seconds:.2f}"
+            expected = expected.sort_values("plant_id").reset_index(drop=True)
+            # The loop passes the plant table's Decimal coordinates through unconverted
+            expected[["latitude", "longitude"]] = expected[["latitude", "longitude"]].astype(float)
+            pd.testing.assert_frame_equal(summary, expected, check_dtype=False)
+        print(f"{recordings:>10} {plants:>7} {loop_seconds:>9} {vector_seconds:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 """Script that extracts the last 24 hours of data from the RDS."""
 
+from datetime import date, datetime, time, timedelta
 from os import environ
+from typing import Iterator
 
 from dotenv import load_dotenv
 import pyodbc
@@ -15,25 +17,98 @@ def get_connection() -> pyodbc.Connection:
     return conn
 
 
-def query_database(conn: pyodbc.Connection, sql: str) -> list[list]:
+FETCH_BATCH_SIZE = int(environ.get("FETCH_BATCH_SIZE", "5000"))
+# Ordered by id so each plant's "first" botanist matches DAILY_SUMMARY_SQL's
+RECORDING_WINDOW_SQL = ("SELECT * FROM alpha.recording "
+                        "WHERE recording_taken >= ? AND recording_taken < ? ORDER BY id;")
+
+DAILY_SUMMARY_SQL = """
+WITH daily AS (
+    SELECT plant_id,
+           AVG(CAST(temperature AS FLOAT)) AS avg_temperature,
+           AVG(CAST(soil_moisture AS FLOAT)) AS avg_soil_moisture,
+           MAX(last_watered) AS last_watered,
+           CAST(MIN(recording_taken) AS DATE) AS date
+    FROM alpha.recording
+    WHERE recording_taken >= ? AND recording_taken < ?
+    GROUP BY plant_id
+), first_botanist AS (
+    SELECT plant_id, botanist_id,
+           ROW_NUMBER() OVER (PARTITION BY plant_id ORDER BY id) AS position
+    FROM alpha.recording
+    WHERE recording_taken >= ? AND recording_taken < ?
+)
+SELECT d.plant_id, p.name, p.scientific_name, co.name, ci.name, p.latitude, p.longitude,
+       b.botanist_id, b.botanist_name, b.email, b.phone,
+       d.avg_temperature, d.avg_soil_moisture, d.last_watered, d.date
+FROM daily AS d
+JOIN alpha.plant AS p ON p.plant_id = d.plant_id
+LEFT JOIN first_botanist AS fb ON fb.plant_id = d.plant_id AND fb.position = 1
+LEFT JOIN alpha.botanist AS b ON b.botanist_id = fb.botanist_id
+LEFT JOIN alpha.country AS co ON co.country_id = p.country_id
+LEFT JOIN alpha.city AS ci ON ci.city_id = p.city_id
+ORDER BY d.plant_id;
+"""
+
+
+def query_database(conn: pyodbc.Connection, sql: str, params: tuple = ()) -> list[list]:
     """Returns the result of a query to the database."""
     with conn.cursor() as cursor:
-        cursor.execute(sql)
+        cursor.execute(sql, *params)
         result = cursor.fetchall()
     return result
 
 
-def get_data(conn: pyodbc.Connection) -> dict[list]:
-    """Returns all the data from the database in a dictionary."""
+def stream_query(conn: pyodbc.Connection, sql: str, params: tuple = (),
+                 batch_size: int = FETCH_BATCH_SIZE) -> Iterator[list]:
+    """Yields the result of a query in batches of at most batch_size rows."""
+    with conn.cursor() as cursor:
+        cursor.execute(sql, *params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+def get_day_window(day: date = None) -> tuple[datetime, datetime]:
+    """Returns the start and end of a day, by default the day before today."""
+    day = day or date.today() - timedelta(days=1)
+    start = datetime.combine(day, time())
+    return start, start + timedelta(days=1)
+
+
+def get_dimension_data(conn: pyodbc.Connection) -> dict[list]:
+    """Returns the country, city, plant and botanist tables in a dictionary."""
     data = dict()
     data["country"] = query_database(conn, "SELECT * FROM alpha.country;")
     data["city"] = query_database(conn, "SELECT * FROM alpha.city;")
     data["plant"] = query_database(conn, "SELECT * FROM alpha.plant;")
-    data["recording"] = query_database(conn, "SELECT * FROM alpha.recording;")
     data["botanist"] = query_database(conn, "SELECT * FROM alpha.botanist;")
     return data
 
 
+def get_data(conn: pyodbc.Connection, start: datetime = None, end: datetime = None) -> dict[list]:
+    """Returns all the data from the database in a dictionary, limiting recordings to the window."""
+    data = get_dimension_data(conn)
+    if start is None or end is None:
+        data["recording"] = query_database(conn, "SELECT * FROM alpha.recording;")
+    else:
+        data["recording"] = query_database(conn, RECORDING_WINDOW_SQL, (start, end))
+    return data
+
+
+def stream_recordings(conn: pyodbc.Connection, start: datetime, end: datetime,
+                      batch_size: int = FETCH_BATCH_SIZE) -> Iterator[list]:
+    """Yields the recordings taken within the window in batches."""
+    return stream_query(conn, RECORDING_WINDOW_SQL, (start, end), batch_size)
+
+
+def get_daily_summary_rows(conn: pyodbc.Connection, start: datetime, end: datetime) -> list[list]:
+    """Returns one aggregated row per plant for the window, computed by the database."""
+    return query_database(conn, DAILY_SUMMARY_SQL, (start, end, start, end))
+
+
 if __name__ == "__main__":
     load_dotenv()
     db_conn = get_connection()
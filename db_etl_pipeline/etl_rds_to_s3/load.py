@@ -1,22 +1,36 @@
 """Script that loads the summary csv file into the S3 bucket."""
 
-import awswrangler as wr
+from os import environ
+
 from dotenv import load_dotenv
 
-from extract import get_connection, get_data
-from transform import get_summary_plant_data, generate_file_name
+from extract import (get_connection, get_dimension_data, get_day_window,
+                     get_daily_summary_rows, stream_recordings)
+from transform import get_summary_from_batches, get_summary_from_rows
+from archive import write_summary
+from runtime import cached, connection_alive, timed_handler
+
+# "python" streams the day's recordings through pandas in batches, "sql" runs one GROUP BY on the RDS
+SUMMARY_MODE = environ.get("SUMMARY_MODE", "python")
 
 
+@timed_handler
 def handler(event=None, context=None) -> dict[str:str]:
-    """Handler function for Lambda that uploads summary data to the S3 bucket."""
-    conn = get_connection()
-    tables = get_data(conn)
-    summary = get_summary_plant_data(tables)
-    file_name = generate_file_name(summary)
-    wr.s3.to_parquet(df=summary, path=f"s3://c19-alpha-s3-bucket/{file_name}.parquet",
-                     dataset=True, mode="overwrite")
+    """Handler function for Lambda that uploads yesterday's summary data to the S3 bucket."""
+    conn = cached("connection", get_connection, connection_alive)
+    start, end = get_day_window()
+    if SUMMARY_MODE == "sql":
+        summary = get_summary_from_rows(get_daily_summary_rows(conn, start, end))
+    else:
+        summary = get_summary_from_batches(get_dimension_data(conn),
+                                           stream_recordings(conn, start, end))
+    if summary.empty:
+        return {
+            "message": f"No recordings between {start} and {end}"
+        }
+    partitions = write_summary(summary)
     return {
-        "message": "Uploaded"
+        "message": f"Uploaded {', '.join(partitions)}"
     }
 
 
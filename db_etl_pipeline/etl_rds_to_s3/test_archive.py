@@ -0,0 +1,67 @@
+# pylint: disable=redefined-outer-name
+"""Tests for archive.py"""
+from datetime import date
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from archive import get_partitioning, write_summary
+
+
+@pytest.fixture
+def summary():
+    """A small daily summary for three plants."""
+    return pd.DataFrame({
+        "plant_id": [3, 1, 2],
+        "plant_name": ["Cactus", "Ficus", "Monstera"],
+        "avg_temperature": [25.0, 20.0, 18.5],
+        "date": [date(2025, 9, 24)] * 3,
+    })
+
+
+def read_archive(root, plant_buckets=0) -> pd.DataFrame:
+    """Reads the archive back with its partition columns."""
+    dataset = ds.dataset(str(root), format="parquet", partitioning=get_partitioning(plant_buckets))
+    return dataset.to_table().to_pandas().sort_values("plant_id").reset_index(drop=True)
+
+
+def test_write_summary_uses_hive_day_partitions(summary, tmp_path):
+    """Tests that a day is written under year=/month=/day= directories."""
+    partitions = write_summary(summary, str(tmp_path), plant_buckets=0)
+    assert partitions == [f"{tmp_path}/year=2025/month=9/day=24"]
+    assert (tmp_path / "year=2025" / "month=9" / "day=24" / "part-0.parquet").exists()
+
+    archived = read_archive(tmp_path)
+    assert archived["plant_id"].tolist() == [1, 2, 3]
+    assert set(archived["day"]) == {24}
+
+
+def test_write_summary_is_idempotent_per_day(summary, tmp_path):
+    """Tests that rewriting a day replaces it while other days are kept."""
+    next_day = summary.assign(date=date(2025, 9, 25))
+    write_summary(summary, str(tmp_path), plant_buckets=0)
+    write_summary(next_day, str(tmp_path), plant_buckets=0)
+    write_summary(summary, str(tmp_path), plant_buckets=0)
+
+    archived = read_archive(tmp_path)
+    assert len(archived) == 6
+    assert archived.groupby("day").size().to_dict() == {24: 3, 25: 3}
+
+
+def test_write_summary_plant_buckets(summary, tmp_path):
+    """Tests that plant buckets split a day by plant_id."""
+    write_summary(summary, str(tmp_path), plant_buckets=2)
+    day = tmp_path / "year=2025" / "month=9" / "day=24"
+    assert sorted(path.name for path in day.iterdir()) == ["plant_bucket=0", "plant_bucket=1"]
+    assert len(read_archive(tmp_path, plant_buckets=2)) == 3
+
+
+def test_write_summary_records_column_statistics(summary, tmp_path):
+    """Tests that row groups carry min/max statistics for pruning."""
+    write_summary(summary, str(tmp_path), plant_buckets=0)
+    metadata = pq.ParquetFile(tmp_path / "year=2025" / "month=9" / "day=24" / "part-0.parquet").metadata
+    column = metadata.schema.names.index("plant_id")
+    stats = metadata.row_group(0).column(column).statistics
+    assert (stats.min, stats.max) == (1, 3)
@@ -1,6 +1,8 @@
 """Tests for extract.py"""
+from datetime import date, datetime
+
 import pyodbc
-from extract import get_connection, query_database, get_data
+from extract import get_connection, query_database, get_data, get_day_window, stream_query
 
 
 def test_get_connection_builds_correct_conn_string(monkeypatch):
@@ -87,3 +89,64 @@ def test_get_data_calls_query_database_for_each_table(monkeypatch):
         assert isinstance(data[key][0], str)
         assert data[key][0].strip().lower().startswith("select * from alpha.")
     assert len(called_sql) == len(expected_keys)
+
+
+def test_get_data_filters_recordings_to_window(monkeypatch):
+    """Tests that a time window is pushed into the recording query as parameters."""
+    calls = {}
+
+    def fake_query(_conn, sql, params=()):
+        calls[sql] = params
+        return []
+
+    monkeypatch.setattr("extract.query_database", fake_query)
+
+    start, end = datetime(2025, 9, 24), datetime(2025, 9, 25)
+    get_data(object(), start, end)
+
+    recording_sql = [sql for sql in calls if "alpha.recording" in sql]
+    assert len(recording_sql) == 1
+    assert "WHERE recording_taken >= ? AND recording_taken < ?" in recording_sql[0]
+    assert recording_sql[0].rstrip(";").endswith("ORDER BY id")
+    assert calls[recording_sql[0]] == (start, end)
+
+
+def test_get_day_window():
+    """Tests that the day window covers exactly one day from midnight."""
+    start, end = get_day_window(date(2025, 9, 24))
+    assert start == datetime(2025, 9, 24)
+    assert end == datetime(2025, 9, 25)
+
+
+def test_stream_query_yields_batches():
+    """Tests that stream_query fetches rows in batches until the cursor is exhausted."""
+    rows = [(i,) for i in range(5)]
+
+    class FakeCursor:
+        """A fake cursor serving rows through fetchmany."""
+        def __enter__(self):
+            """Returns the cursor itself for use in a `with` statement."""
+            return self
+
+        def __exit__(self, *a):
+            """Exists the `with` statement context."""
+            return False
+
+        def execute(self, sql, *params):
+            """Mocks the execute method."""
+            self.params = params
+
+        def fetchmany(self, size):
+            """Mocks the fetchmany method."""
+            batch = rows[:size]
+            del rows[:size]
+            return batch
+
+    class FakeConn:
+        """A fake connection for testing purposes."""
+        def cursor(self):
+            """Mocks the cursor method."""
+            return FakeCursor()
+
+    batches = list(stream_query(FakeConn(), "SELECT 1", batch_size=2))
+    assert batches == [[(0,), (1,)], [(2,), (3,)], [(4,)]]
@@ -4,11 +4,10 @@ import pandas as pd
 import pytest
 
 from transform import (
-    get_all_plant_ids,
-    get_id_map,
-    get_records_for_id,
-    get_row_by_id,
-    clean_plant_records,
+    get_summary_plant_data,
+    get_summary_from_rows,
+    get_summary_from_batches,
+    SUMMARY_COLUMNS,
 )
 
 @pytest.fixture
@@ -44,39 +43,67 @@ def plant_data():
     }
 
 
-def test_get_all_plant_ids(plant_data):
-    """Tests that get_all_plant_ids returns all plant IDs."""
-    ids = get_all_plant_ids(plant_data["plant"])
-    assert set(ids) == {1, 2}
+def test_get_summary_plant_data(plant_data):
+    """Tests that the summary has one row per plant with recordings."""
+    summary = get_summary_plant_data(plant_data)
 
+    assert len(summary) == 1
+    row = summary.iloc[0]
+    assert row["plant_id"] == 1
+    assert row["plant_name"] == "Ficus"
+    assert row["country"] == "UK" and row["city"] == "London"
+    assert row["botanist_email"] == "alice@example.com"
+    assert pytest.approx(row["avg_temperature"], rel=1e-3) == 21.0
+    assert pytest.approx(row["avg_soil_moisture"], rel=1e-3) == 13.4
+    assert row["last_watered"] == pd.Timestamp("2025-09-25")
+    assert str(row["date"]) == "2025-09-24"
 
-def test_get_id_map(plant_data):
-    """Tests that get_id_map correctly creates a mapping."""
-    mapping = get_id_map(plant_data, "plant")
-    assert mapping[1] == "Ficus"
-    assert mapping[2] == "Monstera"
 
+def test_get_summary_plant_data_no_recordings(plant_data):
+    """Tests that an empty recording table gives an empty summary."""
+    plant_data["recording"] = []
+    summary = get_summary_plant_data(plant_data)
+    assert summary.empty
+    assert "avg_temperature" in summary.columns
 
-def test_get_records_for_id(plant_data):
-    """Tests that get_records_for_id returns a dataframe with only the specified ID."""
-    df = get_records_for_id(1, plant_data["recording"])
-    assert isinstance(df, pd.DataFrame)
-    assert set(df["plant_id"].unique()) == {1}
 
+def test_get_summary_from_rows():
+    """Tests that database-aggregated rows get the summary columns."""
+    row = (1, "Ficus", "Ficus lyrata", "UK", "London", 51.5, -0.12, 10, "Alice",
+           "alice@example.com", "123-456", 21.0, 13.4, pd.Timestamp("2025-09-25"),
+           pd.Timestamp("2025-09-24").date())
+    summary = get_summary_from_rows([row])
+    assert list(summary.columns) == SUMMARY_COLUMNS
+    assert summary["plant_name"].iloc[0] == "Ficus"
 
-def test_get_row_by_id(plant_data):
-    """Tests that get_row_by_id returns the correct row as a tuple."""
-    row = get_row_by_id(1, plant_data, "plant")
-    assert isinstance(row, tuple)
-    assert row[0] == 1 and row[1] == "Ficus"
 
+def test_get_summary_from_batches_matches_single_batch(plant_data):
+    """Tests that aggregating recordings in batches gives the same summary as all at once."""
+    recordings = plant_data["recording"] + [
+        (102, 2, 10, 10.0, pd.Timestamp("2025-09-23"), 30.0, pd.Timestamp("2025-09-24 12:00:00")),
+        (103, 1, 10, 24.0, pd.Timestamp("2025-09-26"), 11.0, pd.Timestamp("2025-09-24 09:00:00")),
+    ]
+    whole = get_summary_from_batches(plant_data, [recordings])
+    batched = get_summary_from_batches(plant_data,
+                                       [recordings[:1], recordings[1:3], recordings[3:]])
+
+    pd.testing.assert_frame_equal(whole, batched)
+    ficus = batched[batched["plant_id"] == 1].iloc[0]
+    assert pytest.approx(ficus["avg_temperature"], rel=1e-3) == 22.0
+    assert ficus["last_watered"] == pd.Timestamp("2025-09-26")
+    assert str(ficus["date"]) == "2025-09-24"
 
-def test_clean_plant_records(plant_data):
-    """Tests that clean_plant_records correctly processes and summarizes data."""
-    df = get_records_for_id(1, plant_data["recording"])
-    summary = clean_plant_records(df, plant_data)
 
-    assert summary["plant_id"] == 1
-    assert summary["plant_name"] == "Ficus"
-    assert summary["botanist_name"] == "Alice"
-    assert pytest.approx(summary["avg_temperature"], rel=1e-3) == 21.0
+def test_get_summary_unknown_ids(plant_data):
+    """Tests plants missing from the plant table are dropped and unknown botanists left empty."""
+    plant_data["recording"] += [
+        (102, 3, 10, 10.0, pd.Timestamp("2025-09-23"), 30.0, pd.Timestamp("2025-09-24 12:00:00")),
+        (103, 2, 11, 18.0, pd.Timestamp("2025-09-23"), 25.0, pd.Timestamp("2025-09-24 13:00:00")),
+    ]
+    summary = get_summary_plant_data(plant_data)
+
+    assert summary["plant_id"].tolist() == [1, 2]
+    assert list(summary.columns) == SUMMARY_COLUMNS
+    monstera = summary.iloc[1]
+    assert monstera["country"] == "US" and monstera["city"] == "NYC"
+    assert pd.isna(monstera["botanist_name"]) and pd.isna(monstera["botanist_email"])
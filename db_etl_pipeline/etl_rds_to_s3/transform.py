@@ -3,93 +3,123 @@
 from dotenv import load_dotenv
 import pandas as pd
 
+from dimensions import DimensionIndex
 from extract import get_connection, get_data
-
-
-def get_all_plant_ids(plants: list) -> list[int]:
-    """Returns a list of unique plant ids."""
-    ids = list(set([plant[0] for plant in plants]))
-    return ids
-
-
-def get_id_map(plant_data: dict[list], subject: str) -> dict[int:str]:
-    """Returns a map of ids and names for a subject."""
-    subject_rows = plant_data[subject]
-    id_map = dict()
-    for row in subject_rows:
-        id_map[row[0]] = row[1]
-    return id_map
-
-
-def get_records_for_id(plant_id: int, recordings: list) -> pd.DataFrame:
-    """Returns a Dataframe containing all the records for a plant."""
-    records = []
-    for recording in recordings:
-        if recording[1] == plant_id:
-            record = dict()
-            record["recording_id"] = recording[0]
-            record["plant_id"] = recording[1]
-            record["botanist_id"] = recording[2]
-            record["temperature"] = recording[3]
-            record["last_watered"] = recording[4]
-            record["soil_moisture"] = recording[5]
-            record["recording_taken"] = recording[6]
-            records.append(record)
-    return pd.DataFrame(records)
-
-
-def get_row_by_id(desired_id: int, plant_data: dict[list], subject: str) -> tuple:
-    """Returns the row from the plant table which contains the plant id."""
-    rows = plant_data[subject]
-    for row in rows:
-        if row[0] == desired_id:
-            return row
-    return None
-
-
-def clean_plant_records(records: pd.DataFrame, plant_data: dict[list]) -> dict:
-    """Returns a dictionary containing a summary of the records."""
-    plant_map = get_id_map(plant_data, "plant")
-    botanist_map = get_id_map(plant_data, "botanist")
-    summary = dict()
-
-    summary["plant_id"] = records["plant_id"].iloc()[0]
-    summary["plant_name"] = records["plant_id"].map(plant_map).to_list()[0]
-    plant_info = get_row_by_id(summary["plant_id"], plant_data, "plant")
-    summary["scientific_name"] = plant_info[2]
-    summary["country"] = get_id_map(plant_data, "country")[plant_info[3]]
-    summary["city"] = get_id_map(plant_data, "city")[plant_info[4]]
-    summary["latitude"] = plant_info[5]
-    summary["longitude"] = plant_info[6]
-
-    summary["botanist_id"] = records["botanist_id"].iloc()[0]
-    summary["botanist_name"] = records["botanist_id"].map(botanist_map).to_list()[
-        0]
-    botanist_info = get_row_by_id(
-        summary["botanist_id"], plant_data, "botanist")
-    summary["botanist_email"] = botanist_info[2]
-    summary["botanist_phone_number"] = botanist_info[3]
-
-    summary["avg_temperature"] = records["temperature"].mean()
-    summary["avg_soil_moisture"] = records["soil_moisture"].mean()
-
-    summary["last_watered"] = records["last_watered"].max()
-    summary["date"] = records["recording_taken"].dt.date.min()
-    return summary
+from row_frame import rows_to_frame
+
+RECORDING_COLUMNS = ["recording_id", "plant_id", "botanist_id", "temperature",
+                     "last_watered", "soil_moisture", "recording_taken"]
+PLANT_COLUMNS = ["plant_id", "plant_name", "scientific_name", "country_id", "city_id",
+                 "latitude", "longitude"]
+BOTANIST_COLUMNS = ["botanist_id", "botanist_name", "botanist_email", "botanist_phone_number"]
+SUMMARY_COLUMNS = ["plant_id", "plant_name", "scientific_name", "country", "city", "latitude",
+                   "longitude", "botanist_id", "botanist_name", "botanist_email",
+                   "botanist_phone_number", "avg_temperature", "avg_soil_moisture",
+                   "last_watered", "date"]
+
+
+def get_recordings_frame(recordings: list) -> pd.DataFrame:
+    """Returns all recordings as one typed Dataframe."""
+    df = rows_to_frame(recordings, RECORDING_COLUMNS)
+    for col in ["temperature", "soil_moisture"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ["last_watered", "recording_taken"]:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def get_partial_aggregates(recordings: pd.DataFrame) -> pd.DataFrame:
+    """Returns per-plant sums, counts and extremes that can be combined across batches."""
+    return recordings.groupby("plant_id", sort=False).agg(
+        botanist_id=("botanist_id", "first"),
+        temperature_sum=("temperature", "sum"),
+        temperature_count=("temperature", "count"),
+        soil_moisture_sum=("soil_moisture", "sum"),
+        soil_moisture_count=("soil_moisture", "count"),
+        last_watered=("last_watered", "max"),
+        first_taken=("recording_taken", "min"),
+    )
+
+
+class SummaryAccumulator:
+    """Keeps running per-plant aggregates so recordings can arrive in batches."""
+
+    COMBINE = {
+        "botanist_id": "first",
+        "temperature_sum": "sum",
+        "temperature_count": "sum",
+        "soil_moisture_sum": "sum",
+        "soil_moisture_count": "sum",
+        "last_watered": "max",
+        "first_taken": "min",
+    }
+
+    def __init__(self):
+        self.totals = None
+
+    def add(self, recordings: list) -> None:
+        """Folds a batch of recording rows into the running aggregates."""
+        partial = get_partial_aggregates(get_recordings_frame(recordings))
+        if self.totals is None:
+            self.totals = partial
+        else:
+            combined = pd.concat([self.totals, partial])
+            self.totals = combined.groupby(level=0, sort=False).agg(self.COMBINE)
+
+    def summarise(self) -> pd.DataFrame:
+        """Returns one row of aggregated readings per plant."""
+        if self.totals is None:
+            return pd.DataFrame(columns=["plant_id", "botanist_id", "avg_temperature",
+                                         "avg_soil_moisture", "last_watered", "date"])
+        totals = self.totals.sort_index()
+        return pd.DataFrame({
+            "botanist_id": totals["botanist_id"],
+            "avg_temperature": totals["temperature_sum"] / totals["temperature_count"],
+            "avg_soil_moisture": totals["soil_moisture_sum"] / totals["soil_moisture_count"],
+            "last_watered": totals["last_watered"],
+            "date": totals["first_taken"].dt.date,
+        }).rename_axis("plant_id").reset_index()
+
+
+def join_dimensions(aggregates: pd.DataFrame, plant_data: dict[list]) -> pd.DataFrame:
+    """Returns the per-plant aggregates with their plant, location and botanist details."""
+    plants = DimensionIndex.from_frame(
+        rows_to_frame(plant_data["plant"], PLANT_COLUMNS), "plant_id")
+    countries = DimensionIndex.from_frame(
+        rows_to_frame(plant_data["country"], ["country_id", "country"]), "country_id")
+    cities = DimensionIndex.from_frame(
+        rows_to_frame(plant_data["city"], ["city_id", "city"]), "city_id")
+    botanists = DimensionIndex.from_frame(
+        rows_to_frame(plant_data["botanist"], BOTANIST_COLUMNS), "botanist_id")
+
+    # Aggregates for plants missing from the plant table are dropped, like an inner join
+    summary = aggregates[plants.contains(aggregates["plant_id"])].reset_index(drop=True)
+    columns = {col: summary[col] for col in summary.columns}
+    columns.update(plants.lookup_many(summary["plant_id"], PLANT_COLUMNS[1:]))
+    columns["country"] = countries.lookup(columns["country_id"], "country")
+    columns["city"] = cities.lookup(columns["city_id"], "city")
+    columns.update(botanists.lookup_many(summary["botanist_id"], BOTANIST_COLUMNS[1:]))
+    return pd.DataFrame({col: columns[col] for col in SUMMARY_COLUMNS})
+
+
+def get_summary_from_batches(dimension_data: dict[list], recording_batches) -> pd.DataFrame:
+    """Returns the summary for recordings streamed in batches, holding one batch at a time."""
+    accumulator = SummaryAccumulator()
+    for batch in recording_batches:
+        accumulator.add(batch)
+    return join_dimensions(accumulator.summarise(), dimension_data)
 
 
 def get_summary_plant_data(plant_data: dict[list]) -> pd.DataFrame:
     """Returns a dataframe containing a summary of plant recordings over the last 24hrs."""
-    plant_ids = get_all_plant_ids(plant_data["plant"])
+    return get_summary_from_batches(plant_data, [plant_data["recording"]])
 
-    summary_data = []
-    for plant_id in plant_ids:
-        plant_records = get_records_for_id(plant_id, plant_data["recording"])
-        if not plant_records.empty:
-            plant_records = clean_plant_records(plant_records, plant_data)
-            summary_data.append(plant_records)
 
-    return pd.DataFrame(summary_data)
+def get_summary_from_rows(rows: list) -> pd.DataFrame:
+    """Returns the summary Dataframe for rows already aggregated by the database."""
+    summary = rows_to_frame(rows, SUMMARY_COLUMNS)
+    summary["last_watered"] = pd.to_datetime(summary["last_watered"])
+    return summary
 
 
 def generate_file_name(summary: pd.DataFrame) -> str:
@@ -1,11 +1,14 @@
 -- Liverpool Natural History Museum Database Schema (SQL Server)
 
 -- Drop any existing table 
+DROP TABLE IF EXISTS alpha.latest_recording
+DROP TABLE IF EXISTS alpha.recording_hourly
 DROP TABLE alpha.recording
 DROP TABLE alpha.plant
 DROP TABLE alpha.city
 DROP TABLE alpha.country
 DROP TABLE alpha.botanist
+DROP TYPE IF EXISTS alpha.recording_rows
 
 
 -- Botanist table
@@ -54,3 +57,64 @@ CREATE TABLE alpha.recording (
     recording_taken DATETIME
 );
 
+
+-- Index for time-window queries on recordings
+CREATE INDEX ix_recording_recording_taken ON alpha.recording (recording_taken)
+    INCLUDE (id, plant_id, botanist_id, temperature, last_watered, soil_moisture);
+
+-- Index for fetching recordings added since a known id
+CREATE UNIQUE INDEX ix_recording_id ON alpha.recording (id);
+
+-- One recording per plant per reading time; duplicate inserts are skipped with a warning, not an error
+CREATE UNIQUE INDEX ix_recording_plant_taken ON alpha.recording (plant_id, recording_taken)
+    WITH (IGNORE_DUP_KEY = ON);
+
+
+-- Each plant's most recent recording, kept up to date by the API load
+CREATE TABLE alpha.latest_recording (
+    plant_id INTEGER PRIMARY KEY REFERENCES plant(plant_id),
+    recording_id INTEGER,
+    botanist_id INTEGER REFERENCES botanist(botanist_id),
+    temperature DECIMAL,
+    last_watered DATETIME2,
+    soil_moisture DECIMAL,
+    recording_taken DATETIME
+);
+
+
+-- Hourly per-plant aggregates of recordings, kept up to date by the API load
+CREATE TABLE alpha.recording_hourly (
+    plant_id INTEGER NOT NULL REFERENCES plant(plant_id),
+    hour_start DATETIME NOT NULL,
+    reading_count INTEGER NOT NULL,
+    avg_temperature FLOAT,
+    min_temperature DECIMAL,
+    max_temperature DECIMAL,
+    avg_soil_moisture FLOAT,
+    min_soil_moisture DECIMAL,
+    max_soil_moisture DECIMAL,
+    PRIMARY KEY (plant_id, hour_start)
+);
+
+
+-- Last alert sent for each plant and rule, kept across resets so repeat alerts stay suppressed
+IF OBJECT_ID('alpha.alert_state') IS NULL
+CREATE TABLE alpha.alert_state (
+    plant_id INTEGER NOT NULL,
+    alert_rule VARCHAR(50) NOT NULL,
+    last_sent DATETIME2 NOT NULL,
+    last_value FLOAT,
+    alert_level INTEGER NOT NULL,
+    PRIMARY KEY (plant_id, alert_rule)
+);
+
+
+-- Recording rows table type, used to bulk insert recordings as a table-valued parameter
+CREATE TYPE alpha.recording_rows AS TABLE (
+    plant_id INTEGER,
+    botanist_id INTEGER,
+    temperature DECIMAL,
+    last_watered DATETIME2,
+    soil_moisture DECIMAL,
+    recording_taken DATETIME2
+);
@@ -3,27 +3,54 @@
 import os
 import boto3
 
+from runtime import timed_handler
+
 # Create SES client
 ses = boto3.client('ses')
 
+
+def get_alerts(event: dict) -> list[dict]:
+    """Returns the plant alerts in an event, which is either one batch or a single alert."""
+    if "alerts" in event:
+        return event["alerts"]
+    return [{"plant": event.get('plant', 'Unknown'),
+             "emergency_type": event.get('emergency_type', 'Unknown')}]
+
+
+def describe_alert(alert: dict) -> str:
+    """Returns a one-line description of a plant alert."""
+    description = f"{alert.get('plant', 'Unknown')} - {alert.get('emergency_type', 'Unknown')}"
+    if alert.get('readings', 1) > 1:
+        description += f" ({alert['readings']} readings)"
+    if alert.get('level', 1) > 1:
+        description += f" [escalated, level {alert['level']}]"
+    return description
+
+
+@timed_handler
 def lambda_handler(event, context):
     """Lambda handler for alert. """
     # Extract details from the event
-    plant = event.get('plant', 'Unknown')
-    emergency_type = event.get('emergency_type', 'Unknown')
+    alerts = get_alerts(event)
     botanist = event.get('botanist', 'Unknown')
     phone = event.get('phone', 'Not provided')
 
     # email for both sender and recipient -
     EMAIL = os.environ.get("ALERT_EMAIL")
 
-    SUBJECT = f"Plant At Risk Alert: {plant}"
+    if len(alerts) == 1:
+        SUBJECT = f"Plant At Risk Alert: {alerts[0].get('plant', 'Unknown')}"
+    else:
+        SUBJECT = f"Plant At Risk Alert: {len(alerts)} plants"
+
+    descriptions = [describe_alert(alert) for alert in alerts]
+    alert_lines = "\n".join(descriptions)
+    alert_items = "\n".join(f"            <li>{description}</li>" for description in descriptions)
 
     BODY_TEXT = (
         f"Hello {botanist},\n\n"
-        f"The following plant has been flagged as at risk:\n\n"
-        f"Plant: {plant}\n"
-        f"Emergency Type: {emergency_type}\n"
+        f"The following plants have been flagged as at risk:\n\n"
+        f"{alert_lines}\n\n"
         f"Contact: {phone}\n\n"
         f"Please take immediate action."
     )
@@ -32,12 +59,11 @@ def lambda_handler(event, context):
     <body>
         <h2>Plant At Risk Alert</h2>
         <p>Hello <b>{botanist}</b>,</p>
-        <p>The following plant has been flagged as at risk:</p>
+        <p>The following plants have been flagged as at risk:</p>
         <ul>
-            <li><b>Plant:</b> {plant}</li>
-            <li><b>Emergency Type:</b> {emergency_type}</li>
-            <li><b>Contact:</b> {phone}</li>
+{alert_items}
         </ul>
+        <p><b>Contact:</b> {phone}</p>
         <p>Please take immediate action.</p>
     </body>
     </html>
@@ -0,0 +1,121 @@
+"""
+Groups alert violations and decides which to send.
+
+Violations are collapsed to one alert per plant and rule, carrying the worst
+reading in the window. An alert is only sent again after ALERT_COOLDOWN_MINUTES,
+unless the reading has worsened by ALERT_ESCALATION_MARGIN since the last one
+sent, which escalates it. Sent alerts are recorded in alpha.alert_state, which
+the nightly reset leaves in place, and each botanist receives one batch.
+"""
+
+from datetime import datetime, timedelta
+from os import environ
+
+import pyodbc
+
+ALERT_COOLDOWN = timedelta(minutes=int(environ.get("ALERT_COOLDOWN_MINUTES", "180")))
+ESCALATION_MARGIN = float(environ.get("ALERT_ESCALATION_MARGIN", "5"))
+BOTANIST_COLUMNS = ["botanist_id", "botanist_name", "email", "phone"]
+
+ALERT_STATE_SQL = "SELECT plant_id, alert_rule, last_sent, last_value, alert_level FROM alpha.alert_state"
+SAVE_ALERT_STATE_SQL = """
+    MERGE alpha.alert_state WITH (HOLDLOCK) AS target
+    USING (VALUES (?, ?, ?, ?, ?)) AS source (plant_id, alert_rule, last_sent, last_value, alert_level)
+    ON target.plant_id = source.plant_id AND target.alert_rule = source.alert_rule
+    WHEN MATCHED THEN UPDATE SET last_sent = source.last_sent, last_value = source.last_value,
+        alert_level = source.alert_level
+    WHEN NOT MATCHED BY TARGET THEN INSERT (plant_id, alert_rule, last_sent, last_value, alert_level)
+        VALUES (source.plant_id, source.alert_rule, source.last_sent, source.last_value,
+                source.alert_level);
+"""
+
+
+def summarise_violations(alerts: list[dict], rules: list[tuple]) -> list[dict]:
+    """Returns one alert per plant and broken rule with its worst reading and reading count."""
+    alerts = sorted(alerts, key=lambda alert: alert["recording_taken"])
+    violations = []
+    for column, threshold, label in rules:
+        summaries = {}
+        for alert in alerts:
+            value = alert[column]
+            if value is None or value > threshold:
+                continue
+            summary = summaries.setdefault(alert["plant_id"], {
+                "plant_id": alert["plant_id"], "rule": label, "worst": float(value), "readings": 0})
+            summary["worst"] = min(summary["worst"], float(value))
+            summary["readings"] += 1
+            # The plant name and botanist of the latest broken reading are the ones to tell
+            summary["plant_name"] = alert["plant_name"]
+            summary["last_taken"] = alert["recording_taken"]
+            summary.update({key: alert[key] for key in BOTANIST_COLUMNS})
+        violations.extend(summaries[plant_id] for plant_id in sorted(summaries))
+    return violations
+
+
+def load_alert_state(conn: pyodbc.Connection) -> dict[tuple, tuple]:
+    """Returns the last alert sent for each (plant_id, rule)."""
+    with conn.cursor() as cursor:
+        cursor.execute(ALERT_STATE_SQL)
+        return {(row[0], row[1]): (row[2], row[3], row[4]) for row in cursor.fetchall()}
+
+
+def select_alerts(violations: list[dict], state: dict, now: datetime,
+                  cooldown: timedelta = ALERT_COOLDOWN,
+                  margin: float = ESCALATION_MARGIN) -> list[dict]:
+    """Returns the violations due to be sent, with their alert level."""
+    due = []
+    for violation in violations:
+        previous = state.get((violation["plant_id"], violation["rule"]))
+        if previous is None or now - previous[0] >= cooldown:
+            level = 1
+        elif violation["worst"] <= previous[1] - margin:
+            level = previous[2] + 1
+        else:
+            continue
+        due.append({**violation, "level": level})
+    return due
+
+
+def build_batches(due: list[dict]) -> list[tuple[list[dict], dict]]:
+    """Returns the alerts and the batch to send for each botanist."""
+    by_botanist = {}
+    for alert in due:
+        by_botanist.setdefault(alert["botanist_id"], []).append(alert)
+    batches = []
+    for alerts in by_botanist.values():
+        first = alerts[0]
+        batch = {key: first[column] for key, column in
+                 (("botanist", "botanist_name"), ("email", "email"), ("phone", "phone"))
+                 if first[column] is not None}
+        batch["alerts"] = [{
+            "plant": alert["plant_name"],
+            "emergency_type": f"{alert['rule']}: {alert['worst']}",
+            "readings": alert["readings"],
+            "level": alert["level"],
+        } for alert in alerts]
+        batches.append((alerts, batch))
+    return batches
+
+
+def save_alert_state(conn: pyodbc.Connection, sent: list[dict], now: datetime) -> None:
+    """Records the alerts just sent."""
+    with conn.cursor() as cursor:
+        for alert in sent:
+            cursor.execute(SAVE_ALERT_STATE_SQL, alert["plant_id"], alert["rule"], now,
+                           alert["worst"], alert["level"])
+    conn.commit()
+
+
+def dispatch_alerts(conn: pyodbc.Connection, alerts: list[dict], rules: list[tuple],
+                    send, now: datetime) -> int:
+    """Sends one batch per botanist for the alerts that are due and returns how many were sent."""
+    violations = summarise_violations(alerts, rules)
+    due = select_alerts(violations, load_alert_state(conn), now)
+    suppressed = len(violations) - len(due)
+    if suppressed:
+        print(f"[ALERT] Suppressed {suppressed} repeat alert(s) still in cooldown")
+    for sent, batch in build_batches(due):
+        send(batch)
+        # Only record what was sent, so a failed send is retried next run
+        save_alert_state(conn, sent, now)
+    return len(due)
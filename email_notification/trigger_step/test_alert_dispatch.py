@@ -0,0 +1,128 @@
+"""Tests for alert_dispatch.py"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from alert_dispatch import (SAVE_ALERT_STATE_SQL, build_batches, save_alert_state,
+                            select_alerts, summarise_violations)
+
+RULES = [("soil_moisture", 20, "Moisture Level"), ("temperature", 5, "Temperature")]
+NOW = datetime(2026, 1, 1, 12)
+COOLDOWN = timedelta(hours=3)
+
+
+def reading(plant_id: int, minute: int, soil_moisture=None, temperature=None,
+            botanist_id: int = 1) -> dict:
+    """Returns an alert row as get_alerts builds it."""
+    return {"recording_id": minute, "plant_id": plant_id, "plant_name": f"Plant {plant_id}",
+            "botanist_id": botanist_id, "botanist_name": f"Botanist {botanist_id}",
+            "email": f"b{botanist_id}@lnhm.co.uk", "phone": None,
+            "temperature": temperature, "soil_moisture": soil_moisture,
+            "recording_taken": NOW - timedelta(minutes=60 - minute)}
+
+
+def violation(plant_id: int, worst: float, rule: str = "Moisture Level",
+              botanist_id: int = 1) -> dict:
+    """Returns a summarised violation."""
+    return {"plant_id": plant_id, "rule": rule, "worst": worst, "readings": 1,
+            "plant_name": f"Plant {plant_id}", "last_taken": NOW, "botanist_id": botanist_id,
+            "botanist_name": f"Botanist {botanist_id}", "email": f"b{botanist_id}@lnhm.co.uk",
+            "phone": None}
+
+
+def test_summarise_violations_keeps_worst_reading_per_plant_and_rule():
+    """Tests readings collapse to one violation per plant and rule with the worst value."""
+    alerts = [
+        reading(1, 10, soil_moisture=Decimal(18), temperature=Decimal(20)),
+        reading(1, 20, soil_moisture=Decimal(12), temperature=Decimal(4), botanist_id=2),
+        reading(1, 5, soil_moisture=Decimal(15)),
+        reading(2, 30, soil_moisture=None, temperature=Decimal(3)),
+    ]
+    violations = summarise_violations(alerts, RULES)
+    assert [(v["plant_id"], v["rule"], v["worst"], v["readings"]) for v in violations] == [
+        (1, "Moisture Level", 12.0, 3), (1, "Temperature", 4.0, 1), (2, "Temperature", 3.0, 1)]
+    # The latest broken reading's botanist is the one told
+    assert violations[0]["botanist_id"] == 2
+    assert violations[0]["last_taken"] == alerts[1]["recording_taken"]
+
+
+def test_summarise_violations_without_violations():
+    """Tests readings within every threshold raise nothing."""
+    assert summarise_violations([reading(1, 10, soil_moisture=50, temperature=20)], RULES) == []
+
+
+def test_select_alerts_cooldown_suppresses_repeat():
+    """Tests an alert sent within the cooldown is not sent again."""
+    state = {(1, "Moisture Level"): (NOW - timedelta(hours=1), 15.0, 1)}
+    assert select_alerts([violation(1, 14.0)], state, NOW, cooldown=COOLDOWN, margin=5) == []
+
+
+def test_select_alerts_resends_after_cooldown():
+    """Tests an alert is sent again at level 1 once the cooldown has passed."""
+    state = {(1, "Moisture Level"): (NOW - COOLDOWN, 15.0, 3)}
+    due = select_alerts([violation(1, 14.0)], state, NOW, cooldown=COOLDOWN, margin=5)
+    assert [alert["level"] for alert in due] == [1]
+
+
+def test_select_alerts_escalation_bypasses_cooldown():
+    """Tests a reading worse by the margin is sent within the cooldown at a higher level."""
+    state = {(1, "Moisture Level"): (NOW - timedelta(minutes=5), 15.0, 1),
+             (1, "Temperature"): (NOW - timedelta(minutes=5), 4.0, 2)}
+    violations = [violation(1, 10.0), violation(1, 0.0, rule="Temperature"), violation(2, 19.0)]
+    due = select_alerts(violations, state, NOW, cooldown=COOLDOWN, margin=5)
+    assert [(alert["plant_id"], alert["rule"], alert["level"]) for alert in due] == [
+        (1, "Moisture Level", 2), (2, "Moisture Level", 1)]
+
+
+def test_build_batches_one_per_botanist():
+    """Tests due alerts are split into one batch per botanist, leaving out missing contacts."""
+    due = [dict(violation(1, 12.0), level=1), dict(violation(2, 3.0, botanist_id=2), level=2),
+           dict(violation(3, 9.0), level=1)]
+    batches = build_batches(due)
+    assert [[alert["plant_id"] for alert in alerts] for alerts, _ in batches] == [[1, 3], [2]]
+    first = batches[0][1]
+    assert first["botanist"] == "Botanist 1" and "phone" not in first
+    assert first["alerts"] == [
+        {"plant": "Plant 1", "emergency_type": "Moisture Level: 12.0", "readings": 1, "level": 1},
+        {"plant": "Plant 3", "emergency_type": "Moisture Level: 9.0", "readings": 1, "level": 1}]
+    assert batches[1][1]["alerts"][0]["level"] == 2
+
+
+class FakeCursor:
+    """A cursor that records the statements it runs."""
+
+    def __init__(self):
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, *params):
+        self.executed.append((sql, params))
+
+
+class FakeConnection:
+    """A connection with one shared cursor that records commits."""
+
+    def __init__(self):
+        self.cursor_ = FakeCursor()
+        self.commits = 0
+
+    def cursor(self):
+        return self.cursor_
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_save_alert_state_upserts_each_sent_alert():
+    """Tests every sent alert is merged into alpha.alert_state in one commit."""
+    conn = FakeConnection()
+    sent = [dict(violation(1, 12.0), level=1), dict(violation(2, 3.0, rule="Temperature"), level=2)]
+    save_alert_state(conn, sent, NOW)
+    assert conn.cursor_.executed == [
+        (SAVE_ALERT_STATE_SQL, (1, "Moisture Level", NOW, 12.0, 1)),
+        (SAVE_ALERT_STATE_SQL, (2, "Temperature", NOW, 3.0, 2))]
+    assert conn.commits == 1
@@ -0,0 +1,78 @@
+"""Tests for trigger_step.py"""
+from datetime import datetime
+from decimal import Decimal
+
+from trigger_step import ALERT_COLUMNS, ALERT_RULES, build_alert_query, get_alerts
+
+LOWER_TIME = datetime(2026, 1, 1, 11)
+
+
+class FakeCursor:
+    """A cursor that records the statements it runs and returns fixed rows."""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.executed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, *params):
+        """Records a statement and its bound parameters."""
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        """Returns the fixed rows."""
+        return self.rows
+
+
+class FakeConnection:  # pylint: disable=too-few-public-methods
+    """A connection with one shared cursor."""
+
+    def __init__(self, rows: list):
+        self.cursor_ = FakeCursor(rows)
+
+    def cursor(self):
+        """Returns the shared cursor."""
+        return self.cursor_
+
+
+def test_build_alert_query_binds_thresholds():
+    """Tests each rule adds a bound condition and its threshold, never the value itself."""
+    sql, thresholds = build_alert_query([("soil_moisture", 17, "Moisture"),
+                                         ("temperature", 3, "Temperature")])
+    assert "r.recording_taken > ? AND (r.soil_moisture <= ? OR r.temperature <= ?)" in sql
+    assert thresholds == [17, 3]
+    assert "17" not in sql and "3" not in sql
+
+
+def test_build_alert_query_defaults_to_alert_rules():
+    """Tests the query is built from ALERT_RULES when no rules are given."""
+    sql, thresholds = build_alert_query()
+    assert thresholds == [threshold for _, threshold, _ in ALERT_RULES]
+    assert sql.count("?") == len(ALERT_RULES) + 1
+
+
+def test_get_alerts_binds_window_then_thresholds():
+    """Tests the lower time and thresholds are passed as parameters in query order."""
+    conn = FakeConnection([])
+    get_alerts(conn, LOWER_TIME)
+    sql, thresholds = build_alert_query()
+    assert conn.cursor_.executed == [(sql, (LOWER_TIME, *thresholds))]
+
+
+def test_get_alerts_maps_rows_to_dicts():
+    """Tests each row becomes a dict keyed by ALERT_COLUMNS."""
+    row = (7, 1, "Ficus", 2, "Alice", "alice@lnhm.co.uk", None, Decimal(4), Decimal(30),
+           datetime(2026, 1, 1, 11, 30))
+    alerts = get_alerts(FakeConnection([row]), LOWER_TIME)
+    assert alerts == [dict(zip(ALERT_COLUMNS, row))]
+    assert alerts[0]["plant_name"] == "Ficus" and alerts[0]["temperature"] == Decimal(4)
+
+
+def test_get_alerts_without_rows():
+    """Tests no matching recordings gives an empty list."""
+    assert not get_alerts(FakeConnection([]), LOWER_TIME)
@@ -1,4 +1,8 @@
-"""Checks the RDS and if there is an emergency triggers the email step function."""
+"""Checks the RDS and if there is an emergency triggers the email step function.
+
+The database connection and Step Functions client are reused across warm
+invocations, and boto3 is only imported once there is an alert to send.
+"""
 
 from datetime import datetime, timedelta
 from os import environ
@@ -6,7 +10,21 @@ import json
 
 from dotenv import load_dotenv
 import pyodbc
-import boto3
+
+from alert_dispatch import dispatch_alerts
+from runtime import cached, connection_alive, lazy_import, timed_handler
+
+boto3 = lazy_import("boto3")
+
+MOISTURE_THRESHOLD = 20
+TEMPERATURE_THRESHOLD = 5
+# (column, threshold, label): a recording at or below any threshold raises an alert
+ALERT_RULES = [
+    ("soil_moisture", MOISTURE_THRESHOLD, "Moisture Level"),
+    ("temperature", TEMPERATURE_THRESHOLD, "Temperature"),
+]
+ALERT_COLUMNS = ["recording_id", "plant_id", "plant_name", "botanist_id", "botanist_name",
+                 "email", "phone", "temperature", "soil_moisture", "recording_taken"]
 
 
 def get_connection() -> pyodbc.Connection:
@@ -18,62 +36,52 @@ def get_connection() -> pyodbc.Connection:
     return conn
 
 
-def query_database(conn: pyodbc.Connection, sql: str) -> list[list]:
-    """Returns the result of a query to the database."""
+def build_alert_query(rules: list[tuple] = None) -> tuple[str, list]:
+    """Returns a query for recordings after a time that break any rule, and the rule thresholds."""
+    rules = ALERT_RULES if rules is None else rules
+    conditions = " OR ".join(f"r.{column} <= ?" for column, _, _ in rules)
+    sql = f"""
+        SELECT r.id, r.plant_id, p.name, r.botanist_id, b.botanist_name, b.email, b.phone,
+               r.temperature, r.soil_moisture, r.recording_taken
+        FROM alpha.recording AS r
+        JOIN alpha.plant AS p ON r.plant_id = p.plant_id
+        LEFT JOIN alpha.botanist AS b ON r.botanist_id = b.botanist_id
+        WHERE r.recording_taken > ? AND ({conditions})
+        ORDER BY r.recording_taken
+    """
+    return sql, [threshold for _, threshold, _ in rules]
+
+
+def get_alerts(conn: pyodbc.Connection, lower_time: datetime) -> list[dict]:
+    """Returns the recordings since a lower bound time that break an alert rule."""
+    sql, thresholds = build_alert_query()
     with conn.cursor() as cursor:
-        cursor.execute(sql)
-        result = cursor.fetchall()
-    return result
+        cursor.execute(sql, lower_time, *thresholds)
+        return [dict(zip(ALERT_COLUMNS, row)) for row in cursor.fetchall()]
 
 
-def get_recordings(conn: pyodbc.Connection, lower_time: datetime):
-    """Returns recordings that are greater than a lower bound time."""
-    query = f"SELECT * FROM alpha.recording;"
-    result = query_database(conn, query)
-    relevant_records = []
-    for record in result:
-        if record[6] > lower_time:
-            relevant_records.append(record)
-    return relevant_records
+def get_step_functions_client():
+    """Returns the Step Functions client, created once per container."""
+    return cached("stepfunctions", lambda: boto3.client('stepfunctions', region_name='eu-west-2'))
 
 
 def trigger_step_function(emergency_details: dict[str:str]) -> None:
     """Triggers the AWS step function to send an email with emergency details."""
-    sf = boto3.client('stepfunctions', region_name='eu-west-2')
-    sf.start_execution(
+    get_step_functions_client().start_execution(
         stateMachineArn='arn:aws:states:eu-west-2:129033205317:stateMachine:c19-alpha-email-notification',
         input=json.dumps(emergency_details))
 
 
-def good_moisture_level(moisture: float) -> bool:
-    """Checks if the moisture level is acceptable for a recording."""
-    if moisture > 20:
-        return True
-    return False
-
-
-def check_plant_health(recordings: list[tuple]) -> None:
-    """Performs health checks on the each of the recordings."""
-    for record in recordings:
-        if not good_moisture_level(record[5]):
-            print("BAD")
-            details = dict()
-            details["plant"] = record[1]
-            details["emergency_type"] = f"Moisture Level: {record[5]}"
-            details["botanist"] = record[2]
-            details["email"] = "testing@test.com"
-            details["phone"] = "999"
-            trigger_step_function(details)
-
-
+@timed_handler
 def handler(event=None, context=None) -> dict[str:str]:
     """Handler function for Lambda to trigger a step function if theres an emergency."""
-    db_conn = get_connection()
-    relevant_time = datetime.now() - timedelta(hours=1, minutes=2)
-    records = get_recordings(db_conn, relevant_time)
-    check_plant_health(records)
+    db_conn = cached("connection", get_connection, connection_alive)
+    now = datetime.now()
+    relevant_time = now - timedelta(hours=1, minutes=2)
+    alerts = get_alerts(db_conn, relevant_time)
+    sent = dispatch_alerts(db_conn, alerts, ALERT_RULES, trigger_step_function, now)
     return {
-        "message": "Triggered"
+        "message": f"Triggered {sent} alert(s)"
     }
 
 
@@ -0,0 +1,56 @@
+"""
+Key lookups against dimension tables without merging frames.
+
+A DimensionIndex hashes a dimension's keys once and resolves a whole column
+of keys with a single get_indexer call, then takes the wanted attributes by
+position. A lookup is O(rows) and allocates only its output columns, so no
+intermediate merged frame is built. A categorical key column is resolved once
+per category and mapped through its codes. The same index serves natural key
+to surrogate id in the API transform and id to name in the daily summary.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class DimensionIndex:
+    """A dimension table's attribute columns, positioned by a hash index of its keys."""
+
+    def __init__(self, keys, columns: dict):
+        self.index = pd.Index(keys)
+        if not self.index.is_unique:
+            raise ValueError("Dimension keys must be unique")
+        self.columns = {name: pd.Series(values).array for name, values in columns.items()}
+        # Like merge, any missing key (None or NaN) matches the dimension's missing key
+        self.na_position = self.index.isna().argmax() if self.index.hasnans else -1
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, key: str) -> "DimensionIndex":
+        """Returns an index of a frame's other columns by its key column, keeping the first duplicate."""
+        df = df.drop_duplicates(key)
+        return cls(df[key], {col: df[col] for col in df.columns if col != key})
+
+    def positions(self, keys: pd.Series) -> np.ndarray:
+        """Returns the row of each key in the dimension, or -1 where it isn't found."""
+        if not isinstance(keys.dtype, pd.CategoricalDtype):
+            positions = self.index.get_indexer(keys)
+            positions[keys.isna().to_numpy()] = self.na_position
+            return positions
+        codes = keys.cat.codes.to_numpy()
+        by_category = np.append(self.index.get_indexer(keys.cat.categories), self.na_position)
+        return by_category[codes]  # code -1 picks the appended missing-key position
+
+    def contains(self, keys: pd.Series) -> np.ndarray:
+        """Returns whether each key is in the dimension."""
+        return self.positions(keys) >= 0
+
+    def lookup(self, keys: pd.Series, column: str, positions: np.ndarray = None) -> pd.Series:
+        """Returns a dimension column's value for each key, missing where the key isn't found."""
+        positions = self.positions(keys) if positions is None else positions
+        values = self.columns[column].take(positions, allow_fill=True)
+        return pd.Series(values, index=keys.index, name=column)
+
+    def lookup_many(self, keys: pd.Series, columns: list) -> dict:
+        """Returns several dimension columns for each key, hashing the keys once."""
+        positions = self.positions(keys)
+        return {column: self.lookup(keys, column, positions) for column in columns}
@@ -0,0 +1,30 @@
+"""
+Lists the imports that dominate a handler's cold start.
+
+Usage: python importtime.py <module>...  (from the handler's directory, with
+PYTHONPATH set to shared/). The numbers are `python -X importtime`'s, slowest
+first. Only used locally, so it isn't copied into the images.
+"""
+
+import subprocess
+import sys
+
+
+def importtime_report(module: str, top: int = 15) -> list[tuple[float, float, str]]:
+    """Returns the slowest imports of a module as (cumulative ms, self ms, name)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    for handler_module in sys.argv[1:]:
+        print(f"Slowest imports of {handler_module} (cumulative ms, self ms):")
+        for cumulative, own, imported in importtime_report(handler_module):
+            print(f"{cumulative:10.1f} {own:10.1f}  {imported}")
@@ -0,0 +1,92 @@
+"""
+Helpers that keep Lambda cold and warm starts cheap.
+
+A Lambda container keeps its module state between invocations, so clients and
+connections are cached here and reused for as long as they stay healthy.
+Dependencies that only some code paths need are imported on first use, and
+each handler logs whether it ran cold and how long it took. importtime.py
+shows which imports dominate a handler's cold start.
+"""
+
+from time import perf_counter
+import functools
+import importlib
+
+_LOADED_AT = perf_counter()
+_resources = {}
+_invocations = 0
+
+
+class LazyModule:
+    """A module that is only imported when one of its attributes is first used."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Returns a module that is imported on first use instead of at cold start."""
+    return LazyModule(name)
+
+
+def close_quietly(resource) -> None:
+    """Closes a client or connection, ignoring errors from one that is already broken."""
+    try:
+        close = getattr(resource, "dispose", None) or getattr(resource, "close", None)
+        if close is not None:
+            close()
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+
+def cached(name: str, create, is_alive=None):
+    """Returns the resource cached under a name, creating it if it is missing or dead."""
+    resource = _resources.get(name)
+    if resource is not None:
+        if is_alive is None or is_alive(resource):
+            return resource
+        print(f"[RUNTIME] Cached {name} is no longer alive, reconnecting")
+        close_quietly(resource)
+    resource = create()
+    _resources[name] = resource
+    return resource
+
+
+def connection_alive(conn) -> bool:
+    """Returns whether a cached DB-API connection still answers a trivial query."""
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1").fetchone()
+        finally:
+            cursor.close()
+        return True
+    except Exception:  # pylint: disable=broad-except
+        return False
+
+
+def timed_handler(handler):
+    """Wraps a Lambda handler to log cold and warm invocation times."""
+    @functools.wraps(handler)
+    def wrapper(event=None, context=None):
+        global _invocations  # pylint: disable=global-statement
+        _invocations += 1
+        cold = _invocations == 1
+        start = perf_counter()
+        try:
+            return handler(event, context)
+        finally:
+            elapsed = perf_counter() - start
+            if cold:
+                print(f"[RUNTIME] Cold start: {start - _LOADED_AT:.3f}s since import, "
+                      f"invocation {elapsed:.3f}s")
+            else:
+                print(f"[RUNTIME] Warm invocation {_invocations}: {elapsed:.3f}s")
+    return wrapper
+
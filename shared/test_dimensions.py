@@ -0,0 +1,57 @@
+"""Tests for dimensions.py"""
+import pandas as pd
+import pytest
+
+from dimensions import DimensionIndex
+
+
+@pytest.fixture
+def countries():
+    """A small country dimension keyed by name."""
+    return DimensionIndex(pd.Series(["UK", "France"]),
+                          {"country_id": pd.array([7, 9], dtype="Int64")})
+
+
+def test_lookup_matches_left_merge(countries):
+    """Tests that a lookup gives the same ids as a left merge, missing where unmatched."""
+    keys = pd.Series(["France", "Spain", "UK", None, "France"])
+    ids = countries.lookup(keys, "country_id")
+    assert ids.tolist() == [9, pd.NA, 7, pd.NA, 9]
+    assert ids.dtype == "Int64"
+    assert ids.index.equals(keys.index)
+
+
+def test_lookup_categorical_keys(countries):
+    """Tests that categorical keys resolve through their categories, including unused ones."""
+    keys = pd.Series(["UK", None, "Spain", "UK"], dtype="category", index=[4, 5, 6, 7])
+    keys = keys.cat.add_categories(["France"])
+    assert countries.lookup(keys, "country_id").tolist() == [7, pd.NA, pd.NA, 7]
+    assert countries.lookup(keys.iloc[:0], "country_id").empty
+
+
+def test_missing_key_matches_missing_dimension_key():
+    """Tests that, like merge, a missing key finds the dimension row with a missing key."""
+    botanists = DimensionIndex(pd.Series(["a@x.com", None]), {"botanist_id": [1, 2]})
+    emails = pd.Series(["a@x.com", float("nan"), None])
+    assert botanists.lookup(emails, "botanist_id").tolist() == [1, 2, 2]
+    assert botanists.lookup(emails.astype("category"), "botanist_id").tolist() == [1, 2, 2]
+
+
+def test_from_frame_and_lookup_many():
+    """Tests id to name lookups of several columns, keeping the first of duplicate keys."""
+    cities = DimensionIndex.from_frame(pd.DataFrame({
+        "city_id": [1, 2, 2],
+        "city": ["London", "Paris", "Lyon"],
+        "population": [9.0, 2.1, 0.5],
+    }), "city_id")
+    looked_up = cities.lookup_many(pd.Series([2, 3, 1]), ["city", "population"])
+    assert looked_up["city"].isna().tolist() == [False, True, False]
+    assert looked_up["city"].iloc[[0, 2]].tolist() == ["Paris", "London"]
+    assert looked_up["population"].iloc[[0, 2]].tolist() == [2.1, 9.0]
+    assert cities.contains(pd.Series([1, 3])).tolist() == [True, False]
+
+
+def test_duplicate_keys_rejected():
+    """Tests that keys must be unique to be indexed."""
+    with pytest.raises(ValueError):
+        DimensionIndex(pd.Series(["UK", "UK"]), {"country_id": [1, 2]})
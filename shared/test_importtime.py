@@ -0,0 +1,12 @@
+"""Tests for importtime.py"""
+from importtime import importtime_report
+
+
+def test_importtime_report_lists_slowest_imports():
+    """Tests the report parses -X importtime output, slowest cumulative time first."""
+    report = importtime_report("json", top=1000)
+    assert "json" in {name.strip() for _, _, name in report}
+    assert len(importtime_report("json", top=3)) == 3
+    cumulative = [row[0] for row in report]
+    assert cumulative == sorted(cumulative, reverse=True)
+    assert all(own <= total for total, own, _ in report)
@@ -0,0 +1,49 @@
+"""Tests for row_frame.py"""
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from row_frame import cursor_to_frame, rows_to_frame
+
+
+def test_rows_to_frame_converts_types():
+    """Tests that Decimals become float64, datetimes datetime64 and nullable ints Int64."""
+    rows = [
+        (1, 10, Decimal("12.5"), datetime(2025, 9, 24, 10), "Ficus"),
+        (2, None, None, None, None),
+    ]
+    df = rows_to_frame(rows, ["id", "botanist_id", "temperature", "recording_taken", "name"])
+    assert df["id"].dtype == "int64"
+    assert df["botanist_id"].dtype == "Int64"
+    assert df["temperature"].dtype == "float64"
+    assert pd.api.types.is_datetime64_dtype(df["recording_taken"])
+    assert df["temperature"].iloc[0] == 12.5
+    assert pd.isna(df["recording_taken"].iloc[1])
+
+
+def test_rows_to_frame_empty_keeps_columns():
+    """Tests that no rows still gives the named columns."""
+    df = rows_to_frame([], ["a", "b"], [int, Decimal])
+    assert list(df.columns) == ["a", "b"]
+    assert df.empty
+    assert df["b"].dtype == "float64"
+
+
+def test_cursor_to_frame_uses_description():
+    """Tests that names and types come from the cursor description."""
+    class FakeCursor:
+        """A fake cursor with a description and all-null Decimal column."""
+        description = [("id", int, None, 10, 10, 0, False),
+                       ("temperature", Decimal, None, 18, 18, 0, True)]
+
+        def fetchall(self):
+            """Mocks the fetchall method."""
+            return [(1, None), (2, None)]
+
+    df = cursor_to_frame(FakeCursor())
+    assert list(df.columns) == ["id", "temperature"]
+    assert df["temperature"].dtype == "float64"
+
+    renamed = cursor_to_frame(FakeCursor(), columns=["recording_id", "temp"])
+    assert list(renamed.columns) == ["recording_id", "temp"]
@@ -0,0 +1,113 @@
+"""Tests for runtime.py"""
+import sys
+
+import pytest
+
+import runtime
+from runtime import cached, connection_alive, lazy_import, timed_handler
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    """Gives every test its own resource cache."""
+    monkeypatch.setattr(runtime, "_resources", {})
+
+
+def test_lazy_import_defers_until_first_attribute(monkeypatch):
+    """Tests the module is only imported when an attribute is first used."""
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    colorsys = lazy_import("colorsys")
+    assert "colorsys" not in sys.modules
+    assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+    assert "colorsys" in sys.modules
+
+
+def test_lazy_import_missing_module_fails_on_use():
+    """Tests a missing module only raises once it is used."""
+    missing = lazy_import("no_such_module_here")
+    with pytest.raises(ImportError):
+        missing.anything  # pylint: disable=pointless-statement
+
+
+class FakeResource:  # pylint: disable=too-few-public-methods
+    """A client or connection that records whether it was closed."""
+
+    def __init__(self, alive: bool = True):
+        self.alive = alive
+        self.closed = False
+
+    def close(self):
+        """Marks the resource closed."""
+        self.closed = True
+
+
+def test_cached_creates_once():
+    """Tests a cached resource is created on the first call and reused after."""
+    created = []
+    first = cached("client", lambda: created.append(FakeResource()) or created[-1])
+    assert cached("client", lambda: created.append(FakeResource()) or created[-1]) is first
+    assert len(created) == 1
+
+
+def test_cached_replaces_dead_resource():
+    """Tests a resource that fails its health check is closed and recreated."""
+    dead = cached("conn", FakeResource)
+    dead.alive = False
+    fresh = cached("conn", FakeResource, lambda resource: resource.alive)
+    assert fresh is not dead and dead.closed and not fresh.closed
+
+
+class FakeCursor:
+    """A cursor whose query fails when its connection has dropped."""
+
+    def __init__(self, alive: bool):
+        self.alive = alive
+        self.closed = False
+
+    def execute(self, _sql):
+        """Runs a query, failing if the connection has dropped."""
+        if not self.alive:
+            raise OSError("connection dropped")
+        return self
+
+    def fetchone(self):
+        """Returns the single row of the health check."""
+        return (1,)
+
+    def close(self):
+        """Marks the cursor closed."""
+        self.closed = True
+
+
+def test_connection_alive():
+    """Tests the health check runs a trivial query and reports failures as dead."""
+    class Conn:  # pylint: disable=too-few-public-methods
+        """A connection that hands out fake cursors."""
+
+        def __init__(self, alive):
+            self.cursors = []
+            self.alive = alive
+
+        def cursor(self):
+            """Returns a new cursor on this connection."""
+            self.cursors.append(FakeCursor(self.alive))
+            return self.cursors[-1]
+
+    live, dropped = Conn(True), Conn(False)
+    assert connection_alive(live) and live.cursors[0].closed
+    assert not connection_alive(dropped) and dropped.cursors[0].closed
+
+
+def test_timed_handler_logs_cold_then_warm(monkeypatch, capsys):
+    """Tests the first invocation is logged as a cold start and later ones as warm."""
+    monkeypatch.setattr(runtime, "_invocations", 0)
+
+    @timed_handler
+    def handler(event, _context):
+        """Returns the event it was invoked with."""
+        return event
+
+    assert handler({"id": 1}, None) == {"id": 1}
+    handler({}, None)
+    out = capsys.readouterr().out
+    assert "[RUNTIME] Cold start" in out and "[RUNTIME] Warm invocation 2" in out